@@ -14,6 +14,7 @@ tests_require = [
     'nosexcover',
     'expects',
     'factory_boy',
+    'aiosqlite',
 ]
 
 requires = [
@@ -22,6 +23,11 @@ requires = [
     'python-dateutil',
 ]
 
+extras_require = {
+    'numpy': ['numpy'],
+    'asyncio': ['SQLAlchemy[asyncio]'],
+}
+
 
 VERSION = '0.9.0'
 
@@ -159,6 +165,7 @@ setup(
     zip_safe=False,
     setup_requires=setup_requires,
     install_requires=requires,
+    extras_require=extras_require,
     tests_require=tests_require,
     url='https://github.com/cbrand/python-sqlalchemy-filterparams',
     download_url='https://github.com/cbrand/'
@@ -3,3 +3,6 @@
 from .query_binding_configuration import (
     QueryBindingConfiguration as QueryBinding
 )
+from .async_query_binding_configuration import (
+    AsyncQueryBindingConfiguration as AsyncQueryBinding
+)
@@ -0,0 +1,213 @@
+# -*- encoding: utf-8 -*-
+
+from filterparams.obj import Query
+from sqlalchemy import select
+
+from .counting import Count, DEFAULT_COUNT_CAP, without_orders
+from .evaluation import Evaluation
+from .pagination import KeysetPaginator, Page, check_limit
+from .projection import fields_of
+from .query_binding_configuration import QueryBindingConfiguration
+from .streaming import DEFAULT_BATCH_SIZE
+from .util import is_empty
+
+
+class AsyncQueryBindingConfiguration(QueryBindingConfiguration):
+
+    @property
+    def _base_query(self):
+        model = self.metadata().model
+        if model is None:
+            raise RuntimeError(
+                'Could not determine model '
+                'for query binding configuration %s' % self.__class__
+            )
+        return select(model)
+
+    @property
+    def _async_session(self):
+        if self.session is None:
+            raise RuntimeError(
+                'Could not access SQLAlchemy session. Please '
+                'provide an \'AsyncSession\' in the constructor.'
+            )
+        return self.session
+
+    @property
+    def dialect_name(self):
+        try:
+            return self._async_session.sync_session.get_bind().dialect.name
+        except Exception:  # pylint: disable=broad-except
+            return None
+
+    def config_with(self, query):
+        query_config = super().config_with(query)
+        query_config.dialect_name = self.dialect_name
+        return query_config
+
+    async def fetch_params(self, params):
+        return await self.fetch(self.parse(params), fields_of(params))
+
+    async def fetch(self, filterparams_query: Query, fields=None):
+        return await self._fetch(self.evaluate(filterparams_query, fields))
+
+    async def fetch_rows_params(self, params):
+        return await self.fetch_rows(self.parse(params), fields_of(params))
+
+    async def fetch_rows(self, filterparams_query: Query, fields=None):
+        return await self._fetch(
+            self._rows_of(filterparams_query, fields),
+            scalars=False,
+        )
+
+    async def _fetch(self, statement, scalars=True):
+        if is_empty(statement):
+            return []
+        result_cache = self.metadata().result_cache
+        if result_cache is None:
+            with self.span('execute'):
+                result = await self._async_session.execute(statement)
+                if scalars:
+                    result = result.scalars()
+                items = result.all()
+        else:
+            items = await self._fetch_cached(statement, result_cache, scalars)
+        self.instrumentation().count(
+            'rows',
+            len(items),
+            binding=self.__class__.__name__,
+        )
+        return items
+
+    async def _fetch_cached(self, statement, result_cache, scalars=True):
+        lookup = result_cache.lookup(
+            self._async_session.sync_session,
+            statement,
+            scalars,
+        )
+        self._count_lookup(lookup)
+        if lookup.hit:
+            return lookup.items
+        with self.span('execute'):
+            return result_cache.store(
+                lookup,
+                await self._async_session.execute(statement),
+                scalars,
+            )
+
+    async def batch_params(self, params_list, limit=None):
+        return await self.batch(
+            [self.parse(params) for params in params_list],
+            limit,
+        )
+
+    async def batch(self, filterparams_queries, limit=None):
+        batch_query = self._batch_query(filterparams_queries, limit)
+        if batch_query.is_empty:
+            return batch_query.split(())
+        with self.span('execute'):
+            result = await self._async_session.execute(
+                batch_query.statement()
+            )
+            rows = result.all()
+        self.instrumentation().count(
+            'rows',
+            len(rows),
+            binding=self.__class__.__name__,
+        )
+        return batch_query.split(rows)
+
+    @staticmethod
+    def _statement_of(sql_query):
+        return sql_query
+
+    async def stream_params(self, params, batch_size=DEFAULT_BATCH_SIZE):
+        async for item in self.stream(self.parse(params), batch_size):
+            yield item
+
+    async def stream(self, filterparams_query: Query,
+                     batch_size=DEFAULT_BATCH_SIZE):
+        async for batch in self.stream_batches(filterparams_query, batch_size):
+            for item in batch:
+                yield item
+
+    async def stream_batches_params(self, params,
+                                    batch_size=DEFAULT_BATCH_SIZE):
+        async for batch in self.stream_batches(self.parse(params), batch_size):
+            yield batch
+
+    async def stream_batches(self, filterparams_query: Query,
+                             batch_size=DEFAULT_BATCH_SIZE):
+        if batch_size < 1:
+            raise ValueError(
+                'The batch size must be positive, got %s' % batch_size
+            )
+        evaluation = Evaluation(self.config_with(filterparams_query))
+        statement = evaluation.evaluate(self._base_query)
+        if is_empty(statement):
+            return
+        batch_size = evaluation.clamped(batch_size)
+        result = await self._async_session.stream_scalars(
+            evaluation.capped(statement).execution_options(
+                yield_per=batch_size
+            )
+        )
+        async for batch in result.partitions(batch_size):
+            self.instrumentation().count(
+                'rows',
+                len(batch),
+                binding=self.__class__.__name__,
+            )
+            yield batch
+
+    async def count_params(self, params, mode='exact',
+                           cap=DEFAULT_COUNT_CAP):
+        return await self.count(self.parse(params), mode, cap)
+
+    async def count(self, filterparams_query: Query, mode='exact',
+                    cap=DEFAULT_COUNT_CAP):
+        evaluation = Evaluation(
+            self.config_with(without_orders(filterparams_query))
+        )
+        statement = evaluation.evaluate(self._base_query)
+        counter = self._counter_of(evaluation, mode, cap)
+        if is_empty(statement):
+            return Count(0)
+        with self.span('execute'):
+            for count_statement, count_of in counter.statements(statement):
+                count = count_of(
+                    await self._async_session.scalar(count_statement)
+                )
+                if count is not None:
+                    return count
+
+    async def paginate_params(self, params, limit, cursor=None):
+        return await self.paginate(self.parse(params), limit, cursor)
+
+    async def paginate(self, filterparams_query: Query, limit, cursor=None):
+        check_limit(limit)
+        signer = self._cursor_signer()
+        evaluation = Evaluation(self.config_with(filterparams_query))
+        statement = evaluation.evaluate(self._base_query)
+        if is_empty(statement):
+            return Page([])
+
+        limit = evaluation.clamped(limit)
+        paginator = KeysetPaginator(
+            evaluation.plan,
+            self.metadata().model,
+            signer,
+            evaluation.query_config.dialect_name,
+        )
+        sort_keys = paginator.sort_keys
+        with self.span('execute'):
+            result = await self._async_session.execute(
+                paginator.statement(
+                    statement,
+                    limit,
+                    sort_keys,
+                    paginator.decode_optional(cursor, sort_keys),
+                )
+            )
+            rows = result.all()
+        return paginator.page_of(rows, limit, sort_keys)
@@ -0,0 +1,104 @@
+# -*- encoding: utf-8 -*-
+
+from sqlalchemy import (
+    Integer,
+    and_,
+    func,
+    inspect,
+    literal,
+    or_,
+    select,
+    union_all,
+)
+
+from .util import is_empty
+
+
+BATCH_COLUMN = '_batch'
+
+POSITION_COLUMN = '_position'
+
+LIMIT_COLUMN = '_limit'
+
+
+class BatchQuery:
+
+    def __init__(self, model, limit=None):
+        if limit is not None and limit < 1:
+            raise ValueError(
+                'The batch limit must be positive, got %s' % limit
+            )
+        self.model = model
+        self.limit = limit
+        self.size = 0
+        self._parts = []
+        self._limited = limit is not None
+
+    @property
+    def key_columns(self):
+        mapper = inspect(self.model)
+        return [
+            getattr(self.model, mapper.get_property_by_column(column).key)
+            for column in mapper.primary_key
+        ]
+
+    @property
+    def is_empty(self):
+        return not self._parts
+
+    def add(self, plan, statement, row_cap=None):
+        index = self.size
+        self.size += 1
+        if not is_empty(statement):
+            self._parts.append(
+                self._part_of(index, plan, statement, row_cap)
+            )
+        return index
+
+    def _part_of(self, index, plan, statement, row_cap):
+        key_columns = self.key_columns
+        limit = self.limit
+        if row_cap is not None:
+            limit = row_cap if limit is None else min(limit, row_cap)
+            self._limited = True
+        return statement.with_only_columns(
+            literal(index).label(BATCH_COLUMN),
+            literal(limit, type_=Integer).label(LIMIT_COLUMN),
+            *[
+                key.label('_key_%d' % position)
+                for position, key in enumerate(key_columns)
+            ],
+            func.row_number().over(
+                order_by=plan.orders + tuple(key_columns),
+            ).label(POSITION_COLUMN),
+            maintain_column_froms=True
+        ).order_by(None).limit(None)
+
+    def statement(self):
+        if len(self._parts) == 1:
+            batch = self._parts[0].subquery('batch')
+        else:
+            batch = union_all(*self._parts).subquery('batch')
+        statement = select(
+            self.model,
+            batch.c[BATCH_COLUMN],
+            batch.c[POSITION_COLUMN],
+        ).join(batch, and_(*[
+            key == batch.c['_key_%d' % position]
+            for position, key in enumerate(self.key_columns)
+        ]))
+        if self._limited:
+            statement = statement.where(or_(
+                batch.c[LIMIT_COLUMN].is_(None),
+                batch.c[POSITION_COLUMN] <= batch.c[LIMIT_COLUMN],
+            ))
+        return statement.order_by(
+            batch.c[BATCH_COLUMN],
+            batch.c[POSITION_COLUMN],
+        )
+
+    def split(self, rows):
+        results = [[] for _ in range(self.size)]
+        for item, index, _ in rows:
+            results[index].append(item)
+        return results
@@ -0,0 +1,255 @@
+# -*- encoding: utf-8 -*-
+
+import operator
+
+from datetime import date, datetime, timezone
+
+from .filters import (
+    EqFilter,
+    GreaterEqualFilter,
+    GreaterFilter,
+    IEqFilter,
+    InFilter,
+    LesserEqualFilter,
+    LesserFilter,
+    NeqFilter,
+    NotInFilter,
+    PrefixFilter,
+    _LikeBase,
+)
+from .memory import NULLS_FIRST_DIALECTS
+from .optimization import AllOf, AnyOf, Negation, Term, TreeOptimizer, fold
+from .plan import QueryShape
+from .util import dialect_name_of
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+def _in(column, value):
+    return numpy.isin(column, value)
+
+
+def _not_in(column, value):
+    return ~numpy.isin(column, value)
+
+
+def _like(column, pattern):
+    return numpy.fromiter(
+        (pattern.match(item) is not None for item in column),
+        dtype=bool,
+        count=len(column),
+    )
+
+
+def _ieq(column, value):
+    return numpy.char.lower(column.astype(str)) == value.lower()
+
+
+def _prefix(column, value):
+    return numpy.char.startswith(column.astype(str), value)
+
+
+VECTOR_OPERATIONS = (
+    (EqFilter, operator.eq),
+    (NeqFilter, operator.ne),
+    (LesserFilter, operator.lt),
+    (LesserEqualFilter, operator.le),
+    (GreaterFilter, operator.gt),
+    (GreaterEqualFilter, operator.ge),
+    (_LikeBase, _like),
+    (PrefixFilter, _prefix),
+    (IEqFilter, _ieq),
+    (NotInFilter, _not_in),
+    (InFilter, _in),
+)
+
+
+def operation_of(filter_obj):
+    for filter_cl, operation in VECTOR_OPERATIONS:
+        if isinstance(filter_obj, filter_cl):
+            return operation
+    raise ValueError(
+        'The filter %s can not be evaluated on columns' % filter_obj.name
+    )
+
+
+def nulls_of(column):
+    if numpy.ma.isMaskedArray(column):
+        return numpy.ma.getmaskarray(column)
+    kind = column.dtype.kind
+    if kind in 'fc':
+        return numpy.isnan(column)
+    elif kind in 'mM':
+        return numpy.isnat(column)
+    elif kind == 'O':
+        return numpy.fromiter(
+            (item is None for item in column),
+            dtype=bool,
+            count=len(column),
+        )
+    return numpy.zeros(len(column), dtype=bool)
+
+
+def scalar_for(column, value):
+    if column.dtype.kind == 'M' and isinstance(value, date):
+        if isinstance(value, datetime) and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return numpy.datetime64(value)
+    return value
+
+
+class ColumnarEvaluation:
+
+    def __init__(self, query_config):
+        if numpy is None:
+            raise RuntimeError(
+                'The columnar evaluation requires numpy to be installed'
+            )
+        self.query_config = query_config
+        self._columns = None
+        self._nulls = None
+
+    @property
+    def query(self):
+        return self.query_config.query
+
+    @property
+    def expressions(self):
+        return self.query_config.expressions
+
+    def evaluate(self, columns):
+        indices = self.indices(columns)
+        return dict(
+            (name, self._as_array(column)[indices])
+            for name, column in columns.items()
+        )
+
+    def indices(self, columns):
+        if self.query_config.dialect_name is None:
+            self.query_config.dialect_name = dialect_name_of(self.query_config)
+        self._columns = dict(columns)
+        self._nulls = {}
+        shape = QueryShape(self.query)
+        tree = TreeOptimizer(
+            shape,
+            self.query_config.filters,
+        ).optimize(self.query.param_order)
+
+        size = self._size()
+        if tree is None:
+            indices = numpy.arange(size)
+        else:
+            matches, _ = fold(
+                tree,
+                lambda item: item.children,
+                lambda item, children: self._mask_of(
+                    item,
+                    children,
+                    shape.values,
+                ),
+            )
+            indices = numpy.flatnonzero(matches)
+        return self._sorted(indices)
+
+    def _size(self):
+        for column in self._columns.values():
+            return len(column)
+        return 0
+
+    @staticmethod
+    def _as_array(column):
+        if isinstance(column, numpy.ndarray):
+            return column
+        return numpy.asarray(column)
+
+    def column(self, name):
+        if name not in self._columns:
+            raise KeyError('Column %s not found' % name)
+        column = self._as_array(self._columns[name])
+        if name not in self._nulls:
+            self._nulls[name] = nulls_of(column)
+        return numpy.ma.getdata(column), self._nulls[name]
+
+    def _mask_of(self, item, children, values):
+        if isinstance(item, AllOf):
+            matches, unknown = children[0]
+            failed = ~(matches | unknown)
+            for child_matches, child_unknown in children[1:]:
+                matches = matches & child_matches
+                failed = failed | ~(child_matches | child_unknown)
+            return matches, ~(matches | failed)
+        elif isinstance(item, AnyOf):
+            matches, unknown = children[0]
+            failed = ~(matches | unknown)
+            for child_matches, child_unknown in children[1:]:
+                matches = matches | child_matches
+                failed = failed & ~(child_matches | child_unknown)
+            return matches, ~(matches | failed)
+        elif isinstance(item, Negation):
+            (matches, unknown), = children
+            return ~(matches | unknown), unknown
+        elif isinstance(item, Term):
+            return self._mask_of_term(item, values)
+        raise ValueError('Unknown parameter %s' % item)
+
+    def _mask_of_term(self, term, values):
+        column, nulls = self.column(term.name)
+        expression = self.expressions.resolve(term.name)
+        filter_obj = self.query_config.filter_for(term.filter)
+        filter_obj.validate(expression)
+        converter = self.query_config.converter_for(expression.type)
+        value = filter_obj.convert_value(
+            operator.itemgetter(*term.slots)(values),
+            converter,
+        )
+        operation = operation_of(filter_obj)
+        unknown = numpy.zeros(len(column), dtype=bool)
+        if value is None:
+            if operation is operator.eq:
+                return nulls.copy(), unknown
+            elif operation is operator.ne:
+                return ~nulls, unknown
+            return unknown, ~unknown
+        elif isinstance(filter_obj, _LikeBase):
+            value = filter_obj.pattern_of(value)
+        elif isinstance(filter_obj, InFilter):
+            value = [scalar_for(column, item) for item in value]
+        else:
+            value = scalar_for(column, value)
+
+        matches = numpy.zeros(len(column), dtype=bool)
+        present = ~nulls
+        matches[present] = operation(column[present], value)
+        return matches, nulls.copy()
+
+    def _sorted(self, indices):
+        if not self.query.orders or not len(indices):
+            return indices
+        keys = []
+        for sort_item in reversed(self.query.orders):
+            column, nulls = self.column(sort_item.name)
+            keys.append(self._ranks_of(
+                column[indices],
+                nulls[indices],
+                sort_item.direction == 'desc',
+            ))
+        return indices[numpy.lexsort(keys)]
+
+    def _ranks_of(self, column, nulls, descending):
+        ranks = numpy.zeros(len(column), dtype=numpy.int64)
+        present = ~nulls
+        if present.any():
+            _, ranks[present] = numpy.unique(
+                column[present],
+                return_inverse=True,
+            )
+        if self.query_config.dialect_name in NULLS_FIRST_DIALECTS:
+            ranks[nulls] = -1
+        else:
+            ranks[nulls] = len(column)
+        if descending:
+            return -ranks
+        return ranks
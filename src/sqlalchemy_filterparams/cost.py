@@ -0,0 +1,177 @@
+# -*- encoding: utf-8 -*-
+
+from filterparams.obj import BindingOperation, Not, Parameter
+
+from .filters import SearchFilter, _LikeBase
+from .joins import prefixes_of
+from .optimization import fold
+
+
+COST_FACTORS = (
+    'predicates',
+    'depth',
+    'joins',
+    'leading_wildcards',
+    'sort_keys',
+)
+
+DEFAULT_COST_WEIGHTS = {
+    'predicates': 1,
+    'depth': 1,
+    'joins': 10,
+    'leading_wildcards': 20,
+    'sort_keys': 2,
+}
+
+COST_ACTIONS = ('reject', 'cap')
+
+
+class QueryTooComplexError(ValueError):
+
+    def __init__(self, cost, violations):
+        super().__init__(
+            'The query is too complex: %s' % ', '.join(
+                '%s %s exceeds %s' % violation
+                for violation in violations
+            )
+        )
+        self.cost = cost
+        self.violations = violations
+
+
+class QueryCost:
+
+    def __init__(self, predicates=0, depth=0, joins=0,
+                 leading_wildcards=0, sort_keys=0, weights=None):
+        self.predicates = predicates
+        self.depth = depth
+        self.joins = joins
+        self.leading_wildcards = leading_wildcards
+        self.sort_keys = sort_keys
+        self.weights = weights or DEFAULT_COST_WEIGHTS
+
+    @property
+    def score(self):
+        return sum(
+            getattr(self, factor) * self.weights.get(factor, 0)
+            for factor in COST_FACTORS
+        )
+
+    def __repr__(self):
+        return 'QueryCost(%s, score=%s)' % (
+            ', '.join(
+                '%s=%s' % (factor, getattr(self, factor))
+                for factor in COST_FACTORS
+            ),
+            self.score,
+        )
+
+
+def _is_leading_wildcard(filter_cl, value, dialect_name=None):
+    if not isinstance(filter_cl, type):
+        return False
+    elif issubclass(filter_cl, SearchFilter):
+        filter_obj = filter_cl(None)
+        filter_obj.dialect_name = dialect_name
+        return filter_obj.strategy == 'like'
+    return (
+        issubclass(filter_cl, _LikeBase) and
+        isinstance(value, str) and
+        value[:1] in ('%', '_')
+    )
+
+
+def param_children_of(item):
+    if isinstance(item, BindingOperation):
+        return item.left, item.right
+    elif isinstance(item, Not):
+        return (item.inner,)
+    return ()
+
+
+def cost_of(query, expressions, filters, weights=None, dialect_name=None):
+    cost = QueryCost(weights=weights)
+    names = [sort_item.name for sort_item in query.orders]
+    cost.sort_keys = len(names)
+
+    def combine(item, children):
+        if isinstance(item, Parameter):
+            cost.predicates += 1
+            names.append(item.name)
+            if _is_leading_wildcard(
+                filters.get(item.filter),
+                item.value,
+                dialect_name,
+            ):
+                cost.leading_wildcards += 1
+            return 1
+        return 1 + max(children)
+
+    if query.param_order is not None:
+        cost.depth = fold(
+            query.param_order,
+            param_children_of,
+            combine,
+        )
+    cost.joins = len(set(
+        prefix
+        for name in names
+        for prefix in prefixes_of(expressions.path_to(name))
+    ))
+    return cost
+
+
+class CostLimits:
+
+    def __init__(self, max_cost=None, max_predicates=None, max_depth=None,
+                 max_joins=None, max_leading_wildcards=None,
+                 max_sort_keys=None, action='reject', max_rows=None,
+                 weights=None):
+        if action not in COST_ACTIONS:
+            raise ValueError(
+                'Unknown cost action %s. Supported are %s.' % (
+                    action,
+                    ', '.join(COST_ACTIONS),
+                )
+            )
+        if action == 'cap' and not max_rows:
+            raise ValueError(
+                'The cost action cap requires max_rows to be set'
+            )
+        self.max_cost = max_cost
+        self.max_predicates = max_predicates
+        self.max_depth = max_depth
+        self.max_joins = max_joins
+        self.max_leading_wildcards = max_leading_wildcards
+        self.max_sort_keys = max_sort_keys
+        self.action = action
+        self.max_rows = max_rows
+        self.weights = dict(DEFAULT_COST_WEIGHTS)
+        self.weights.update(weights or {})
+
+    @classmethod
+    def of(cls, config):
+        if config is None or isinstance(config, cls):
+            return config
+        return cls(**config)
+
+    def violations(self, cost):
+        limits = [
+            ('cost', cost.score, self.max_cost),
+        ] + [
+            (factor, getattr(cost, factor), getattr(self, 'max_%s' % factor))
+            for factor in COST_FACTORS
+        ]
+        return [
+            (name, value, limit)
+            for name, value, limit in limits
+            if limit is not None and value > limit
+        ]
+
+    def row_cap_for(self, cost):
+        violations = self.violations(cost)
+        if not violations:
+            return None
+        elif self.action == 'reject':
+            raise QueryTooComplexError(cost, violations)
+        return self.max_rows
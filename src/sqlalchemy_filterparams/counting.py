@@ -0,0 +1,188 @@
+# -*- encoding: utf-8 -*-
+
+import copy
+import json
+
+from sqlalchemy import (
+    BigInteger,
+    cast,
+    column,
+    distinct,
+    func,
+    inspect,
+    literal,
+    select,
+    table,
+)
+from sqlalchemy.dialects.postgresql import REGCLASS
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+
+COUNT_MODES = ('exact', 'estimate', 'capped')
+
+DEFAULT_COUNT_CAP = 10000
+
+ESTIMATE_DIALECTS = ('postgresql',)
+
+
+def without_orders(query):
+    count_query = copy.copy(query)
+    count_query.orders = []
+    return count_query
+
+
+class Count(int):
+
+    def __new__(cls, value, estimated=False, capped=False):
+        count = super().__new__(cls, value)
+        count.estimated = estimated
+        count.capped = capped
+        return count
+
+    def __str__(self):
+        value = format(int(self), ',')
+        if self.capped:
+            return '%s+' % value
+        elif self.estimated:
+            return '~%s' % value
+        return value
+
+    def __repr__(self):
+        return 'Count(%d, estimated=%r, capped=%r)' % (
+            self,
+            self.estimated,
+            self.capped,
+        )
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kwargs):
+    raise RuntimeError(
+        'Row estimates are not supported for %s' % compiler.dialect.name
+    )
+
+
+@compiles(Explain, 'postgresql')
+def _compile_explain_postgresql(element, compiler, **kwargs):
+    return 'EXPLAIN (FORMAT JSON) %s' % compiler.process(
+        element.statement,
+        **kwargs
+    )
+
+
+def table_estimate_statement(model_table):
+    name = model_table.name
+    if model_table.schema:
+        name = '%s.%s' % (model_table.schema, name)
+    return select(
+        cast(column('reltuples'), BigInteger)
+    ).select_from(
+        table('pg_class')
+    ).where(
+        column('oid') == cast(literal(name), REGCLASS)
+    )
+
+
+def estimate_of(value):
+    if isinstance(value, str):
+        value = json.loads(value)
+    if isinstance(value, list):
+        value = value[0]['Plan']['Plan Rows']
+    if value is None or value < 0:
+        return None
+    return Count(int(value), estimated=True)
+
+
+class Counter:
+
+    def __init__(self, plan, model, dialect_name,
+                 mode='exact', cap=DEFAULT_COUNT_CAP):
+        if mode not in COUNT_MODES:
+            raise ValueError(
+                'Unknown count mode %s. Supported are %s.' % (
+                    mode,
+                    ', '.join(COUNT_MODES),
+                )
+            )
+        if mode == 'capped' and cap < 1:
+            raise ValueError('The count cap must be positive, got %s' % cap)
+        self.plan = plan
+        self.model = model
+        self.dialect_name = dialect_name
+        self.mode = mode
+        self.cap = cap
+
+    @property
+    def key_columns(self):
+        mapper = inspect(self.model)
+        return [
+            getattr(self.model, mapper.get_property_by_column(column).key)
+            for column in mapper.primary_key
+        ]
+
+    @property
+    def multiplies_rows(self):
+        return any(
+            relation.property.uselist
+            for _, relation in self.plan.joins
+        )
+
+    def keys_of(self, statement):
+        keys = statement.with_only_columns(
+            *self.key_columns,
+            maintain_column_froms=True
+        ).order_by(None)
+        if self.multiplies_rows:
+            keys = keys.distinct()
+        return keys
+
+    def statements(self, statement):
+        if self.mode == 'capped':
+            return [(self.capped_statement(statement), self.capped_of)]
+        statements = []
+        if self.mode == 'estimate':
+            estimate_statement = self.estimate_statement(statement)
+            if estimate_statement is not None:
+                statements.append((estimate_statement, estimate_of))
+        statements.append((self.exact_statement(statement), Count))
+        return statements
+
+    def exact_statement(self, statement):
+        key_columns = self.key_columns
+        if self.multiplies_rows and len(key_columns) > 1:
+            return select(func.count()).select_from(
+                self.keys_of(statement).subquery()
+            )
+        key = key_columns[0]
+        if self.multiplies_rows:
+            key = distinct(key)
+        return statement.with_only_columns(
+            func.count(key),
+            maintain_column_froms=True
+        ).order_by(None)
+
+    def capped_statement(self, statement):
+        return select(func.count()).select_from(
+            self.keys_of(statement).limit(self.cap + 1).subquery()
+        )
+
+    def capped_of(self, value):
+        if value > self.cap:
+            return Count(self.cap, capped=True)
+        return Count(value)
+
+    def estimate_statement(self, statement):
+        if self.dialect_name not in ESTIMATE_DIALECTS:
+            return None
+        if (statement.whereclause is None and
+                not statement._setup_joins):  # pylint: disable=protected-access
+            return table_estimate_statement(inspect(self.model).local_table)
+        return Explain(self.keys_of(statement))
@@ -1,16 +1,9 @@
 # -*- encoding: utf-8 -*-
 
-from sqlalchemy import and_, or_, not_, asc, desc
-
-from filterparams.obj import (
-    Parameter,
-    BindingOperation,
-    And,
-    Or,
-    Not,
-)
-
-from .util import convert
+from .cost import QueryTooComplexError, cost_of
+from .expression import joined_relations_of
+from .plan import PlanCompiler, QueryShape
+from .util import dialect_name_of
 
 
 class Evaluation:
@@ -18,89 +11,112 @@ class Evaluation:
     def __init__(self,
                  query_config):
         self.query_config = query_config
+        self.plan = None
+        self.cost = None
+        self.row_cap = None
 
     @property
     def query(self):
         return self.query_config.query
 
-    def evaluate(self, sql_query):
-        sql_query = self._apply_param_order(sql_query)
-        sql_query = self._apply_sort(sql_query)
-        return sql_query
-
-    def _apply_param_order(self, sql_query):
-        if self.query.param_order is not None:
-            item, sql_query = self._process_param_item(
-                self.query.param_order,
-                sql_query,
-            )
-
-            sql_query = sql_query.filter(item)
-
-        return sql_query
-
-    def _process_param_item(self, item, sql_query):
-        if isinstance(item, BindingOperation):
-            return self._process_binding_item(item, sql_query)
-        elif isinstance(item, Not):
-            inner_item, sql_query = self._process_param_item(
-                item.inner, sql_query,
-            )
-            return not_(inner_item), sql_query
-        elif isinstance(item, Parameter):
-            return self._process_parameter(item, sql_query)
-        else:
-            raise ValueError('Unknown parameter %s' % item)
+    @property
+    def plan_cache(self):
+        return self.query_config.plan_cache
 
-    def _process_binding_item(self, item, sql_query):
-        left_expression, sql_query = self._process_param_item(
-            item.left,
-            sql_query,
+    def evaluate(self, sql_query):
+        self._resolve_dialect(sql_query)
+        self.check_cost()
+        self.check_indexes(sql_query)
+        shape = QueryShape(self.query)
+        plan = self.plan_for(shape, sql_query)
+        with self.query_config.span('build'):
+            return plan.bind(sql_query, shape.values)
+
+    def evaluate_separately(self, sql_query):
+        self._resolve_dialect(sql_query)
+        self.check_cost()
+        self.check_indexes(sql_query)
+        shape = QueryShape(self.query)
+        plan = self.plan_for(shape, sql_query)
+        with self.query_config.span('build'):
+            sql_query, params = plan.bind_separately(sql_query, shape.values)
+            return self.capped(sql_query), params
+
+    def check_cost(self):
+        limits = self.query_config.limits
+        if limits is None:
+            return None
+        self.cost = cost_of(
+            self.query,
+            self.query_config.expressions,
+            self.query_config.filters,
+            limits.weights,
+            self.query_config.dialect_name,
         )
-        right_expression, sql_query = self._process_param_item(
-            item.right,
-            sql_query,
+        try:
+            self.row_cap = limits.row_cap_for(self.cost)
+        except QueryTooComplexError:
+            self._count('rejected_queries')
+            raise
+        if self.row_cap is not None:
+            self._count('capped_queries')
+        return self.row_cap
+
+    def check_indexes(self, sql_query=None):
+        indexes = self.query_config.indexes
+        if indexes is None:
+            return []
+        self._resolve_dialect(sql_query)
+        return indexes.check(
+            self.query,
+            self.query_config.filters,
+            self.query_config.instrumentation,
+            self.query_config.binding_name,
+            self.query_config.dialect_name,
         )
 
-        if isinstance(item, And):
-            result = and_(
-                left_expression,
-                right_expression,
-            )
-        elif isinstance(item, Or):
-            result = or_(
-                left_expression,
-                right_expression,
-            )
-        else:
-            raise ValueError("Unkown param entry %s" % item)
-        return result, sql_query
-
-    def _process_parameter(self, item, sql_query):
-        expressions = self.query_config.expressions
-        sql_query, expression = expressions.get_filter_expression(
-            sql_query,
-            item.name
+    def _resolve_dialect(self, sql_query):
+        if self.query_config.dialect_name is None and sql_query is not None:
+            self.query_config.dialect_name = dialect_name_of(sql_query)
+
+    def _count(self, name):
+        self.query_config.instrumentation.count(
+            name,
+            binding=self.query_config.binding_name,
         )
-        value = convert(
-            item.value,
-            expression.type,
-            self.query_config.converters
+
+    def capped(self, sql_query):
+        if self.row_cap is None:
+            return sql_query
+        return sql_query.limit(self.row_cap)
+
+    def clamped(self, limit):
+        if self.row_cap is None:
+            return limit
+        return min(limit, self.row_cap)
+
+    def plan_for(self, shape, sql_query=None):
+        self._resolve_dialect(sql_query)
+        joined = joined_relations_of(sql_query)
+        self.query_config.expressions.reuse_joins(joined)
+        if self.plan_cache is None:
+            self.plan = self.compile(shape)
+        else:
+            self.plan = self._cached_plan_for(shape, joined)
+        return self.plan
+
+    def _cached_plan_for(self, shape, joined):
+        return self.plan_cache.get_or_compile(
+            (
+                self.query_config.dialect_name,
+                self.query_config.bind_params,
+                self.query_config.instrumentation,
+                tuple(joined.items()),
+                shape.key,
+            ),
+            lambda: self.compile(shape),
         )
-        filter_obj = self.query_config.filter_for(item.filter)
-        return filter_obj(expression, value), sql_query
-
-    def _apply_sort(self, sql_query):
-        expressions = self.query_config.expressions
-
-        orders = []
-        for sort_item in self.query.orders:
-            sort_func = asc
-            if sort_item.direction == 'desc':
-                sort_func = desc
-            sql_query, expression = expressions.get_filter_expression(
-                sql_query,
-                sort_item.name
-            )
-            orders.append(sort_func(expression))
-        return sql_query.order_by(*orders)
+
+    def compile(self, shape):
+        with self.query_config.span('plan'):
+            return PlanCompiler(self.query_config, shape).compile(self.query)
@@ -1,20 +1,55 @@
 # -*- encoding: utf-8 -*-
 
+from collections import OrderedDict
+
+from sqlalchemy import inspect
 from sqlalchemy.orm import (
     aliased,
+    RelationshipProperty,
 )
 
 
+JOIN_STRATEGIES = ('join', 'exists', 'in')
+
+
+def joined_relations_of(sql_query):
+    relations = OrderedDict()
+    for target, onclause, _, flags in getattr(sql_query, '_setup_joins', ()):
+        if flags.get('isouter') or flags.get('full'):
+            continue
+        relation = target if onclause is None else onclause
+        relationship = getattr(relation, 'property', None)
+        if not isinstance(relationship, RelationshipProperty):
+            continue
+        if onclause is None:
+            joined = getattr(relation, '_of_type', None) or relationship.mapper
+        else:
+            annotations = getattr(target, '_annotations', {})
+            joined = annotations.get('parententity', None)
+        if joined is None:
+            continue
+        joined = inspect(joined)
+        if not joined.mapper.isa(relationship.mapper):
+            continue
+        relations[(relation.parent.entity, relationship.key)] = joined.entity
+    return relations
+
+
 class ExpressionHandler:
     def __init__(self, lookup, model):
         self.lookup = lookup
         self.model = model
         self._join_cache = {}
+        self._relations = {}
+        self._reused = {}
+        self.subquery_paths = frozenset()
+        self.joins = []
 
     def _base_obj(self, name):
-        return ExpressionItem(
-            self.lookup[name]
-        )
+        item = self.lookup[name]
+        if not isinstance(item, ExpressionItem):
+            item = ExpressionItem(item)
+        return item
 
     def get_filter_expression(self, query, name):
         join_path = self.path_to(name)
@@ -25,6 +60,10 @@ class ExpressionHandler:
         param = self.param_of(name)
         return query, param
 
+    def resolve(self, name):
+        self.resolve_join_path(self.path_to(name))
+        return self.param_of(name)
+
     def param_of(self, name):
         param = self._base_obj(name).param
         join_path = self.path_to(name)
@@ -42,7 +81,54 @@ class ExpressionHandler:
     def path_to(self, name):
         return self._base_obj(name).join_path
 
+    def strategy_of(self, name):
+        strategy = self._base_obj(name).strategy
+        if strategy is not None:
+            return strategy
+        elif self.is_to_many(self.path_to(name)):
+            return 'exists'
+        return 'join'
+
+    def is_to_many(self, path):
+        current_base = self.model
+        for path_item in path:
+            relation = getattr(current_base, path_item, None)
+            relationship = getattr(relation, 'property', None)
+            if not isinstance(relationship, RelationshipProperty):
+                return False
+            elif relationship.uselist:
+                return True
+            current_base = relationship.mapper.class_
+        return False
+
+    def reuse_joins(self, relations):
+        self._reused = dict(relations)
+
+    def reused_paths(self, path):
+        reused = []
+        current_base = self.model
+        for index, path_item in enumerate(path):
+            current_base = self._reused.get((current_base, path_item), None)
+            if current_base is None:
+                break
+            reused.append(tuple(path[:index + 1]))
+        return reused
+
+    def entity_of(self, path):
+        if not path:
+            return self.model
+        return self._join_cache[path]
+
+    def relation_of(self, path):
+        return self._relations[path]
+
     def _evaluate_join_path(self, query, path):
+        for aliased_join_cl, relation in self.resolve_join_path(path):
+            query = query.join(aliased_join_cl, relation)
+        return query
+
+    def resolve_join_path(self, path):
+        new_joins = []
         evaluated_path = []
         current_base = self.model
         for path_item in path:
@@ -67,23 +153,34 @@ class ExpressionHandler:
                         ) % (current_base, path_item)
                     )
 
-                join_cl = relation.property.mapper.class_
-                aliased_join_cl = aliased(join_cl)
-                query = query.join(aliased_join_cl, relation)
-
-                self._join_cache[current_path] = aliased_join_cl
+                self._relations[current_path] = relation
+                reused = self._reused.get((current_base, path_item), None)
+                if reused is not None:
+                    self._join_cache[current_path] = reused
+                else:
+                    join_cl = relation.property.mapper.class_
+                    aliased_join_cl = aliased(join_cl)
+                    if current_path not in self.subquery_paths:
+                        new_joins.append((aliased_join_cl, relation))
+                    self._join_cache[current_path] = aliased_join_cl
             current_base = self._join_cache[current_path]
-        return query
+        self.joins.extend(new_joins)
+        return new_joins
 
 
 class ExpressionItem:
+    __slots__ = ('_data', 'join_path', 'param', 'strategy')
+
     def __init__(self, data):
         self._data = data
-
-    @property
-    def join_path(self):
-        if isinstance(self._data, dict):
-            join_path = self._data.get('join', None)
+        self.join_path = self._join_path_of(data)
+        self.param = self._param_of(data)
+        self.strategy = self._strategy_of(data)
+
+    @staticmethod
+    def _join_path_of(data):
+        if isinstance(data, dict):
+            join_path = data.get('join', None)
         else:
             join_path = None
 
@@ -91,10 +188,24 @@ class ExpressionItem:
             return tuple()
         elif isinstance(join_path, str):
             join_path = (join_path,)
-        return join_path
-
-    @property
-    def param(self):
-        if not isinstance(self._data, dict):
-            return self._data
-        return self._data.get('param', None)
+        return tuple(join_path)
+
+    @staticmethod
+    def _param_of(data):
+        if not isinstance(data, dict):
+            return data
+        return data.get('param', None)
+
+    @staticmethod
+    def _strategy_of(data):
+        if not isinstance(data, dict):
+            return None
+        strategy = data.get('strategy', None)
+        if strategy is not None and strategy not in JOIN_STRATEGIES:
+            raise ValueError(
+                'Unknown join strategy %s. Supported are %s.' % (
+                    strategy,
+                    ', '.join(JOIN_STRATEGIES),
+                )
+            )
+        return strategy
@@ -1,15 +1,127 @@
 # -*- encoding: utf-8 -*-
 
-from sqlalchemy import String
+import operator
+import re
+
+from collections import OrderedDict
+from functools import lru_cache
+
+from sqlalchemy import (
+    ARRAY,
+    String,
+    and_,
+    or_,
+    all_,
+    any_,
+    bindparam,
+    column,
+    func,
+    literal_column,
+    select,
+    table,
+    values,
+)
+from sqlalchemy.dialects.mysql import match as mysql_match
+from sqlalchemy.dialects.postgresql import CITEXT
+
+from .util import is_type, registry_for
+
+
+LIKE_CACHE_SIZE = 256
+
+LIKE_CASE_INSENSITIVE_DIALECTS = ('sqlite', 'mysql')
+
+LIKE_UNESCAPED_DIALECTS = ('sqlite',)
+
+VALUES_DIALECTS = ('postgresql', 'mssql')
+
+SEARCH_STRATEGIES = ('fulltext', 'trigram', 'fts5', 'like')
+
+MAX_CHAR = chr(0x10FFFF)
+
+SURROGATES = (0xD800, 0xDFFF)
+
+
+def _compare(operation):
+    def compare(actual, value):
+        if actual is None or value is None:
+            return None
+        return operation(actual, value)
+    return compare
+
+
+@lru_cache(maxsize=LIKE_CACHE_SIZE)
+def like_pattern(value, ignore_case=False, escape='\\'):
+    parts = []
+    escaped = False
+    for char in value:
+        if escaped:
+            parts.append(re.escape(char))
+            escaped = False
+        elif char == escape:
+            escaped = True
+        elif char == '%':
+            parts.append('.*')
+        elif char == '_':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    flags = re.DOTALL
+    if ignore_case:
+        flags |= re.IGNORECASE
+    return re.compile(''.join(parts) + r'\Z', flags)
+
+
+def escape_like(value, escape='\\'):
+    return value.replace(
+        escape, escape * 2,
+    ).replace(
+        '%', escape + '%',
+    ).replace(
+        '_', escape + '_',
+    )
+
+
+def like_literal(value, escape='\\'):
+    chars = []
+    escaped = False
+    for char in value:
+        if escaped:
+            chars.append(char)
+            escaped = False
+        elif char == escape:
+            escaped = True
+        elif char in ('%', '_'):
+            return None
+        else:
+            chars.append(char)
+    if escaped:
+        return None
+    return ''.join(chars)
+
+
+def prefix_upper_bound(value):
+    value = value.rstrip(MAX_CHAR)
+    if not value:
+        return None
+    code = ord(value[-1]) + 1
+    if SURROGATES[0] <= code <= SURROGATES[1]:
+        code = SURROGATES[1] + 1
+    return value[:-1] + chr(code)
+
 
-from .util import convert, is_type
+def search_terms_of(value):
+    return re.findall(r'\w+', value.lower())
 
 
 class Filter:
     name = None
+    dialect_name = None
+    range_bound = None
 
     def __init__(self, converters):
         self.converters = converters
+        self._registry = None
 
     def __eq__(self, other):
         if isinstance(other, Filter):
@@ -27,19 +139,67 @@ class Filter:
             type_cl = param.type
         else:
             type_cl = param
-        value = self._convert(type_cl, value)
+        return self.build(param, self._convert(type_cl, value))
+
+    def build(self, param, value):
+        self.validate(param)
         return self._apply(param, value)
 
+    def bind(self, param, key):
+        self.validate(param)
+        return self._apply(param, bindparam(key, type_=param.type))
+
+    def params_of(self, key, value):
+        return {key: value}
+
+    def rebind(self, param, key, value):
+        return None
+
+    def validate(self, param):
+        pass
+
+    def matcher(self, value):
+        def match(actual):
+            return self._match(actual, value)
+        return match
+
+    def _match(self, actual, value):
+        raise ValueError(
+            'The filter %s can not be evaluated in memory' % self.name
+        )
+
+    @property
+    def registry(self):
+        if self._registry is None:
+            self._registry = registry_for(self.converters)
+        return self._registry
+
     def _convert(self, type_cl, value):
-        return convert(value, type_cl, self.converters)
+        return self.convert_value(
+            value,
+            self.registry.converter_for(type_cl),
+        )
+
+    def convert_value(self, value, converter):
+        if converter is None:
+            return value
+        return converter(value)
 
 
 class EqFilter(Filter):
     name = 'eq'
+    range_bound = 'eq'
 
     def _apply(self, param, value):
         return param == value
 
+    def _match(self, actual, value):
+        if value is None:
+            return actual is None
+        elif actual is None:
+            return None
+        return actual == value
+
 
 class NeqFilter(Filter):
     name = 'neq'
@@ -47,42 +207,92 @@ class NeqFilter(Filter):
     def _apply(self, param, value):
         return param != value
 
+    def _match(self, actual, value):
+        if value is None:
+            return actual is not None
+        elif actual is None:
+            return None
+        return actual != value
+
 
 class LesserFilter(Filter):
     name = 'lt'
+    range_bound = 'lt'
 
     def _apply(self, param, value):
         return param < value
 
+    _match = staticmethod(_compare(operator.lt))
+
 
 class LesserEqualFilter(Filter):
     name = 'lte'
+    range_bound = 'lte'
 
     def _apply(self, param, value):
         return param <= value
 
+    _match = staticmethod(_compare(operator.le))
+
 
 class GreaterFilter(Filter):
     name = 'gt'
+    range_bound = 'gt'
 
     def _apply(self, param, value):
         return param > value
 
+    _match = staticmethod(_compare(operator.gt))
+
 
 class GreaterEqualFilter(Filter):
     name = 'gte'
+    range_bound = 'gte'
 
     def _apply(self, param, value):
         return param >= value
 
+    _match = staticmethod(_compare(operator.ge))
 
-class _LikeBase(Filter):
-    def apply(self, param, value):
+
+class _StringFilter(Filter):
+
+    def validate(self, param):
         if not is_type(param.type, String):
             raise ValueError(
-                'Like is only possible on string'
+                'The filter %s is only possible on strings' % self.name
             )
-        return super().apply(param, value)
+
+
+class _LikeBase(_StringFilter):
+    ignore_case = False
+
+    @property
+    def escape(self):
+        if self.dialect_name in LIKE_UNESCAPED_DIALECTS:
+            return None
+        return '\\'
+
+    def pattern_of(self, value):
+        return like_pattern(
+            value,
+            (
+                self.ignore_case or
+                self.dialect_name in LIKE_CASE_INSENSITIVE_DIALECTS
+            ),
+            self.escape,
+        )
+
+    def matcher(self, value):
+        if value is None:
+            return lambda actual: None
+        pattern = self.pattern_of(value)
+
+        def match(actual):
+            if actual is None:
+                return None
+            return pattern.match(actual) is not None
+        return match
 
 
 class LikeFilter(_LikeBase):
@@ -92,13 +302,325 @@ class LikeFilter(_LikeBase):
         return param.like(value)
 
 
+class IEqFilter(_StringFilter):
+    name = 'ieq'
+    collation = None
+    case_insensitive_types = (CITEXT,)
+    dialect_strategies = {
+        'mysql': 'equal',
+    }
+
+    def strategy_for(self, param):
+        if any(
+            is_type(param.type, type_cl)
+            for type_cl in self.case_insensitive_types
+        ):
+            return 'equal'
+        elif self.collation is not None:
+            return 'collate'
+        return self.dialect_strategies.get(self.dialect_name, 'lower')
+
+    def _apply(self, param, value):
+        strategy = self.strategy_for(param)
+        if strategy == 'equal':
+            return param == value
+        elif strategy == 'collate':
+            return param.collate(self.collation) == value
+        return func.lower(param) == func.lower(value)
+
+    def _match(self, actual, value):
+        if actual is None or value is None:
+            return None
+        return actual.lower() == value.lower()
+
+
 class ILikeFilter(_LikeBase):
     name = 'ilike'
+    ignore_case = True
+    equal_filter = IEqFilter
+
+    def literal_of(self, value):
+        if not isinstance(value, str):
+            return None
+        return like_literal(value, self.escape)
+
+    def rebind(self, param, key, value):
+        if self.literal_of(value) is None:
+            return None
+        return self._apply(param, value)
 
     def _apply(self, param, value):
+        literal_value = self.literal_of(value)
+        if literal_value is not None:
+            equal_filter = self.equal_filter(self.converters)
+            equal_filter.dialect_name = self.dialect_name
+            return equal_filter.build(param, literal_value)
         return param.ilike(value)
 
 
+class PrefixFilter(_StringFilter):
+    name = 'prefix'
+
+    def convert_value(self, value, converter):
+        value = super().convert_value(value, converter)
+        if value is None or prefix_upper_bound(value) is None:
+            raise ValueError(
+                'The prefix %r can not be expressed as a range' % value
+            )
+        return value
+
+    def bind(self, param, key):
+        self.validate(param)
+        return and_(
+            param >= bindparam(key, type_=param.type),
+            param < bindparam('%s_upper' % key, type_=param.type),
+        )
+
+    def params_of(self, key, value):
+        return {
+            key: value,
+            '%s_upper' % key: prefix_upper_bound(value),
+        }
+
+    def _apply(self, param, value):
+        return and_(param >= value, param < prefix_upper_bound(value))
+
+    def _match(self, actual, value):
+        if actual is None:
+            return None
+        return actual.startswith(value)
+
+
+class SearchFilter(_StringFilter):
+    name = 'search'
+    search_strategy = None
+    dialect_strategies = {
+        'postgresql': 'fulltext',
+        'mysql': 'fulltext',
+    }
+    text_search_config = 'simple'
+    fts_table_suffix = '_fts'
+
+    @property
+    def strategy(self):
+        if self.search_strategy is not None:
+            return self.search_strategy
+        return self.dialect_strategies.get(self.dialect_name, 'like')
+
+    def convert_value(self, value, converter):
+        value = super().convert_value(value, converter)
+        if value is None or not search_terms_of(value):
+            raise ValueError('The search needs at least one word')
+        return value.strip()
+
+    def search_value(self, value):
+        if self.strategy == 'like':
+            return '%%%s%%' % escape_like(value)
+        elif self.strategy == 'fts5':
+            return ' '.join(
+                '"%s"' % term.replace('"', '""')
+                for term in value.split()
+            )
+        return value
+
+    def bind(self, param, key):
+        self.validate(param)
+        return self._search(param, bindparam(key, type_=param.type))
+
+    def params_of(self, key, value):
+        return {key: self.search_value(value)}
+
+    def _apply(self, param, value):
+        return self._search(param, self.search_value(value))
+
+    def _search(self, param, value):
+        if self.strategy not in SEARCH_STRATEGIES:
+            raise ValueError(
+                'Unknown search strategy %s. Supported are %s.' % (
+                    self.strategy,
+                    ', '.join(SEARCH_STRATEGIES),
+                )
+            )
+        return getattr(self, '_search_%s' % self.strategy)(param, value)
+
+    def _search_fulltext(self, param, value):
+        if self.dialect_name == 'mysql':
+            return mysql_match(
+                param,
+                against=value,
+            ).in_natural_language_mode()
+        search_config = literal_column(
+            "'%s'::regconfig" % self.text_search_config
+        )
+        return func.to_tsvector(search_config, param).bool_op('@@')(
+            func.plainto_tsquery(search_config, value)
+        )
+
+    @staticmethod
+    def _search_trigram(param, value):
+        return param.bool_op('%')(value)
+
+    def _search_fts5(self, param, value):
+        source_column = param.expression
+        source_key, = source_column.table.primary_key
+        source_table = getattr(source_column.table, 'element', None)
+        if source_table is None:
+            source_table = source_column.table
+        fts_table = table(
+            '%s%s' % (source_table.name, self.fts_table_suffix),
+            column('rowid'),
+            column(source_column.name),
+        )
+        return source_key.in_(
+            select(fts_table.c.rowid).where(
+                fts_table.c[source_column.name].match(value)
+            )
+        )
+
+    @staticmethod
+    def _search_like(param, value):
+        return param.ilike(value, escape='\\')
+
+    def matcher(self, value):
+        if self.strategy in ('like', 'trigram'):
+            value = value.lower()
+
+            def match(actual):
+                if actual is None:
+                    return None
+                return value in actual.lower()
+            return match
+
+        terms = frozenset(search_terms_of(value))
+
+        def match_terms(actual):
+            if actual is None:
+                return None
+            return terms.issubset(search_terms_of(actual))
+        return match_terms
+
+
+class InFilter(Filter):
+    name = 'in'
+    _contained = True
+    delimiter = ','
+    threshold = 1000
+    chunk_size = 1000
+    large_strategy = None
+    dialect_strategies = {
+        'postgresql': 'array',
+    }
+
+    def convert_value(self, value, converter):
+        items = self.split(value)
+        if converter is not None:
+            items = [converter(item) for item in items]
+        return list(OrderedDict.fromkeys(items))
+
+    def matcher(self, value):
+        try:
+            value = frozenset(value)
+        except TypeError:
+            pass
+        has_null = any(item is None for item in value)
+
+        def match(actual):
+            if actual is None:
+                return None
+            elif actual in value:
+                return self._contained
+            elif has_null:
+                return None
+            return not self._contained
+        return match
+
+    def split(self, value):
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return list(value)
+        elif isinstance(value, str):
+            return value.split(self.delimiter)
+        return [value]
+
+    @property
+    def strategy(self):
+        strategy = self.large_strategy
+        if strategy is None:
+            strategy = self.dialect_strategies.get(
+                self.dialect_name,
+                'chunked',
+            )
+        if strategy == 'values' and self.dialect_name not in VALUES_DIALECTS:
+            return 'chunked'
+        return strategy
+
+    def bind(self, param, key):
+        self.validate(param)
+        if self.strategy == 'array':
+            return self._array(
+                param,
+                bindparam(key, type_=ARRAY(param.type)),
+            )
+        return self._in(param, bindparam(key, expanding=True))
+
+    def rebind(self, param, key, value):
+        if self.strategy == 'array' or len(value) <= self.threshold:
+            return None
+        return self._apply(param, value)
+
+    def _apply(self, param, value):
+        if len(value) <= self.threshold:
+            return self._in(param, value)
+        return getattr(self, '_apply_%s' % self.strategy)(param, value)
+
+    def _apply_chunked(self, param, value):
+        return self._combine(*[
+            self._in(param, value[index:index + self.chunk_size])
+            for index in range(0, len(value), self.chunk_size)
+        ])
+
+    def _apply_values(self, param, value):
+        value_table = values(
+            column('value', param.type),
+            name='in_values',
+        ).data([(item,) for item in value])
+        return self._in(param, select(value_table.c.value))
+
+    def _apply_array(self, param, value):
+        return self._array(
+            param,
+            bindparam(None, value, type_=ARRAY(param.type)),
+        )
+
+    @staticmethod
+    def _array(param, array_param):
+        return param == any_(array_param)
+
+    @staticmethod
+    def _combine(*clauses):
+        return or_(*clauses)
+
+    @staticmethod
+    def _in(param, value):
+        return param.in_(value)
+
+
+class NotInFilter(InFilter):
+    name = 'nin'
+    _contained = False
+
+    @staticmethod
+    def _array(param, array_param):
+        return param != all_(array_param)
+
+    @staticmethod
+    def _combine(*clauses):
+        return and_(*clauses)
+
+    @staticmethod
+    def _in(param, value):
+        return param.not_in(value)
+
+
 DEFAULT_FILTERS = [
     EqFilter,
     NeqFilter,
@@ -108,4 +630,9 @@ DEFAULT_FILTERS = [
     GreaterEqualFilter,
     LikeFilter,
     ILikeFilter,
+    IEqFilter,
+    PrefixFilter,
+    SearchFilter,
+    InFilter,
+    NotInFilter,
 ]
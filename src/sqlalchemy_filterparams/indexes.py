@@ -0,0 +1,359 @@
+# -*- encoding: utf-8 -*-
+
+import warnings
+
+from sqlalchemy import Column, UniqueConstraint
+from sqlalchemy.sql.functions import Function
+
+from filterparams.obj import Parameter
+
+from .cost import param_children_of
+from .expression import ExpressionHandler
+from .filters import (
+    EqFilter,
+    GreaterEqualFilter,
+    GreaterFilter,
+    IEqFilter,
+    ILikeFilter,
+    InFilter,
+    LesserEqualFilter,
+    LesserFilter,
+    LikeFilter,
+    NotInFilter,
+    PrefixFilter,
+    SearchFilter,
+    like_literal,
+)
+from .optimization import fold
+
+
+INDEX_POLICIES = ('allow', 'warn', 'reject')
+
+INDEXABLE_FILTERS = (
+    EqFilter,
+    InFilter,
+    LesserFilter,
+    LesserEqualFilter,
+    GreaterFilter,
+    GreaterEqualFilter,
+    LikeFilter,
+    PrefixFilter,
+)
+
+NON_INDEXABLE_FILTERS = (NotInFilter,)
+
+TRIGRAM_OPERATOR_CLASSES = ('gin_trgm_ops', 'gist_trgm_ops')
+
+UNINDEXED_COUNTER = 'unindexed'
+
+
+class UnindexedQueryWarning(UserWarning):
+    pass
+
+
+class UnindexedQueryError(ValueError):
+
+    def __init__(self, usages):
+        super().__init__(
+            'The query uses parameters which are not served by an '
+            'index: %s' % ', '.join(
+                describe_usage(name, filter_name, direction)
+                for name, filter_name, direction in usages
+            )
+        )
+        self.usages = usages
+
+
+def describe_usage(name, filter_name, direction):
+    if direction is not None:
+        return 'order %s(%s)' % (direction, name)
+    return '%s[%s]' % (name, filter_name)
+
+
+def leading_columns_of(table):
+    names = set()
+    for index in table.indexes:
+        expressions = list(index.expressions)
+        if expressions and isinstance(expressions[0], Column):
+            names.add(expressions[0].name)
+    for constraint in table.constraints:
+        constraint_columns = list(constraint.columns)
+        if isinstance(constraint, UniqueConstraint) and constraint_columns:
+            names.add(constraint_columns[0].name)
+    primary_key = list(table.primary_key.columns)
+    if primary_key:
+        names.add(primary_key[0].name)
+    return names
+
+
+def lower_columns_of(table):
+    names = set()
+    for index in table.indexes:
+        expressions = list(index.expressions)
+        if (
+            expressions and
+            isinstance(expressions[0], Function) and
+            expressions[0].name == 'lower'
+        ):
+            columns = columns_in(expressions[0])
+            if len(columns) == 1:
+                names.add(columns[0].name)
+    return names
+
+
+def columns_in(expression):
+    if isinstance(expression, Column):
+        return [expression]
+    elif isinstance(expression, Function):
+        return [
+            clause for clause in expression.clauses
+            if isinstance(clause, Column)
+        ]
+    return []
+
+
+def search_index_of(index):
+    expressions = list(index.expressions)
+    options = index.dialect_kwargs
+    if str(options.get('mysql_prefix', '')).upper() == 'FULLTEXT':
+        if len(expressions) == 1 and isinstance(expressions[0], Column):
+            yield expressions[0].name, 'fulltext'
+        return
+    elif options.get('postgresql_using', None) not in ('gin', 'gist'):
+        return
+    operator_classes = options.get('postgresql_ops', None) or {}
+    for expression in expressions:
+        if isinstance(expression, Column):
+            if operator_classes.get(
+                expression.name,
+                None,
+            ) in TRIGRAM_OPERATOR_CLASSES:
+                yield expression.name, 'trigram'
+        elif getattr(expression, 'name', None) == 'to_tsvector':
+            for column in columns_in(expression):
+                yield column.name, 'fulltext'
+
+
+def search_strategies_of(table,
+                         fts_table_suffix=SearchFilter.fts_table_suffix):
+    strategies = {}
+    for index in table.indexes:
+        for name, strategy in search_index_of(index):
+            strategies.setdefault(name, set()).add(strategy)
+    metadata = getattr(table, 'metadata', None)
+    fts_table = None
+    if metadata is not None:
+        fts_table = metadata.tables.get(table.fullname + fts_table_suffix)
+    if fts_table is not None:
+        for column in fts_table.columns:
+            if column.name in table.columns:
+                strategies.setdefault(column.name, set()).add('fts5')
+    return strategies
+
+
+def column_of(expressions, name):
+    try:
+        expression = expressions.resolve(name)
+    except ValueError:
+        return None
+    columns = getattr(getattr(expression, 'property', None), 'columns', ())
+    if len(columns) != 1 or not isinstance(columns[0], Column):
+        return None
+    return columns[0]
+
+
+class BindingIndexes:
+
+    def __init__(self, columns, indexed, policy='allow', searchable=None,
+                 lower_indexed=()):
+        if policy not in INDEX_POLICIES:
+            raise ValueError(
+                'Unknown index policy %s. Supported are %s.' % (
+                    policy,
+                    ', '.join(INDEX_POLICIES),
+                )
+            )
+        self.columns = columns
+        self.indexed = frozenset(indexed)
+        self.policy = policy
+        self.lower_indexed = frozenset(lower_indexed)
+        self.searchable = dict(
+            (name, frozenset(strategies))
+            for name, strategies in (searchable or {}).items()
+        )
+
+    @classmethod
+    def of(cls, model, bindings, policy=None):
+        columns = {}
+        if model is not None:
+            expressions = ExpressionHandler(bindings, model)
+            for name in bindings:
+                column = column_of(expressions, name)
+                if column is not None:
+                    columns[name] = column
+        indexed = [
+            name
+            for name, column in columns.items()
+            if column.table is not None and
+            column.name in leading_columns_of(column.table)
+        ]
+        lower_indexed = [
+            name
+            for name, column in columns.items()
+            if column.table is not None and
+            column.name in lower_columns_of(column.table)
+        ]
+        searchable = {}
+        for name, column in columns.items():
+            if column.table is None:
+                continue
+            strategies = search_strategies_of(column.table).get(
+                column.name,
+                None,
+            )
+            if strategies:
+                searchable[name] = strategies
+        return cls(
+            columns,
+            indexed,
+            policy or 'allow',
+            searchable,
+            lower_indexed,
+        )
+
+    def is_indexed(self, name):
+        return name in self.indexed
+
+    def serves_filter(self, name, filter_cl, value=None, dialect_name=None):
+        if not isinstance(filter_cl, type):
+            return False
+        elif issubclass(filter_cl, SearchFilter):
+            return self.serves_search(name, filter_cl, dialect_name)
+        elif issubclass(filter_cl, ILikeFilter):
+            filter_obj = self._filter_of(filter_cl, dialect_name)
+            return (
+                filter_obj.literal_of(value) is not None and
+                self.serves_ieq(name, filter_cl.equal_filter, dialect_name)
+            )
+        elif issubclass(filter_cl, IEqFilter):
+            return self.serves_ieq(name, filter_cl, dialect_name)
+        elif not self.is_indexed(name):
+            return False
+        elif issubclass(filter_cl, NON_INDEXABLE_FILTERS):
+            return False
+        elif issubclass(filter_cl, LikeFilter):
+            return isinstance(value, str) and value[:1] not in ('%', '_')
+        return issubclass(filter_cl, INDEXABLE_FILTERS)
+
+    @staticmethod
+    def _filter_of(filter_cl, dialect_name):
+        filter_obj = filter_cl(None)
+        filter_obj.dialect_name = dialect_name
+        return filter_obj
+
+    def serves_search(self, name, filter_cl, dialect_name=None):
+        strategy = self._filter_of(filter_cl, dialect_name).strategy
+        return strategy in self.searchable.get(name, ())
+
+    def serves_ieq(self, name, filter_cl, dialect_name=None):
+        column = self.columns.get(name, None)
+        if column is None:
+            return False
+        strategy = self._filter_of(filter_cl, dialect_name).strategy_for(
+            column
+        )
+        if strategy == 'equal':
+            return self.is_indexed(name)
+        elif strategy == 'lower':
+            return name in self.lower_indexed
+        return False
+
+    def serves_sort(self, name, direction):
+        return self.is_indexed(name)
+
+    def unindexed_of(self, query, filters, dialect_name=None):
+        usages = []
+        if query.param_order is not None:
+            for parameter in fold(
+                query.param_order,
+                param_children_of,
+                lambda item, children: (
+                    [item] if isinstance(item, Parameter) else
+                    [parameter for child in children for parameter in child]
+                ),
+            ):
+                if not self.serves_filter(
+                    parameter.name,
+                    filters.get(parameter.filter),
+                    parameter.value,
+                    dialect_name,
+                ):
+                    usages.append((parameter.name, parameter.filter, None))
+        for sort_item in query.orders:
+            if not self.serves_sort(sort_item.name, sort_item.direction):
+                usages.append((sort_item.name, None, sort_item.direction))
+        return list(dict.fromkeys(usages))
+
+    def check(self, query, filters, instrumentation, binding_name=None,
+              dialect_name=None):
+        if self.policy == 'allow' and not instrumentation.enabled:
+            return []
+        usages = self.unindexed_of(query, filters, dialect_name)
+        for name, filter_name, direction in usages:
+            tags = {'binding': binding_name, 'param': name}
+            if direction is None:
+                tags['filter'] = filter_name
+            else:
+                tags['sort'] = direction
+            instrumentation.count(UNINDEXED_COUNTER, **tags)
+        if usages and self.policy == 'reject':
+            raise UnindexedQueryError(usages)
+        elif usages and self.policy == 'warn':
+            warnings.warn(
+                str(UnindexedQueryError(usages)),
+                UnindexedQueryWarning,
+                stacklevel=4,
+            )
+        return usages
+
+    def suggestion_for(self, name):
+        column = self.columns.get(name, None)
+        if column is None:
+            return None
+        return '%s.%s' % (column.table.fullname, column.name)
+
+
+def index_report(aggregator, bindings=(), limit=10):
+    indexes_of = dict(
+        (binding_cl.__name__, binding_cl.metadata().indexes)
+        for binding_cl in bindings
+    )
+    rows = []
+    for (name, tags), value in aggregator.counters().items():
+        if name != UNINDEXED_COUNTER:
+            continue
+        tags = dict(tags)
+        indexes = indexes_of.get(tags.get('binding'), None)
+        rows.append((
+            value,
+            tags.get('binding'),
+            describe_usage(
+                tags.get('param'),
+                tags.get('filter'),
+                tags.get('sort'),
+            ),
+            indexes.suggestion_for(tags.get('param')) if indexes else None,
+        ))
+    rows.sort(key=lambda row: row[0], reverse=True)
+
+    lines = ['%8s %-24s %-32s %s' % (
+        'count', 'binding', 'usage', 'index on',
+    )]
+    for value, binding, usage, suggestion in rows[:limit]:
+        lines.append('%8d %-24s %-32s %s' % (
+            value,
+            binding,
+            usage,
+            suggestion or '-',
+        ))
+    return '\n'.join(lines)
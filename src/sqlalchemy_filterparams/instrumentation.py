@@ -0,0 +1,229 @@
+# -*- encoding: utf-8 -*-
+
+from collections import OrderedDict, namedtuple
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+STAGES = (
+    'parse',
+    'convert',
+    'join',
+    'plan',
+    'build',
+    'compile',
+    'execute',
+)
+
+EXECUTE_STAGE = 'execute'
+
+COMPILE_STAGE = 'compile'
+
+COMPILE_START = '_filterparams_compile_start'
+
+_executing = ContextVar('filterparams_executing', default=None)
+
+_listening = []
+
+_listen_lock = Lock()
+
+
+def _before_execute(conn, clauseelement, multiparams, params,
+                    execution_options):
+    if _executing.get() is not None:
+        conn.info[COMPILE_START] = perf_counter()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    start = conn.info.pop(COMPILE_START, None)
+    current = _executing.get()
+    if start is None or current is None:
+        return
+    instrumentation, tags = current
+    instrumentation.record(COMPILE_STAGE, perf_counter() - start, tags)
+
+
+def listen_for_compilation():
+    with _listen_lock:
+        if _listening:
+            return
+        event.listen(Engine, 'before_execute', _before_execute)
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        _listening.append(True)
+
+StageStats = namedtuple(
+    'StageStats',
+    ['stage', 'tags', 'count', 'total', 'max'],
+)
+
+
+class Span:
+    __slots__ = ('instrumentation', 'stage', 'tags', 'start')
+
+    def __init__(self, instrumentation, stage, tags):
+        self.instrumentation = instrumentation
+        self.stage = stage
+        self.tags = tags
+        self.start = None
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.instrumentation.record(
+            self.stage,
+            perf_counter() - self.start,
+            self.tags,
+        )
+        return False
+
+
+class NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class ExecuteSpan(Span):
+    __slots__ = ('token',)
+
+    def __init__(self, instrumentation, stage, tags):
+        super().__init__(instrumentation, stage, tags)
+        self.token = None
+
+    def __enter__(self):
+        listen_for_compilation()
+        self.token = _executing.set((self.instrumentation, self.tags))
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _executing.reset(self.token)
+        return super().__exit__(exc_type, exc_value, traceback)
+
+
+class Instrumentation:
+    enabled = True
+
+    def span(self, stage, **tags):
+        if stage == EXECUTE_STAGE:
+            return ExecuteSpan(self, stage, tags)
+        return Span(self, stage, tags)
+
+    def timed(self, func, stage, **tags):
+        @wraps(func)
+        def timed_func(*args, **kwargs):
+            with self.span(stage, **tags):
+                return func(*args, **kwargs)
+        return timed_func
+
+    def record(self, stage, duration, tags):
+        pass
+
+    def count(self, name, value=1, **tags):
+        pass
+
+
+class NullInstrumentation(Instrumentation):
+    enabled = False
+
+    def span(self, stage, **tags):
+        return NULL_SPAN
+
+    def timed(self, func, stage, **tags):
+        return func
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
+
+
+class Aggregator(Instrumentation):
+
+    def __init__(self):
+        self._stages = OrderedDict()
+        self._counters = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def _key_of(name, tags):
+        return name, tuple(sorted(tags.items()))
+
+    def record(self, stage, duration, tags):
+        key = self._key_of(stage, tags)
+        with self._lock:
+            count, total, maximum = self._stages.get(key, (0, 0.0, 0.0))
+            self._stages[key] = (
+                count + 1,
+                total + duration,
+                max(maximum, duration),
+            )
+
+    def count(self, name, value=1, **tags):
+        key = self._key_of(name, tags)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def stats(self, stage=None, **tags):
+        with self._lock:
+            items = list(self._stages.items())
+        result = [
+            StageStats(name, dict(key_tags), count, total, maximum)
+            for (name, key_tags), (count, total, maximum) in items
+            if (stage is None or name == stage) and all(
+                dict(key_tags).get(tag) == value
+                for tag, value in tags.items()
+            )
+        ]
+        result.sort(key=lambda stats: stats.total, reverse=True)
+        return result
+
+    def counter(self, name, **tags):
+        with self._lock:
+            return self._counters.get(self._key_of(name, tags), 0)
+
+    def counters(self):
+        with self._lock:
+            return OrderedDict(self._counters)
+
+    def totals(self, tag):
+        totals = {}
+        for stats in self.stats():
+            if tag in stats.tags:
+                value = stats.tags[tag]
+                totals[value] = totals.get(value, 0.0) + stats.total
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+    def report(self, limit=10):
+        lines = ['%-10s %-48s %8s %12s %12s' % (
+            'stage', 'tags', 'count', 'total ms', 'max ms',
+        )]
+        for stats in self.stats()[:limit]:
+            lines.append('%-10s %-48s %8d %12.3f %12.3f' % (
+                stats.stage,
+                ' '.join(
+                    '%s=%s' % (tag, value)
+                    for tag, value in sorted(stats.tags.items())
+                ),
+                stats.count,
+                stats.total * 1000,
+                stats.max * 1000,
+            ))
+        return '\n'.join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
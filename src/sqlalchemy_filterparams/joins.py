@@ -0,0 +1,223 @@
+# -*- encoding: utf-8 -*-
+
+from collections import OrderedDict
+
+from sqlalchemy import false, inspect, literal, select
+from sqlalchemy.orm import join as orm_join
+from sqlalchemy.orm.exc import UnmappedColumnError
+from sqlalchemy.sql.elements import False_
+
+from .optimization import AllOf, Term, fold
+
+
+def prefixes_of(path):
+    return [tuple(path[:index]) for index in range(1, len(path) + 1)]
+
+
+class Subquery:
+    __slots__ = ('paths', 'strategy', 'inner')
+
+    def __init__(self, paths, strategy, inner):
+        self.paths = frozenset(paths)
+        self.strategy = strategy
+        self.inner = inner
+
+    @property
+    def children(self):
+        return (self.inner,)
+
+    @property
+    def key(self):
+        return (
+            'subquery',
+            self.strategy,
+            tuple(sorted(self.paths)),
+            self.inner.key,
+        )
+
+
+class SubqueryNode:
+    def __init__(self, inner, froms, correlations, columns=None):
+        self.children = (inner,)
+        self.froms = tuple(froms)
+        self.correlations = tuple(correlations)
+        self.columns = columns
+
+    def build(self, values, children, params):
+        clause, = children
+        if isinstance(clause, False_):
+            return false()
+        if self.columns is None:
+            return select(literal(1)).select_from(*self.froms).where(
+                *(self.correlations + (clause,))
+            ).exists()
+
+        local, remote = self.columns
+        return local.in_(
+            select(remote).select_from(*self.froms).where(clause)
+        )
+
+
+class SubqueryGroup:
+    def __init__(self, roots, paths, names, conjuncts):
+        self.roots = set(roots)
+        self.paths = set(paths)
+        self.names = list(names)
+        self.conjuncts = list(conjuncts)
+
+    def merge(self, other):
+        self.roots.update(other.roots)
+        self.paths.update(other.paths)
+        self.names = other.names + self.names
+        self.conjuncts = other.conjuncts + self.conjuncts
+
+
+class JoinPlanner:
+
+    def __init__(self, expressions):
+        self.expressions = expressions
+        self.subquery_paths = frozenset()
+
+    def plan(self, tree, order_names):
+        names = self.names_of(tree)
+        joined = set()
+        for name in order_names:
+            joined.update(prefixes_of(self.expressions.path_to(name)))
+        for name in names:
+            path = self.expressions.path_to(name)
+            joined.update(self.expressions.reused_paths(path))
+            if self.strategy_of(name) == 'join':
+                joined.update(prefixes_of(path))
+
+        self.subquery_paths = frozenset(
+            prefix
+            for name in names
+            for prefix in prefixes_of(self.expressions.path_to(name))
+            if prefix not in joined
+        )
+        self.expressions.subquery_paths = self.subquery_paths
+        if not self.subquery_paths:
+            return tree
+        return self._rewrite(tree)
+
+    def strategy_of(self, name):
+        return self.expressions.strategy_of(name)
+
+    @staticmethod
+    def names_of(tree):
+        if tree is None:
+            return []
+        return fold(
+            tree,
+            lambda item: item.children,
+            lambda item, children: (
+                [item.name] if isinstance(item, Term) else
+                [name for child in children for name in child]
+            ),
+        )
+
+    def _rewrite(self, tree):
+        if isinstance(tree, AllOf):
+            conjuncts = tree.children
+        else:
+            conjuncts = (tree,)
+
+        plain = []
+        groups = []
+        for conjunct in conjuncts:
+            names = [
+                name for name in self.names_of(conjunct)
+                if self.expressions.path_to(name) in self.subquery_paths
+            ]
+            if not names:
+                plain.append(conjunct)
+                continue
+            paths = set(self.expressions.path_to(name) for name in names)
+            group = SubqueryGroup(
+                (self._root_of(path) for path in paths),
+                paths,
+                names,
+                (conjunct,),
+            )
+            for other in reversed(groups[:]):
+                if other.roots & group.roots:
+                    group.merge(other)
+                    groups.remove(other)
+            groups.append(group)
+
+        items = plain + [self._subquery_of(group) for group in groups]
+        if len(items) == 1:
+            return items[0]
+        return AllOf(items)
+
+    def _root_of(self, path):
+        for prefix in prefixes_of(path):
+            if prefix in self.subquery_paths:
+                return prefix
+
+    def _subquery_of(self, group):
+        strategy = 'exists'
+        if len(group.roots) == 1 and all(
+            self.strategy_of(name) == 'in'
+            for name in group.names
+        ):
+            strategy = 'in'
+        if len(group.conjuncts) == 1:
+            inner = group.conjuncts[0]
+        else:
+            inner = AllOf(group.conjuncts)
+        return Subquery(group.paths, strategy, inner)
+
+    def subquery_node(self, item, inner):
+        expressions = self.expressions
+        paths = sorted(
+            set(
+                prefix
+                for path in item.paths
+                for prefix in prefixes_of(path)
+                if prefix in self.subquery_paths
+            ),
+            key=lambda path: (len(path), path),
+        )
+
+        froms = OrderedDict()
+        correlations = []
+        for path in paths:
+            entity = expressions.entity_of(path)
+            relation = expressions.relation_of(path)
+            if path[:-1] in self.subquery_paths:
+                root = self._root_of(path)
+                froms[root] = orm_join(froms[root], entity, relation)
+            else:
+                froms[path] = entity
+                correlations.append(orm_join(
+                    expressions.entity_of(path[:-1]),
+                    entity,
+                    relation,
+                ).onclause)
+
+        columns = None
+        if item.strategy == 'in':
+            root, = froms
+            columns = self._in_columns_of(root)
+        if columns is not None:
+            correlations = ()
+        return SubqueryNode(inner, froms.values(), correlations, columns)
+
+    def _in_columns_of(self, root):
+        relationship = self.expressions.relation_of(root).property
+        if (relationship.secondary is not None or
+                len(relationship.local_remote_pairs) != 1):
+            return None
+        (local, remote), = relationship.local_remote_pairs
+        anchor = self.expressions.entity_of(root[:-1])
+        target = self.expressions.entity_of(root)
+        try:
+            local_key = inspect(anchor).mapper.get_property_by_column(local)
+            remote_key = relationship.mapper.get_property_by_column(remote)
+        except UnmappedColumnError:
+            return None
+        return (
+            getattr(anchor, local_key.key),
+            getattr(target, remote_key.key),
+        )
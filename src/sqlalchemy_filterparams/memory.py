@@ -0,0 +1,213 @@
+# -*- encoding: utf-8 -*-
+
+from operator import itemgetter
+
+from .joins import JoinPlanner, Subquery, prefixes_of
+from .optimization import (
+    AllOf,
+    AnyOf,
+    Negation,
+    Term,
+    TreeOptimizer,
+    fold,
+)
+from .plan import QueryShape
+from .util import dialect_name_of
+
+
+NULLS_FIRST_DIALECTS = ('sqlite', 'mysql')
+
+
+def value_of(item, key):
+    if isinstance(item, dict):
+        return item.get(key, None)
+    return getattr(item, key, None)
+
+
+def related_of(item, key):
+    related = value_of(item, key)
+    if related is None:
+        return ()
+    elif isinstance(related, (list, tuple, set, frozenset)):
+        return related
+    return (related,)
+
+
+def assignments(env, paths):
+    if not paths:
+        yield env
+        return
+    path = paths[0]
+    for related in related_of(env[path[:-1]], path[-1]):
+        child_env = dict(env)
+        child_env[path] = related
+        yield from assignments(child_env, paths[1:])
+
+
+def all_of(results):
+    result = True
+    for value in results:
+        if value is False:
+            return False
+        elif value is None:
+            result = None
+    return result
+
+
+def any_of(results):
+    result = False
+    for value in results:
+        if value is True:
+            return True
+        elif value is None:
+            result = None
+    return result
+
+
+def none_of(value):
+    if value is None:
+        return None
+    return not value
+
+
+class MemoryEvaluation:
+
+    def __init__(self, query_config):
+        self.query_config = query_config
+        self.predicate = None
+        self.joined_paths = ()
+        self.sort_keys = ()
+
+    @property
+    def query(self):
+        return self.query_config.query
+
+    @property
+    def expressions(self):
+        return self.query_config.expressions
+
+    def evaluate(self, items):
+        self.compile()
+        matches = []
+        for item in items:
+            env = self.match(item)
+            if env is not None:
+                matches.append((item, env))
+        for path, key, direction in reversed(self.sort_keys):
+            matches.sort(
+                key=lambda match: self._sort_value(
+                    value_of(match[1][path], key)
+                ),
+                reverse=direction == 'desc',
+            )
+        return [item for item, _ in matches]
+
+    def _sort_value(self, value):
+        if value is None:
+            return (self._null_rank,)
+        return 0, value
+
+    @property
+    def _null_rank(self):
+        if self.query_config.dialect_name in NULLS_FIRST_DIALECTS:
+            return -1
+        return 1
+
+    def match(self, item):
+        for env in assignments({(): item}, self.joined_paths):
+            if self.predicate is None or self.predicate(env) is True:
+                return env
+        return None
+
+    def compile(self):
+        if self.query_config.dialect_name is None:
+            self.query_config.dialect_name = dialect_name_of(self.query_config)
+        shape = QueryShape(self.query)
+        order_names = [sort_item.name for sort_item in self.query.orders]
+        tree = TreeOptimizer(
+            shape,
+            self.query_config.filters,
+        ).optimize(self.query.param_order)
+        join_planner = JoinPlanner(self.expressions)
+        with self.query_config.span('join'):
+            tree = join_planner.plan(tree, order_names)
+
+        names = join_planner.names_of(tree)
+        self.joined_paths = self._sorted_paths(
+            prefix
+            for name in names + order_names
+            for prefix in prefixes_of(self.expressions.path_to(name))
+            if prefix not in join_planner.subquery_paths
+        )
+        self.sort_keys = tuple(
+            (
+                self.expressions.path_to(sort_item.name),
+                self.expressions.resolve(sort_item.name).key,
+                sort_item.direction,
+            )
+            for sort_item in self.query.orders
+        )
+        if tree is None:
+            self.predicate = None
+        else:
+            self.predicate = fold(
+                tree,
+                lambda item: item.children,
+                lambda item, children: self._compile_item(
+                    item,
+                    children,
+                    shape.values,
+                    join_planner.subquery_paths,
+                ),
+            )
+        return self.predicate
+
+    @staticmethod
+    def _sorted_paths(paths):
+        return tuple(sorted(set(paths), key=lambda path: (len(path), path)))
+
+    def _compile_item(self, item, children, values, subquery_paths):
+        if isinstance(item, AllOf):
+            return lambda env: all_of(child(env) for child in children)
+        elif isinstance(item, AnyOf):
+            return lambda env: any_of(child(env) for child in children)
+        elif isinstance(item, Negation):
+            inner, = children
+            return lambda env: none_of(inner(env))
+        elif isinstance(item, Term):
+            return self._compile_term(item, values)
+        elif isinstance(item, Subquery):
+            inner, = children
+            paths = self._sorted_paths(
+                prefix
+                for path in item.paths
+                for prefix in prefixes_of(path)
+                if prefix in subquery_paths
+            )
+            return lambda env: any(
+                inner(sub_env) is True
+                for sub_env in assignments(env, paths)
+            )
+        else:
+            raise ValueError('Unknown parameter %s' % item)
+
+    def _compile_term(self, term, values):
+        expression = self.expressions.resolve(term.name)
+        path = self.expressions.path_to(term.name)
+        filter_obj = self.query_config.filter_for(term.filter)
+        filter_obj.validate(expression)
+        converter = self.query_config.converter_for(expression.type)
+        if converter is not None:
+            converter = self.query_config.instrumentation.timed(
+                converter,
+                'convert',
+                binding=self.query_config.binding_name,
+                param=term.name,
+                filter=term.filter,
+            )
+        value = itemgetter(*term.slots)(values)
+        matcher = filter_obj.matcher(
+            filter_obj.convert_value(value, converter)
+        )
+        key = expression.key
+        return lambda env: matcher(value_of(env[path], key))
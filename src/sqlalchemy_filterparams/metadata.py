@@ -0,0 +1,95 @@
+# -*- encoding: utf-8 -*-
+
+from filterparams import build_parser
+
+from .cost import CostLimits
+from .expression import ExpressionItem
+from .filters import DEFAULT_FILTERS
+from .indexes import BindingIndexes
+from .instrumentation import NULL_INSTRUMENTATION
+from .plan import DEFAULT_PLAN_CACHE_SIZE
+from .util import DEFAULT_CONVERTERS, ConverterRegistry
+
+
+class BindingMetadata:
+
+    __slots__ = (
+        'model',
+        'sessionmaker',
+        'bindings',
+        'filters',
+        'filter_names',
+        'converters',
+        'converter_registry',
+        'default_filter',
+        'parser',
+        'plan_cache_size',
+        'bind_params',
+        'cursor_secret',
+        'instrumentation',
+        'result_cache',
+        'limits',
+        'indexes',
+    )
+
+    def __init__(self, **kwargs):
+        for name in self.__slots__:
+            object.__setattr__(self, name, kwargs.get(name, None))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            'Binding metadata is frozen and can not set %s' % name
+        )
+
+    def __delattr__(self, name):
+        raise AttributeError(
+            'Binding metadata is frozen and can not delete %s' % name
+        )
+
+    @classmethod
+    def of(cls, binding_cl):
+        filters = binding_cl.config_entry('filters') or DEFAULT_FILTERS
+        filter_names = tuple(filter_obj.name for filter_obj in filters)
+        default_filter = binding_cl.config_entry('default_filter') or 'eq'
+        converters = binding_cl.config_entry('converters')
+        if converters is None:
+            converters = DEFAULT_CONVERTERS.copy()
+        plan_cache_size = binding_cl.config_entry('plan_cache_size')
+        if plan_cache_size is None:
+            plan_cache_size = DEFAULT_PLAN_CACHE_SIZE
+        bindings = dict(
+            (name, ExpressionItem(data))
+            for name, data in (
+                binding_cl.config_entry('binding') or {}
+            ).items()
+        )
+        model = binding_cl.model()
+
+        return cls(
+            model=model,
+            sessionmaker=binding_cl.config_entry('sessionmaker'),
+            bindings=bindings,
+            filters=dict(
+                (filter_obj.name, filter_obj)
+                for filter_obj in filters
+            ),
+            filter_names=filter_names,
+            converters=converters,
+            converter_registry=ConverterRegistry(converters),
+            default_filter=default_filter,
+            parser=build_parser(filter_names, default_filter),
+            plan_cache_size=plan_cache_size,
+            bind_params=bool(binding_cl.config_entry('bind_params')),
+            cursor_secret=binding_cl.config_entry('cursor_secret'),
+            instrumentation=(
+                binding_cl.config_entry('instrumentation') or
+                NULL_INSTRUMENTATION
+            ),
+            result_cache=binding_cl.config_entry('result_cache'),
+            limits=CostLimits.of(binding_cl.config_entry('limits')),
+            indexes=BindingIndexes.of(
+                model,
+                bindings,
+                binding_cl.config_entry('index_policy'),
+            ),
+        )
@@ -0,0 +1,187 @@
+# -*- encoding: utf-8 -*-
+
+from collections import OrderedDict
+
+from filterparams.obj import (
+    Parameter,
+    And,
+    Or,
+    Not,
+)
+
+from .filters import EqFilter, NeqFilter, InFilter, NotInFilter
+
+
+def fold(root, children_of, combine):
+    results = {}
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if id(node) in results:
+            continue
+        children = children_of(node)
+        if expanded or not children:
+            results[id(node)] = combine(node, [
+                results[id(child)]
+                for child in children
+            ])
+        else:
+            stack.append((node, True))
+            stack.extend(
+                (child, False)
+                for child in reversed(children)
+            )
+    return results[id(root)]
+
+
+class Term:
+    __slots__ = ('name', 'filter', 'slots', 'merged')
+
+    def __init__(self, name, filter_name, slots, merged=False):
+        self.name = name
+        self.filter = filter_name
+        self.slots = tuple(slots)
+        self.merged = merged
+
+    @property
+    def children(self):
+        return ()
+
+    @property
+    def key(self):
+        return 'term', self.name, self.filter, self.slots
+
+
+class Negation:
+    __slots__ = ('inner',)
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    @property
+    def children(self):
+        return (self.inner,)
+
+    @property
+    def key(self):
+        return 'not', self.inner.key
+
+
+class Junction:
+    __slots__ = ('children',)
+    operation = None
+
+    def __init__(self, children):
+        self.children = tuple(children)
+
+    @property
+    def key(self):
+        return (self.operation,) + tuple(
+            child.key for child in self.children
+        )
+
+
+class AllOf(Junction):
+    __slots__ = ()
+    operation = 'and'
+
+
+class AnyOf(Junction):
+    __slots__ = ()
+    operation = 'or'
+
+
+class TreeOptimizer:
+
+    merge_filters = {
+        AnyOf: (EqFilter, InFilter, NotInFilter),
+        AllOf: (NeqFilter, NotInFilter, None),
+    }
+
+    def __init__(self, shape, filters):
+        self.shape = shape
+        self.filters = filters
+
+    def optimize(self, param_order):
+        if param_order is None:
+            return None
+        return fold(param_order, self._children_of, self._combine)
+
+    @staticmethod
+    def _children_of(item):
+        if isinstance(item, (And, Or)):
+            return item.left, item.right
+        elif isinstance(item, Not):
+            return (item.inner,)
+        return ()
+
+    def _combine(self, item, children):
+        if isinstance(item, Parameter):
+            return Term(item.name, item.filter, (self.shape.slot_of(item),))
+        elif isinstance(item, Not):
+            inner, = children
+            if isinstance(inner, Negation):
+                return inner.inner
+            return Negation(inner)
+        elif isinstance(item, And):
+            return self._junction(AllOf, children)
+        elif isinstance(item, Or):
+            return self._junction(AnyOf, children)
+        else:
+            raise ValueError('Unknown parameter %s' % item)
+
+    def _junction(self, junction_cl, children):
+        flattened = OrderedDict()
+        for child in children:
+            if isinstance(child, junction_cl):
+                grand_children = child.children
+            else:
+                grand_children = (child,)
+            for grand_child in grand_children:
+                flattened.setdefault(grand_child.key, grand_child)
+
+        items = self._merge_terms(junction_cl, list(flattened.values()))
+        if len(items) == 1:
+            return items[0]
+        return junction_cl(items)
+
+    def _merge_terms(self, junction_cl, items):
+        single_cl, multiple_cl, excluded_cl = (
+            self.merge_filters[junction_cl]
+        )
+        single_name = self._filter_name_of(single_cl)
+        multiple_name = self._filter_name_of(multiple_cl, excluded_cl)
+        if single_name is None or multiple_name is None:
+            return items
+
+        groups = OrderedDict()
+        for item in items:
+            if not isinstance(item, Term):
+                continue
+            if (item.filter == single_name or
+                    (item.merged and item.filter == multiple_name)):
+                groups.setdefault(item.name, []).append(item)
+
+        result = []
+        for item in items:
+            group = groups.get(getattr(item, 'name', None), ())
+            if item not in group or len(group) < 2:
+                result.append(item)
+            elif item is group[0]:
+                result.append(Term(
+                    item.name,
+                    multiple_name,
+                    [slot for term in group for slot in term.slots],
+                    merged=True,
+                ))
+        return result
+
+    def _filter_name_of(self, filter_base_cl, excluded_cl=None):
+        for name, filter_cl in self.filters.items():
+            if not isinstance(filter_cl, type):
+                continue
+            if excluded_cl is not None and issubclass(filter_cl, excluded_cl):
+                continue
+            if issubclass(filter_cl, filter_base_cl):
+                return name
+        return None
@@ -0,0 +1,282 @@
+# -*- encoding: utf-8 -*-
+
+import base64
+import hashlib
+import hmac
+import json
+
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from sqlalchemy import (
+    and_,
+    or_,
+    asc,
+    desc,
+    false,
+    inspect,
+    literal,
+    tuple_,
+)
+
+from .memory import NULLS_FIRST_DIALECTS
+from .util import is_empty
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'datetime': value.isoformat()}
+    elif isinstance(value, date):
+        return {'date': value.isoformat()}
+    elif isinstance(value, time):
+        return {'time': value.isoformat()}
+    elif isinstance(value, Decimal):
+        return {'decimal': str(value)}
+    elif value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise ValueError(
+        'The value %r can not be stored in a cursor' % (value,)
+    )
+
+
+def _decode_value(value):
+    if not isinstance(value, dict):
+        return value
+    (type_name, data), = value.items()
+    if type_name == 'datetime':
+        return datetime.fromisoformat(data)
+    elif type_name == 'date':
+        return date.fromisoformat(data)
+    elif type_name == 'time':
+        return time.fromisoformat(data)
+    elif type_name == 'decimal':
+        return Decimal(data)
+    raise ValueError('Unknown cursor value type %s' % type_name)
+
+
+def check_limit(limit):
+    if limit < 1:
+        raise ValueError('The limit must be positive, got %s' % limit)
+
+
+def is_nullable(expression):
+    column = getattr(expression, 'expression', expression)
+    return getattr(column, 'nullable', True)
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(data):
+    data = data.encode('ascii')
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+
+class CursorSigner:
+
+    def __init__(self, secret):
+        if isinstance(secret, str):
+            secret = secret.encode('utf-8')
+        self.secret = secret
+
+    def _signature(self, payload):
+        return hmac.new(self.secret, payload, hashlib.sha256).digest()
+
+    def dumps(self, data):
+        payload = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        return '%s.%s' % (
+            _b64encode(payload),
+            _b64encode(self._signature(payload)),
+        )
+
+    def loads(self, token):
+        try:
+            payload, signature = token.split('.')
+            payload = _b64decode(payload)
+            signature = _b64decode(signature)
+        except (AttributeError, ValueError, TypeError):
+            raise ValueError('The cursor %r is malformed' % (token,))
+        if not hmac.compare_digest(signature, self._signature(payload)):
+            raise ValueError(
+                'The cursor %r has an invalid signature' % token
+            )
+        return json.loads(payload.decode('utf-8'))
+
+
+class Page:
+
+    def __init__(self, items, next_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+class KeysetPaginator:
+
+    row_values = True
+
+    def __init__(self, plan, model, signer, dialect_name=None):
+        self.plan = plan
+        self.model = model
+        self.signer = signer
+        self.dialect_name = dialect_name
+
+    @property
+    def nulls_first(self):
+        return self.dialect_name in NULLS_FIRST_DIALECTS
+
+    @property
+    def sort_keys(self):
+        keys = [
+            (name, expression, direction)
+            for name, expression, direction in self.plan.order_keys
+        ]
+        mapper = inspect(self.model)
+        for column in mapper.primary_key:
+            attribute = getattr(
+                self.model,
+                mapper.get_property_by_column(column).key,
+            )
+            if not any(expression is attribute for _, expression, _ in keys):
+                keys.append((attribute.key, attribute, 'asc'))
+        return keys
+
+    def _fingerprint(self, sort_keys):
+        return [[name, direction] for name, _, direction in sort_keys]
+
+    def page(self, sql_query, limit, cursor=None):
+        check_limit(limit)
+        if is_empty(sql_query):
+            return Page([])
+        sort_keys = self.sort_keys
+        rows = self.statement(
+            sql_query,
+            limit,
+            sort_keys,
+            self.decode_optional(cursor, sort_keys),
+        ).all()
+        return self.page_of(rows, limit, sort_keys)
+
+    def batches(self, sql_query, batch_size):
+        if is_empty(sql_query):
+            return
+        sort_keys = self.sort_keys
+        values = None
+        while True:
+            rows = self.statement(
+                sql_query,
+                batch_size,
+                sort_keys,
+                values,
+            ).all()
+            if rows:
+                yield [row[0] for row in rows[:batch_size]]
+            if len(rows) <= batch_size:
+                return
+            values = list(rows[batch_size - 1][1:])
+
+    def statement(self, sql_query, limit, sort_keys, values=None):
+        check_limit(limit)
+        tie_breakers = sort_keys[len(self.plan.order_keys):]
+        sql_query = sql_query.order_by(*[
+            desc(expression) if direction == 'desc' else asc(expression)
+            for _, expression, direction in tie_breakers
+        ])
+        if values is not None:
+            sql_query = sql_query.filter(
+                self.seek_clause(sort_keys, values)
+            )
+
+        sql_query = sql_query.add_columns(*[
+            expression.label('_cursor_%d' % index)
+            for index, (_, expression, _) in enumerate(sort_keys)
+        ])
+        return sql_query.limit(limit + 1)
+
+    def page_of(self, rows, limit, sort_keys):
+        items = [row[0] for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = self.encode(
+                list(rows[limit - 1][1:]),
+                sort_keys,
+            )
+        return Page(items, next_cursor)
+
+    def encode(self, values, sort_keys):
+        return self.signer.dumps({
+            'keys': self._fingerprint(sort_keys),
+            'values': [_encode_value(value) for value in values],
+        })
+
+    def decode_optional(self, cursor, sort_keys):
+        if cursor is None:
+            return None
+        return self.decode(cursor, sort_keys)
+
+    def decode(self, cursor, sort_keys):
+        data = self.signer.loads(cursor)
+        if data.get('keys') != self._fingerprint(sort_keys):
+            raise ValueError(
+                'The cursor does not belong to the requested order'
+            )
+        return [_decode_value(value) for value in data['values']]
+
+    def seek_clause(self, sort_keys, values):
+        expressions = [expression for _, expression, _ in sort_keys]
+        directions = set(direction for _, _, direction in sort_keys)
+
+        nullable = any(is_nullable(expression) for expression in expressions)
+        if (self.row_values and len(directions) == 1 and len(values) > 1 and
+                not nullable):
+            left = tuple_(*expressions)
+            right = tuple_(*[
+                literal(value, type_=expression.type)
+                for expression, value in zip(expressions, values)
+            ])
+            if directions == {'desc'}:
+                return left < right
+            return left > right
+
+        clauses = []
+        for index, (_, expression, direction) in enumerate(sort_keys):
+            equalities = [
+                self._same(previous, value)
+                for previous, value in zip(expressions[:index], values)
+            ]
+            clauses.append(and_(*(equalities + [
+                self._after(expression, direction, values[index]),
+            ])))
+        return or_(*clauses)
+
+    @staticmethod
+    def _same(expression, value):
+        if value is None:
+            return expression.is_(None)
+        return expression == literal(value, type_=expression.type)
+
+    def _after(self, expression, direction, value):
+        nulls_last = (direction == 'desc') == self.nulls_first
+        if value is None:
+            if nulls_last:
+                return false()
+            return expression.is_not(None)
+
+        value = literal(value, type_=expression.type)
+        if direction == 'desc':
+            comparison = expression < value
+        else:
+            comparison = expression > value
+        if nulls_last and is_nullable(expression):
+            return or_(comparison, expression.is_(None))
+        return comparison
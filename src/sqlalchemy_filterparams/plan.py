@@ -0,0 +1,378 @@
+# -*- encoding: utf-8 -*-
+
+from collections import OrderedDict, namedtuple
+from operator import itemgetter
+from threading import Lock
+
+from sqlalchemy import and_, or_, not_, asc, desc, false, true
+from sqlalchemy.sql.elements import False_, True_
+
+from filterparams.obj import (
+    Parameter,
+    BindingOperation,
+    And,
+    Or,
+    Not,
+)
+
+from .joins import JoinPlanner, Subquery
+from .optimization import (
+    AllOf,
+    AnyOf,
+    Negation,
+    Term,
+    TreeOptimizer,
+    fold,
+)
+from .ranges import coalesce_ranges
+from .util import mark_empty
+
+
+DEFAULT_PLAN_CACHE_SIZE = 256
+
+CacheInfo = namedtuple(
+    'CacheInfo',
+    ['hits', 'misses', 'evictions', 'maxsize', 'currsize'],
+)
+
+
+class QueryShape:
+    def __init__(self, query):
+        self._slots = {}
+        self.values = []
+        self.key = (
+            self._shape_of(query.param_order),
+            tuple(
+                (order.name, order.direction)
+                for order in query.orders
+            ),
+        )
+
+    def slot_of(self, param):
+        return self._slots[id(param)]
+
+    def _shape_of(self, param_order):
+        if param_order is None:
+            return None
+        return fold(param_order, self._children_of, self._combine)
+
+    @staticmethod
+    def _children_of(item):
+        if isinstance(item, BindingOperation):
+            return item.left, item.right
+        elif isinstance(item, Not):
+            return (item.inner,)
+        return ()
+
+    def _combine(self, item, children):
+        if isinstance(item, BindingOperation):
+            if isinstance(item, And):
+                return ('and',) + tuple(children)
+            elif isinstance(item, Or):
+                return ('or',) + tuple(children)
+            raise ValueError("Unkown param entry %s" % item)
+        elif isinstance(item, Not):
+            return ('not',) + tuple(children)
+        elif isinstance(item, Parameter):
+            if id(item) not in self._slots:
+                self._slots[id(item)] = len(self.values)
+                self.values.append(item.value)
+            return 'param', item.name, item.filter, self.slot_of(item)
+        else:
+            raise ValueError('Unknown parameter %s' % item)
+
+
+class FilterPlan:
+    def __init__(self, joins, predicate, order_keys):
+        self.joins = tuple(joins)
+        self.predicate = predicate
+        self.order_keys = tuple(order_keys)
+        self.orders = tuple(
+            desc(expression) if direction == 'desc' else asc(expression)
+            for _, expression, direction in self.order_keys
+        )
+
+    def bind(self, sql_query, values):
+        sql_query, params = self.bind_separately(sql_query, values)
+        if params:
+            sql_query = sql_query.params(params)
+        return sql_query
+
+    def bind_separately(self, sql_query, values):
+        params = {}
+        for target, relation in self.joins:
+            sql_query = sql_query.join(target, relation)
+        if self.predicate is not None:
+            predicate = self.build_predicate(values, params)
+            if isinstance(predicate, False_):
+                sql_query = mark_empty(sql_query)
+            sql_query = sql_query.filter(predicate)
+        return sql_query.order_by(*self.orders), params
+
+    def build_predicate(self, values, params=None):
+        if params is None:
+            params = {}
+        return fold(
+            self.predicate,
+            lambda node: node.children,
+            lambda node, children: node.build(values, children, params),
+        )
+
+
+class ParameterNode:
+    children = ()
+
+    def __init__(self, name, slots, expression, filter_obj, converter):
+        self.name = name
+        self.slots = tuple(slots)
+        self.expression = expression
+        self.filter_obj = filter_obj
+        self.converter = converter
+        self._value_of = itemgetter(*self.slots)
+
+    @property
+    def range_bound(self):
+        return self.filter_obj.range_bound
+
+    def convert(self, values):
+        return self.filter_obj.convert_value(
+            self._value_of(values),
+            self.converter,
+        )
+
+    def build(self, values, children, params):
+        return self.filter_obj.build(self.expression, self.convert(values))
+
+    def key_of(self, values):
+        return self.name, self.filter_obj.name, self._value_of(values)
+
+
+class BoundParameterNode(ParameterNode):
+    def __init__(self, name, slots, expression, filter_obj, converter, key):
+        super().__init__(name, slots, expression, filter_obj, converter)
+        self.key = key
+        self.clause = filter_obj.bind(expression, key)
+
+    def build(self, values, children, params):
+        value = self.convert(values)
+        clause = self.filter_obj.rebind(self.expression, self.key, value)
+        if clause is not None:
+            return clause
+        params.update(self.filter_obj.params_of(self.key, value))
+        return self.clause
+
+
+class NotNode:
+    def __init__(self, inner):
+        self.children = (inner,)
+
+    @staticmethod
+    def build(values, children, params):
+        return not_(*children)
+
+
+def distinct_clauses(nodes, clauses, values):
+    seen = set()
+    result = []
+    for node, clause in zip(nodes, clauses):
+        key_of = getattr(node, 'key_of', None)
+        if key_of is not None:
+            try:
+                key = key_of(values)
+                if key in seen:
+                    continue
+                seen.add(key)
+            except TypeError:
+                pass
+        result.append(clause)
+    return result
+
+
+class AndNode:
+    def __init__(self, children):
+        self.children = tuple(children)
+
+    def build(self, values, children, params):
+        if any(isinstance(child, False_) for child in children):
+            return false()
+        children = [
+            child
+            for child in distinct_clauses(self.children, children, values)
+            if not isinstance(child, True_)
+        ]
+        if not children:
+            return true()
+        return and_(*children)
+
+
+class OrNode(AndNode):
+    def build(self, values, children, params):
+        if any(isinstance(child, True_) for child in children):
+            return true()
+        children = [
+            child
+            for child in distinct_clauses(self.children, children, values)
+            if not isinstance(child, False_)
+        ]
+        if not children:
+            return false()
+        return or_(*children)
+
+
+class PlanCompiler:
+
+    def __init__(self, query_config, shape):
+        self.query_config = query_config
+        self.shape = shape
+        self._bind_keys = set()
+        self.join_planner = JoinPlanner(query_config.expressions)
+
+    @property
+    def expressions(self):
+        return self.query_config.expressions
+
+    def compile(self, query):
+        predicate = None
+        tree = TreeOptimizer(
+            self.shape,
+            self.query_config.filters,
+        ).optimize(query.param_order)
+        with self.query_config.span('join'):
+            tree = self.join_planner.plan(
+                tree,
+                [sort_item.name for sort_item in query.orders],
+            )
+        if tree is not None:
+            predicate = fold(tree, self._children_of, self._compile_item)
+        orders = self._compile_orders(query.orders)
+        return FilterPlan(self.expressions.joins, predicate, orders)
+
+    @staticmethod
+    def _children_of(item):
+        return item.children
+
+    def _compile_item(self, item, children):
+        if isinstance(item, AllOf):
+            range_keys_for = None
+            if self.query_config.bind_params:
+                range_keys_for = self._range_keys_for
+            return AndNode(coalesce_ranges(children, range_keys_for))
+        elif isinstance(item, AnyOf):
+            return OrNode(children)
+        elif isinstance(item, Negation):
+            return NotNode(*children)
+        elif isinstance(item, Term):
+            return self._compile_term(item)
+        elif isinstance(item, Subquery):
+            return self.join_planner.subquery_node(item, *children)
+        else:
+            raise ValueError('Unknown parameter %s' % item)
+
+    def _compile_term(self, term):
+        expression = self.expressions.resolve(term.name)
+        filter_obj = self.query_config.filter_for(term.filter)
+        converter = self.query_config.converter_for(expression.type)
+        if converter is not None:
+            converter = self.query_config.instrumentation.timed(
+                converter,
+                'convert',
+                binding=self.query_config.binding_name,
+                param=term.name,
+                filter=term.filter,
+            )
+        if not self.query_config.bind_params:
+            return ParameterNode(
+                term.name,
+                term.slots,
+                expression,
+                filter_obj,
+                converter,
+            )
+
+        return BoundParameterNode(
+            term.name,
+            term.slots,
+            expression,
+            filter_obj,
+            converter,
+            self._bind_key_for(term.name, term.filter, term.slots[0]),
+        )
+
+    def _bind_key_for(self, name, suffix, slot):
+        key = '%s_%s' % (name.replace('.', '_'), suffix)
+        if key in self._bind_keys:
+            key = '%s_%d' % (key, slot)
+        self._bind_keys.add(key)
+        return key
+
+    def _range_keys_for(self, node):
+        return (
+            self._bind_key_for(node.name, 'lower', node.slots[0]),
+            self._bind_key_for(node.name, 'upper', node.slots[0]),
+        )
+
+    def _compile_orders(self, orders):
+        return [
+            (
+                sort_item.name,
+                self.expressions.resolve(sort_item.name),
+                sort_item.direction,
+            )
+            for sort_item in orders
+        ]
+
+
+class PlanCache:
+    def __init__(self, maxsize=DEFAULT_PLAN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._plans = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._plans)
+
+    def get(self, key):
+        with self._lock:
+            plan = self._plans.get(key, None)
+            if plan is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._plans.move_to_end(key)
+            return plan
+
+    def put(self, key, plan):
+        if not self.maxsize:
+            return plan
+        with self._lock:
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.maxsize:
+                self._plans.popitem(last=False)
+                self.evictions += 1
+        return plan
+
+    def get_or_compile(self, key, compile_func):
+        plan = self.get(key)
+        if plan is None:
+            plan = self.put(key, compile_func())
+        return plan
+
+    def info(self):
+        return CacheInfo(
+            self.hits,
+            self.misses,
+            self.evictions,
+            self.maxsize,
+            len(self._plans),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
@@ -0,0 +1,79 @@
+# -*- encoding: utf-8 -*-
+
+from collections import OrderedDict
+
+from sqlalchemy.orm import load_only
+
+from .indexes import column_of
+
+
+FIELDS_PARAM = 'fields'
+
+FIELDS_DELIMITER = ','
+
+
+def fields_of(params, delimiter=FIELDS_DELIMITER):
+    value = params.get(FIELDS_PARAM, None) if params else None
+    if value is None:
+        return None
+    elif isinstance(value, str):
+        value = value.split(delimiter)
+    names = [name.strip() for name in value if name and name.strip()]
+    if not names:
+        return None
+    return tuple(OrderedDict.fromkeys(names))
+
+
+def is_projectable(expressions, name):
+    return (
+        not expressions.path_to(name) and
+        column_of(expressions, name) is not None
+    )
+
+
+class Projection:
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    @classmethod
+    def of(cls, expressions, names=None):
+        if names is None:
+            names = [
+                name for name in expressions.lookup
+                if is_projectable(expressions, name)
+            ]
+        columns = OrderedDict()
+        for name in names:
+            if name not in expressions.lookup:
+                raise KeyError('Field %s not found' % name)
+            elif not is_projectable(expressions, name):
+                raise ValueError(
+                    'The field %s is not a column of %s and can not '
+                    'be projected' % (name, expressions.model.__name__)
+                )
+            columns[name] = expressions.param_of(name)
+        return cls(columns)
+
+    @property
+    def names(self):
+        return tuple(self.columns)
+
+    def entities(self, sql_query):
+        if not self.columns:
+            return sql_query
+        return sql_query.options(load_only(*self.columns.values()))
+
+    def rows(self, sql_query):
+        if not self.columns:
+            raise ValueError('There are no fields to project')
+        labels = [
+            column.label(name)
+            for name, column in self.columns.items()
+        ]
+        if hasattr(sql_query, 'with_entities'):
+            return sql_query.with_entities(*labels)
+        return sql_query.with_only_columns(
+            *labels,
+            maintain_column_froms=True
+        )
@@ -1,12 +1,21 @@
 # -*- encoding: utf-8 -*-
 
-from filterparams import build_parser
 from filterparams.obj import Query
 
+from .batch import BatchQuery
+from .columnar import ColumnarEvaluation
+from .cost import cost_of
+from .counting import Count, Counter, DEFAULT_COUNT_CAP, without_orders
 from .evaluation import Evaluation
 from .expression import ExpressionHandler
-from .filters import DEFAULT_FILTERS
+from .memory import MemoryEvaluation
+from .metadata import BindingMetadata
+from .pagination import CursorSigner, KeysetPaginator
+from .plan import DEFAULT_PLAN_CACHE_SIZE, PlanCache
+from .projection import Projection, fields_of
 from .query_config import QueryConfig
+from .streaming import DEFAULT_BATCH_SIZE, BatchStreamer
+from .util import is_empty
 
 
 class QueryBindingConfiguration:
@@ -18,10 +27,24 @@ class QueryBindingConfiguration:
         'converters': None,
         'filters': None,
         'default_filter': None,
+        'plan_cache_size': DEFAULT_PLAN_CACHE_SIZE,
+        'bind_params': False,
+        'cursor_secret': None,
+        'instrumentation': None,
+        'result_cache': None,
+        'limits': None,
+        'index_policy': None,
     }
 
+    _metadata = None
+    _plan_cache = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._metadata = None
+        cls._plan_cache = None
+
     def __init__(self, session=None):
-        self.__cached_model = None
         self._session = session
 
     @classmethod
@@ -44,62 +67,81 @@ class QueryBindingConfiguration:
 
     @classmethod
     def config_entry(cls, name):
-        candidates = [cls]
-        seen = set()
-
-        for candidate in candidates:
-            if candidate in seen:
-                continue
-            seen.add(candidate)
-
-            if hasattr(candidate, '__config__'):
-                config = candidate.__config__
-                if name in config:
-                    return config[name]
-            else:
-                pass
+        for candidate in cls.__mro__:
+            config = candidate.__dict__.get('__config__', None)
+            if config and name in config:
+                return config[name]
+        return None
+
+    @classmethod
+    def metadata(cls):
+        if cls._metadata is None:
+            cls._metadata = BindingMetadata.of(cls)
+        return cls._metadata
 
-            candidates.extend(cls.__bases__)
+    @classmethod
+    def reset_metadata(cls):
+        cls._metadata = None
+        cls._plan_cache = None
 
-    @property
-    def _cached_model(self):
-        if getattr(self, '__cached_model', None) is None:
-            self.__cached_model = self.model()
-        return self.__cached_model
+    @classmethod
+    def plan_cache(cls):
+        if cls._plan_cache is None:
+            cls._plan_cache = PlanCache(cls.metadata().plan_cache_size)
+        return cls._plan_cache
+
+    @classmethod
+    def instrumentation(cls):
+        return cls.metadata().instrumentation
+
+    def span(self, stage, **tags):
+        return self.instrumentation().span(
+            stage,
+            binding=self.__class__.__name__,
+            **tags
+        )
 
     @property
     def session(self):
-        if self._session is not None:
-            return self._session
-        else:
-            return self._session_from_config
+        if self._session is None:
+            self._session = self._session_from_config
+        return self._session
 
     @property
     def _session_from_config(self):
-        sessionmaker = self.config_entry('sessionmaker')
+        sessionmaker = self.metadata().sessionmaker
         if callable(sessionmaker):
             return sessionmaker()
         else:
             return sessionmaker
 
+    @property
+    def dialect_name(self):
+        try:
+            return self.session.get_bind().dialect.name
+        except Exception:  # pylint: disable=broad-except
+            return None
+
     @property
     def expression_handler(self):
+        metadata = self.metadata()
         return ExpressionHandler(
-            self.config_entry('binding'),
-            self.model(),
+            metadata.bindings,
+            metadata.model,
         )
 
     @property
     def _base_query(self):
-        if self._cached_model is None:
+        model = self.metadata().model
+        if model is None:
             raise RuntimeError(
                 'Could not determine model '
                 'for query binding configuration %s' % self.__class__
             )
-        if hasattr(self._cached_model, 'query'):
-            query = self._cached_model.query()
+        if hasattr(model, 'query'):
+            query = model.query()
         elif self.session is not None:
-            query = self.session.query(self._cached_model)
+            query = self.session.query(model)
         else:
             raise RuntimeError(
                 'Could not access SQLAlchemy session. Please '
@@ -108,36 +150,248 @@ class QueryBindingConfiguration:
 
         return query
 
-    @property
-    def _filters(self):
-        return self.config_entry('filters') or DEFAULT_FILTERS
+    def evaluate_params(self, params):
+        return self.evaluate(self.parse(params), fields_of(params))
 
-    @property
-    def _default_filter(self):
-        return self.config_entry('default_filter') or 'eq'
+    def fetch_params(self, params):
+        return self._fetch(self.evaluate_params(params))
 
-    @property
-    def _filter_names(self):
-        return [
-            filter_obj.name
-            for filter_obj in self._filters
-        ]
+    def fetch_rows_params(self, params):
+        return self.fetch_rows(self.parse(params), fields_of(params))
 
-    def evaluate_params(self, params):
-        parser = build_parser(self._filter_names, self._default_filter)
-        return self.evaluate(parser(params))
+    def fetch_rows(self, filterparams_query: Query, fields=None):
+        return self._fetch(
+            self._rows_of(filterparams_query, fields),
+            scalars=False,
+        )
+
+    def _rows_of(self, filterparams_query, fields=None):
+        evaluation = Evaluation(self.config_with(filterparams_query))
+        return evaluation.capped(self.projection(fields).rows(
+            evaluation.evaluate(self._base_query)
+        ))
+
+    def _fetch(self, query, scalars=True):
+        if is_empty(query):
+            return []
+        result_cache = self.metadata().result_cache
+        if result_cache is None:
+            with self.span('execute'):
+                result = query.all()
+        else:
+            result = self._fetch_cached(query, result_cache, scalars)
+        self.instrumentation().count(
+            'rows',
+            len(result),
+            binding=self.__class__.__name__,
+        )
+        return result
+
+    def _fetch_cached(self, query, result_cache, scalars=True):
+        statement = query.statement
+        lookup = result_cache.lookup(query.session, statement, scalars)
+        self._count_lookup(lookup)
+        if lookup.hit:
+            return lookup.items
+        with self.span('execute'):
+            return result_cache.store(
+                lookup,
+                query.session.execute(statement),
+                scalars,
+            )
+
+    def _count_lookup(self, lookup):
+        self.instrumentation().count(
+            'result_cache_hits' if lookup.hit else 'result_cache_misses',
+            binding=self.__class__.__name__,
+        )
+
+    def batch_params(self, params_list, limit=None):
+        return self.batch(
+            [self.parse(params) for params in params_list],
+            limit,
+        )
 
-    def evaluate(self, filterparams_query: Query):
+    def batch(self, filterparams_queries, limit=None):
+        batch_query = self._batch_query(filterparams_queries, limit)
+        if batch_query.is_empty:
+            return batch_query.split(())
+        with self.span('execute'):
+            rows = self.session.execute(batch_query.statement()).all()
+        self.instrumentation().count(
+            'rows',
+            len(rows),
+            binding=self.__class__.__name__,
+        )
+        return batch_query.split(rows)
+
+    def _batch_query(self, filterparams_queries, limit):
+        batch_query = BatchQuery(self.metadata().model, limit)
+        for filterparams_query in filterparams_queries:
+            query_config = self.config_with(filterparams_query)
+            query_config.bind_params = False
+            evaluation = Evaluation(query_config)
+            statement = self._statement_of(
+                evaluation.evaluate(self._base_query)
+            )
+            batch_query.add(evaluation.plan, statement, evaluation.row_cap)
+        return batch_query
+
+    @staticmethod
+    def _statement_of(sql_query):
+        return sql_query.statement
+
+    def count_params(self, params, mode='exact', cap=DEFAULT_COUNT_CAP):
+        return self.count(self.parse(params), mode, cap)
+
+    def count(self, filterparams_query: Query, mode='exact',
+              cap=DEFAULT_COUNT_CAP):
+        evaluation = Evaluation(
+            self.config_with(without_orders(filterparams_query))
+        )
+        sql_query = evaluation.evaluate(self._base_query)
+        counter = self._counter_of(evaluation, mode, cap)
+        if is_empty(sql_query):
+            return Count(0)
+        with self.span('execute'):
+            for statement, count_of in counter.statements(sql_query.statement):
+                count = count_of(sql_query.session.scalar(statement))
+                if count is not None:
+                    return count
+
+    def _counter_of(self, evaluation, mode, cap):
+        if evaluation.row_cap is not None:
+            if mode == 'capped':
+                cap = min(cap, evaluation.row_cap)
+            else:
+                cap = evaluation.row_cap
+            mode = 'capped'
+        return Counter(
+            evaluation.plan,
+            self.metadata().model,
+            evaluation.query_config.dialect_name,
+            mode,
+            cap,
+        )
+
+    def paginate_params(self, params, limit, cursor=None):
+        return self.paginate(self.parse(params), limit, cursor)
+
+    def paginate(self, filterparams_query: Query, limit, cursor=None):
+        signer = self._cursor_signer()
+        evaluation = Evaluation(self.config_with(filterparams_query))
+        sql_query = evaluation.evaluate(self._base_query)
+        with self.span('execute'):
+            return KeysetPaginator(
+                evaluation.plan,
+                self.metadata().model,
+                signer,
+                evaluation.query_config.dialect_name,
+            ).page(sql_query, evaluation.clamped(limit), cursor)
+
+    def stream_params(self, params, batch_size=DEFAULT_BATCH_SIZE,
+                      strategy=None):
+        for batch in self.stream_batches_params(params, batch_size, strategy):
+            for item in batch:
+                yield item
+
+    def stream_batches_params(self, params, batch_size=DEFAULT_BATCH_SIZE,
+                              strategy=None):
+        return self.stream_batches(self.parse(params), batch_size, strategy)
+
+    def stream_batches(self, filterparams_query: Query,
+                       batch_size=DEFAULT_BATCH_SIZE, strategy=None):
+        evaluation = Evaluation(self.config_with(filterparams_query))
+        sql_query = evaluation.evaluate(self._base_query)
+        batches = BatchStreamer(
+            evaluation.plan,
+            self.metadata().model,
+            evaluation.query_config.dialect_name,
+            evaluation.row_cap,
+        ).batches(sql_query, batch_size, strategy)
+        binding = self.__class__.__name__
+        while True:
+            with self.span('execute'):
+                batch = next(batches, None)
+            if batch is None:
+                return
+            self.instrumentation().count('rows', len(batch), binding=binding)
+            yield batch
+
+    def _cursor_signer(self):
+        secret = self.metadata().cursor_secret
+        if not secret:
+            raise RuntimeError(
+                'Keyset pagination requires a \'cursor_secret\' '
+                'in the configuration of %s' % self.__class__
+            )
+        return CursorSigner(secret)
+
+    def evaluate_params_separately(self, params):
+        return self.evaluate_separately(self.parse(params))
+
+    def parse(self, params):
+        with self.span('parse'):
+            return self.metadata().parser(params)
+
+    def evaluate(self, filterparams_query: Query, fields=None):
+        evaluation = Evaluation(self.config_with(filterparams_query))
+        sql_query = evaluation.evaluate(self._base_query)
+        if fields is not None:
+            sql_query = self.projection(fields).entities(sql_query)
+        return evaluation.capped(sql_query)
+
+    def projection(self, fields=None):
+        return Projection.of(self.expression_handler, fields)
+
+    def evaluate_separately(self, filterparams_query: Query):
         return Evaluation(
             self.config_with(filterparams_query)
-        ).evaluate(self._base_query)
+        ).evaluate_separately(self._base_query)
+
+    def cost_params(self, params):
+        return self.cost(self.parse(params))
+
+    def cost(self, filterparams_query: Query):
+        limits = self.metadata().limits
+        return cost_of(
+            filterparams_query,
+            self.expression_handler,
+            self.metadata().filters,
+            limits.weights if limits is not None else None,
+            self.dialect_name,
+        )
+
+    def evaluate_items_params(self, items, params):
+        return self.evaluate_items(items, self.parse(params))
+
+    def evaluate_items(self, items, filterparams_query: Query):
+        return MemoryEvaluation(
+            self.config_with(filterparams_query)
+        ).evaluate(items)
+
+    def evaluate_columns_params(self, columns, params):
+        return self.evaluate_columns(columns, self.parse(params))
+
+    def evaluate_columns(self, columns, filterparams_query: Query):
+        return ColumnarEvaluation(
+            self.config_with(filterparams_query)
+        ).evaluate(columns)
 
     def config_with(self, query):
+        metadata = self.metadata()
         query_config = QueryConfig()
         query_config.query = query
-        query_config.converters = self.config_entry('converters')
-        query_config.filters = self.config_entry('filters')
+        query_config.converters = metadata.converters
+        query_config.converter_registry = metadata.converter_registry
+        query_config.filters = metadata.filters
         query_config.session = self.session
-        query_config.model = self.model()
+        query_config.model = metadata.model
         query_config.expressions = self.expression_handler
+        query_config.plan_cache = self.plan_cache()
+        query_config.bind_params = metadata.bind_params
+        query_config.instrumentation = metadata.instrumentation
+        query_config.binding_name = self.__class__.__name__
+        query_config.limits = metadata.limits
+        query_config.indexes = metadata.indexes
         return query_config
@@ -1,7 +1,8 @@
 # -*- encoding: utf-8 -*-
 
 from .filters import DEFAULT_FILTERS
-from .util import DEFAULT_CONVERTERS
+from .instrumentation import NULL_INSTRUMENTATION, NULL_SPAN
+from .util import DEFAULT_CONVERTERS, ConverterRegistry
 
 
 class QueryConfig:
@@ -11,10 +12,27 @@ class QueryConfig:
         self.expressions = None
         self.session = None
         self._converters = None
+        self.converter_registry = None
         self.converters = None
         self._filters = None
         self.filters = None
         self.query = None
+        self.plan_cache = None
+        self.bind_params = False
+        self.dialect_name = None
+        self.binding_name = None
+        self.limits = None
+        self.indexes = None
+        self.instrumentation = NULL_INSTRUMENTATION
+
+    def span(self, stage, **tags):
+        if not self.instrumentation.enabled:
+            return NULL_SPAN
+        return self.instrumentation.span(
+            stage,
+            binding=self.binding_name,
+            **tags
+        )
 
     @property
     def converters(self):
@@ -25,6 +43,7 @@ class QueryConfig:
         if value is None:
             value = DEFAULT_CONVERTERS.copy()
         self._converters = value
+        self.converter_registry = None
 
     @property
     def filters(self):
@@ -34,6 +53,9 @@ class QueryConfig:
     def filters(self, value):
         if value is None:
             value = DEFAULT_FILTERS
+        if isinstance(value, dict):
+            self._filters = value
+            return
         self._filters = dict(
             (filter_obj.name, filter_obj)
             for filter_obj in value
@@ -43,4 +65,19 @@ class QueryConfig:
         if filter_name not in self._filters:
             raise KeyError('Filter %s not found' % filter_name)
         filter_cl = self._filters[filter_name]
-        return filter_cl(self.converters)
+        filter_obj = filter_cl(self.converters)
+        filter_obj.dialect_name = self.dialect_name
+        return filter_obj
+
+    @property
+    def converter_registry(self):
+        if self._converter_registry is None:
+            self._converter_registry = ConverterRegistry(self.converters)
+        return self._converter_registry
+
+    @converter_registry.setter
+    def converter_registry(self, value):
+        self._converter_registry = value
+
+    def converter_for(self, column_type):
+        return self.converter_registry.converter_for(column_type)
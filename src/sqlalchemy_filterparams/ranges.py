@@ -0,0 +1,160 @@
+# -*- encoding: utf-8 -*-
+
+from sqlalchemy import (
+    Date,
+    DateTime,
+    Float,
+    Integer,
+    Numeric,
+    Time,
+    and_,
+    bindparam,
+    false,
+)
+
+from .util import is_type
+
+
+ORDERED_TYPES = (Numeric, Integer, Float, Date, DateTime, Time)
+
+
+def is_ordered(expression):
+    column_type = getattr(expression, 'type', None)
+    return any(
+        is_type(column_type, type_cl)
+        for type_cl in ORDERED_TYPES
+    )
+
+
+class ValueRange:
+
+    def __init__(self):
+        self.lower = None
+        self.lower_inclusive = True
+        self.upper = None
+        self.upper_inclusive = True
+
+    @classmethod
+    def of(cls, bounds):
+        value_range = cls()
+        for bound, value in bounds:
+            if bound in ('eq', 'gt', 'gte'):
+                value_range.restrict_lower(value, bound != 'gt')
+            if bound in ('eq', 'lt', 'lte'):
+                value_range.restrict_upper(value, bound != 'lt')
+        return value_range
+
+    def restrict_lower(self, value, inclusive):
+        if (self.lower is None or value > self.lower or
+                (value == self.lower and not inclusive)):
+            self.lower = value
+            self.lower_inclusive = inclusive
+
+    def restrict_upper(self, value, inclusive):
+        if (self.upper is None or value < self.upper or
+                (value == self.upper and not inclusive)):
+            self.upper = value
+            self.upper_inclusive = inclusive
+
+    @property
+    def is_empty(self):
+        if self.lower is None or self.upper is None:
+            return False
+        return (
+            self.lower > self.upper or
+            (
+                self.lower == self.upper and
+                not (self.lower_inclusive and self.upper_inclusive)
+            )
+        )
+
+    @property
+    def is_point(self):
+        return (
+            self.lower is not None and
+            self.upper is not None and
+            self.lower == self.upper
+        )
+
+
+class RangeNode:
+    children = ()
+
+    def __init__(self, expression, terms, keys=None):
+        self.expression = expression
+        self.terms = tuple(terms)
+        self.keys = keys
+
+    def build(self, values, children, params):
+        bounds = [
+            (term.filter_obj.range_bound, term.convert(values))
+            for term in self.terms
+        ]
+        try:
+            value_range = ValueRange.of(bounds)
+            is_empty = value_range.is_empty
+        except TypeError:
+            return and_(*[
+                term.build(values, (), params)
+                for term in self.terms
+            ])
+
+        if is_empty:
+            return false()
+        return self._clause_for(value_range, params)
+
+    def _clause_for(self, value_range, params):
+        expression = self.expression
+        lower = self._value(0, value_range.lower, params)
+        if value_range.is_point:
+            return expression == lower
+
+        upper = self._value(1, value_range.upper, params)
+        if value_range.lower is None:
+            lower_clause = None
+        elif value_range.lower_inclusive:
+            lower_clause = expression >= lower
+        else:
+            lower_clause = expression > lower
+
+        if value_range.upper is None:
+            upper_clause = None
+        elif value_range.upper_inclusive:
+            upper_clause = expression <= upper
+        else:
+            upper_clause = expression < upper
+
+        if lower_clause is None:
+            return upper_clause
+        elif upper_clause is None:
+            return lower_clause
+        elif value_range.lower_inclusive and value_range.upper_inclusive:
+            return expression.between(lower, upper)
+        return and_(lower_clause, upper_clause)
+
+    def _value(self, index, value, params):
+        if self.keys is None or value is None:
+            return value
+        key = self.keys[index]
+        params[key] = value
+        return bindparam(key, type_=self.expression.type)
+
+
+def coalesce_ranges(children, range_keys_for=None):
+    groups = {}
+    for child in children:
+        if (getattr(child, 'range_bound', None) is not None and
+                is_ordered(child.expression)):
+            groups.setdefault(child.name, []).append(child)
+
+    result = []
+    for child in children:
+        group = groups.get(getattr(child, 'name', None), ())
+        if child not in group or len(group) < 2:
+            result.append(child)
+        elif child is group[0]:
+            keys = None
+            if range_keys_for is not None:
+                keys = range_keys_for(child)
+            result.append(RangeNode(child.expression, group, keys))
+    return result
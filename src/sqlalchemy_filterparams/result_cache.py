@@ -0,0 +1,365 @@
+# -*- encoding: utf-8 -*-
+
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+import uuid
+
+from collections import OrderedDict
+from threading import Lock
+
+from sqlalchemy import Table, event
+from sqlalchemy.orm import Session, object_mapper
+from sqlalchemy.orm.loading import merge_frozen_result
+from sqlalchemy.sql import visitors
+
+
+DEFAULT_RESULT_CACHE_SIZE = 1024
+
+EVICTION_SLACK = 0.1
+
+PENDING_TABLES = '_result_cache_tables'
+
+
+def tables_of(statement, compiled=None):
+    if compiled is None:
+        compiled = statement.compile()
+    statements = [statement]
+    compile_state = getattr(compiled, 'compile_state', None)
+    if compile_state is not None:
+        statements.append(compile_state.statement)
+    return frozenset(
+        element.fullname
+        for root in statements
+        for element in visitors.iterate(root)
+        if isinstance(element, Table)
+    )
+
+
+def key_of(compiled, bind=None):
+    data = '%s\n%s\n%r' % (
+        bind_identity_of(bind),
+        compiled.string,
+        sorted(compiled.params.items()),
+    )
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def bind_identity_of(bind):
+    engine = getattr(bind, 'engine', None)
+    if engine is None:
+        return ''
+    return engine.url.render_as_string(hide_password=False)
+
+
+def changed_tables_of(session):
+    return frozenset(
+        table.fullname
+        for instance in list(session.new) + list(session.dirty) + list(
+            session.deleted
+        )
+        for table in object_mapper(instance).tables
+    )
+
+
+def uncommitted_tables_of(session):
+    return changed_tables_of(session).union(
+        session.info.get(PENDING_TABLES, ())
+    )
+
+
+class CacheEntry:
+    __slots__ = ('expires_at', 'versions', 'value')
+
+    def __init__(self, expires_at, versions, value):
+        self.expires_at = expires_at
+        self.versions = versions
+        self.value = value
+
+
+class CacheLookup:
+    __slots__ = ('key', 'tables', 'items', 'session')
+
+    def __init__(self, key, tables, items, session=None):
+        self.key = key
+        self.tables = tables
+        self.items = items
+        self.session = session
+
+    @property
+    def cacheable(self):
+        return self.session is None or not (
+            self.tables & uncommitted_tables_of(self.session)
+        )
+
+    @property
+    def hit(self):
+        return self.items is not None
+
+
+class ResultCache:
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._versions = {}
+        self._lock = Lock()
+        self._listening = False
+
+    def get(self, key, tables):
+        entry = self._load(key)
+        if entry is not None and (
+            (entry.expires_at is not None and entry.expires_at < self.now()) or
+            entry.versions != self._versions_of(tables)
+        ):
+            self._delete(key)
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry.value
+
+    def put(self, key, tables, value):
+        expires_at = None
+        if self.ttl is not None:
+            expires_at = self.now() + self.ttl
+        self._store(key, CacheEntry(
+            expires_at,
+            self._versions_of(tables),
+            value,
+        ))
+        return value
+
+    def invalidate(self, *tables):
+        for table in tables:
+            self._bump(table)
+
+    def _versions_of(self, tables):
+        return tuple(
+            (table, self._version_of(table))
+            for table in sorted(tables)
+        )
+
+    def _version_of(self, table):
+        with self._lock:
+            return self._versions.get(table, 0)
+
+    def _bump(self, table):
+        with self._lock:
+            self._versions[table] = self._versions.get(table, 0) + 1
+
+    @staticmethod
+    def now():
+        return time.time()
+
+    def listen(self, target=Session):
+        if self._listening:
+            return
+        event.listen(target, 'after_flush', self._after_flush)
+        event.listen(target, 'after_commit', self._after_commit)
+        event.listen(
+            target,
+            'after_soft_rollback',
+            self._after_soft_rollback,
+        )
+        self._listening = True
+
+    def _after_flush(self, session, flush_context):
+        tables = changed_tables_of(session)
+        session.info.setdefault(PENDING_TABLES, set()).update(tables)
+        self.invalidate(*tables)
+
+    def _after_commit(self, session):
+        self.invalidate(*session.info.pop(PENDING_TABLES, ()))
+
+    @staticmethod
+    def _after_soft_rollback(session, previous_transaction):
+        if previous_transaction.parent is None:
+            session.info.pop(PENDING_TABLES, None)
+
+    @staticmethod
+    def items_of(result, scalars=True):
+        if scalars:
+            return result.scalars().all()
+        return result.all()
+
+    def lookup(self, session, statement, scalars=True):
+        self.listen()
+        bind = session.get_bind()
+        compiled = statement.compile(dialect=bind.dialect)
+        tables = tables_of(statement, compiled)
+        lookup = CacheLookup(key_of(compiled, bind), tables, None, session)
+        if not lookup.cacheable:
+            return lookup
+        frozen = self.get(lookup.key, tables)
+        if frozen is not None:
+            lookup.items = self.items_of(merge_frozen_result(
+                session,
+                statement,
+                frozen,
+                load=False,
+            )(), scalars)
+        return lookup
+
+    def store(self, lookup, result, scalars=True):
+        if not lookup.cacheable:
+            return self.items_of(result, scalars)
+        frozen = self.put(lookup.key, lookup.tables, result.freeze())
+        return self.items_of(frozen(), scalars)
+
+    def _load(self, key):
+        raise NotImplementedError()
+
+    def _store(self, key, entry):
+        raise NotImplementedError()
+
+    def _delete(self, key):
+        raise NotImplementedError()
+
+    def clear(self):
+        raise NotImplementedError()
+
+
+class LRUResultCache(ResultCache):
+
+    def __init__(self, maxsize=DEFAULT_RESULT_CACHE_SIZE, ttl=None):
+        super().__init__(ttl)
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _load(self, key):
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _store(self, key, entry):
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FileResultCache(ResultCache):
+    suffix = '.result'
+    version_suffix = '.version'
+
+    def __init__(self, directory, maxsize=DEFAULT_RESULT_CACHE_SIZE,
+                 ttl=None):
+        super().__init__(ttl)
+        self.directory = directory
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._size = None
+        os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self._paths())
+
+    def _path_of(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def _version_path_of(self, table):
+        return os.path.join(self.directory, table + self.version_suffix)
+
+    def _paths(self):
+        return [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(self.suffix)
+        ]
+
+    def _version_of(self, table):
+        try:
+            with open(self._version_path_of(table), 'r') as version_file:
+                return version_file.read()
+        except OSError:
+            return None
+
+    def _bump(self, table):
+        self._write(self._version_path_of(table), uuid.uuid4().hex.encode())
+
+    def _write(self, path, data):
+        handle, temp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(handle, 'wb') as target:
+            target.write(data)
+        os.replace(temp_path, path)
+
+    def _load(self, key):
+        try:
+            with open(self._path_of(key), 'rb') as cache_file:
+                entry = pickle.load(cache_file)
+            os.utime(self._path_of(key))
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        return entry
+
+    def _store(self, key, entry):
+        if not self.maxsize:
+            return
+        path = self._path_of(key)
+        is_new = not os.path.exists(path)
+        self._write(path, pickle.dumps(entry, pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            if self._size is None:
+                self._size = len(self._paths())
+            elif is_new:
+                self._size += 1
+            if self._size > self.maxsize:
+                self._evict()
+
+    def _evict(self):
+        paths = self._paths()
+        keep = self.maxsize - int(self.maxsize * EVICTION_SLACK)
+        if len(paths) > self.maxsize:
+            paths.sort(key=self._mtime_of)
+            for path in paths[:len(paths) - keep]:
+                self._remove(path)
+                self.evictions += 1
+            paths = paths[len(paths) - keep:]
+        self._size = len(paths)
+
+    @staticmethod
+    def _mtime_of(path):
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _delete(self, key):
+        self._remove(self._path_of(key))
+
+    def clear(self):
+        for path in self._paths():
+            self._remove(path)
+        with self._lock:
+            self._size = 0
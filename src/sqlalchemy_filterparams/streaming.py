@@ -0,0 +1,83 @@
+# -*- encoding: utf-8 -*-
+
+from itertools import islice
+
+from .pagination import KeysetPaginator
+from .util import is_empty
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+STREAM_STRATEGIES = ('cursor', 'keyset')
+
+
+def stream_strategy_of(sql_query):
+    session = getattr(sql_query, 'session', None)
+    try:
+        dialect = session.get_bind().dialect
+    except Exception:  # pylint: disable=broad-except
+        return 'keyset'
+    if dialect.supports_server_side_cursors:
+        return 'cursor'
+    return 'keyset'
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def capped(batches, row_cap):
+    remaining = row_cap
+    for batch in batches:
+        batch = batch[:remaining]
+        remaining -= len(batch)
+        yield batch
+        if remaining <= 0:
+            return
+
+
+class BatchStreamer:
+
+    def __init__(self, plan, model, dialect_name=None, row_cap=None):
+        self.plan = plan
+        self.model = model
+        self.dialect_name = dialect_name
+        self.row_cap = row_cap
+
+    def batches(self, sql_query, batch_size=DEFAULT_BATCH_SIZE,
+                strategy=None):
+        if batch_size < 1:
+            raise ValueError(
+                'The batch size must be positive, got %s' % batch_size
+            )
+        if strategy is None:
+            strategy = stream_strategy_of(sql_query)
+        if strategy not in STREAM_STRATEGIES:
+            raise ValueError(
+                'Unknown stream strategy %s. Supported are %s.' % (
+                    strategy,
+                    ', '.join(STREAM_STRATEGIES),
+                )
+            )
+        if is_empty(sql_query):
+            return iter(())
+        elif self.row_cap is not None:
+            batch_size = min(batch_size, self.row_cap)
+        if strategy == 'cursor':
+            if self.row_cap is not None:
+                sql_query = sql_query.limit(self.row_cap)
+            return chunked(sql_query.yield_per(batch_size), batch_size)
+        batches = KeysetPaginator(
+            self.plan,
+            self.model,
+            None,
+            self.dialect_name,
+        ).batches(sql_query, batch_size)
+        if self.row_cap is None:
+            return batches
+        return capped(batches, self.row_cap)
@@ -1,9 +1,11 @@
 # -*- encoding: utf-8 -*-
 
 import inspect
+import re
 
-from datetime import date, datetime
+from datetime import date, datetime, time, timezone
 from decimal import Decimal, InvalidOperation
+from functools import lru_cache, partial
 
 from dateutil.parser import parse
 from sqlalchemy import (
@@ -16,13 +18,22 @@ from sqlalchemy import (
 )
 
 
-def parse_date(date_string):
-    return parse_datetime(date_string).date()
+EMPTY_OPTION = 'filterparams_empty'
 
+DATE_CACHE_SIZE = 512
 
-def parse_datetime(dt_string):
+EPOCH_PATTERN = re.compile(r'^-?\d{10}(\.\d+)?$')
+
+
+def parse_date(date_string, strict=False):
+    if isinstance(date_string, str):
+        return _parse_string('date', date_string, strict)
+    return parse_datetime(date_string, strict).date()
+
+
+def parse_datetime(dt_string, strict=False):
     if isinstance(dt_string, str):
-        dt_string = parse(dt_string, fuzzy=False)
+        dt_string = _parse_string('datetime', dt_string, strict)
     if isinstance(dt_string, date) and not isinstance(dt_string, datetime):
         dt_string = datetime(
             dt_string.year, dt_string.month, dt_string.day
@@ -30,8 +41,76 @@ def parse_datetime(dt_string):
     return dt_string
 
 
-def parse_time(time_string):
-    return parse_datetime(time_string).time()
+def parse_time(time_string, strict=False):
+    if isinstance(time_string, str):
+        return _parse_string('time', time_string, strict)
+    return parse_datetime(time_string, strict).time()
+
+
+def _parse_string(kind, value, strict):
+    value = value.strip()
+    parsed = _parse_exact(kind, value)
+    if parsed is not None:
+        return parsed
+    elif strict:
+        raise ValueError(
+            '%s is neither an ISO 8601 value nor '
+            'an epoch timestamp' % value
+        )
+
+    parsed = parse(value, fuzzy=False)
+    if kind == 'date':
+        return parsed.date()
+    elif kind == 'time':
+        return parsed.time()
+    return parsed
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_exact(kind, value):
+    parsed = None
+    if kind == 'date':
+        parsed = _parse_iso(date, value)
+    elif kind == 'time':
+        parsed = _parse_iso(time, value)
+    if parsed is not None:
+        return parsed
+
+    parsed = _parse_iso_datetime(value)
+    if parsed is None:
+        return None
+    elif kind == 'date':
+        return parsed.date()
+    elif kind == 'time':
+        return parsed.time()
+    return parsed
+
+
+def _parse_iso(type_cl, value):
+    try:
+        return type_cl.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _parse_epoch(value):
+    try:
+        return datetime.fromtimestamp(
+            float(value),
+            timezone.utc,
+        ).replace(tzinfo=None)
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def _parse_iso_datetime(value):
+    if EPOCH_PATTERN.match(value):
+        parsed = _parse_epoch(value)
+        if parsed is not None:
+            return parsed
+    if value.endswith(('Z', 'z')):
+        value = value[:-1] + '+00:00'
+    return _parse_iso(datetime, value)
 
 
 def parse_decimal(decimal_string):
@@ -50,6 +129,13 @@ DEFAULT_CONVERTERS = {
     Time: parse_time,
 }
 
+STRICT_CONVERTERS = dict(DEFAULT_CONVERTERS)
+STRICT_CONVERTERS.update({
+    Date: partial(parse_date, strict=True),
+    DateTime: partial(parse_datetime, strict=True),
+    Time: partial(parse_time, strict=True),
+})
+
 
 def is_type(column_type, to_check_type):
     return (
@@ -63,10 +149,80 @@ def is_type(column_type, to_check_type):
     )
 
 
+class ConverterRegistry:
+
+    def __init__(self, conversion_dict=None):
+        self.conversion_dict = conversion_dict or DEFAULT_CONVERTERS
+        self._cache = {}
+
+    def converter_for(self, column_type):
+        if inspect.isclass(column_type):
+            type_cl = column_type
+        else:
+            type_cl = type(column_type)
+
+        try:
+            return self._cache[type_cl]
+        except KeyError:
+            converter = self._lookup(column_type, type_cl)
+            self._cache[type_cl] = converter
+            return converter
+
+    def _lookup(self, column_type, type_cl):
+        for base_cl in type_cl.__mro__:
+            if base_cl in self.conversion_dict:
+                return self.conversion_dict[base_cl]
+
+        for type_key, converter in self.conversion_dict.items():
+            if is_type(column_type, type_key):
+                return converter
+        return None
+
+    def convert(self, value, column_type):
+        converter = self.converter_for(column_type)
+        if converter is None:
+            return value
+        return converter(value)
+
+    def convert_all(self, values, column_type):
+        converter = self.converter_for(column_type)
+        if converter is None:
+            return list(values)
+        return [converter(value) for value in values]
+
+
+DEFAULT_REGISTRY = ConverterRegistry(DEFAULT_CONVERTERS)
+
+
+def registry_for(conversion_dict=None):
+    if isinstance(conversion_dict, ConverterRegistry):
+        return conversion_dict
+    elif not conversion_dict or conversion_dict is DEFAULT_CONVERTERS:
+        return DEFAULT_REGISTRY
+    return ConverterRegistry(conversion_dict)
+
+
+def converter_for(column_type, conversion_dict=None):
+    return registry_for(conversion_dict).converter_for(column_type)
+
+
 def convert(value, column_type, conversion_dict=None):
-    conversion_dict = conversion_dict or DEFAULT_CONVERTERS
+    return registry_for(conversion_dict).convert(value, column_type)
+
+
+def dialect_name_of(sql_query):
+    session = getattr(sql_query, 'session', None)
+    if session is None:
+        return None
+    try:
+        return session.get_bind().dialect.name
+    except Exception:  # pylint: disable=broad-except
+        return None
+
+
+def mark_empty(sql_query):
+    return sql_query.execution_options(**{EMPTY_OPTION: True})
+
 
-    for type_cl, converter in conversion_dict.items():
-        if is_type(column_type, type_cl):
-            return converter(value)
-    return value
+def is_empty(sql_query):
+    return bool(sql_query.get_execution_options().get(EMPTY_OPTION, False))
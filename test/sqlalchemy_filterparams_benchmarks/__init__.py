@@ -0,0 +1 @@
+# -*- encoding: utf-8 -*-
@@ -0,0 +1,93 @@
+# -*- encoding: utf-8 -*-
+
+import argparse
+import os
+import sys
+
+from collections import OrderedDict
+
+from .cases import BenchmarkBinding, Case, scenarios
+from .runner import (
+    DEFAULT_ITERATIONS,
+    DEFAULT_MEMORY_TOLERANCE,
+    DEFAULT_TOLERANCE,
+    DEFAULT_WARMUP,
+    compare,
+    load_baseline,
+    run,
+    save_baseline,
+)
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='sqlalchemy_filterparams_benchmarks',
+        description='Measures the parse, plan, evaluate and compile '
+                    'stages of sqlalchemy-filterparams.',
+    )
+    parser.add_argument('-k', dest='selection', default=None,
+                        help='only run benchmarks containing this string')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='allowed slowdown relative to the baseline')
+    parser.add_argument('--memory-tolerance', type=float,
+                        default=DEFAULT_MEMORY_TOLERANCE,
+                        help='allowed growth of the peak allocations')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store the results as the new baseline')
+    return parser.parse_args(argv)
+
+
+def report(name, measurement):
+    print('%-32s best %9.1fus  p50 %9.1fus  p99 %9.1fus  '
+          'peak %8.1fKiB' % (
+              name,
+              measurement.best,
+              measurement.p50,
+              measurement.p99,
+              measurement.peak_kb,
+          ))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cases = OrderedDict(
+        (name, Case(BenchmarkBinding(), params))
+        for name, params in scenarios().items()
+    )
+    results = run(
+        cases,
+        iterations=args.iterations,
+        warmup=args.warmup,
+        selection=args.selection,
+        report=report,
+    )
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print('Stored baseline in %s' % args.baseline)
+        return 0
+    if not os.path.exists(args.baseline):
+        print('No baseline found at %s' % args.baseline)
+        return 0
+
+    regressions = compare(
+        results,
+        load_baseline(args.baseline),
+        args.tolerance,
+        args.memory_tolerance,
+    )
+    for name, field, expected, value in regressions:
+        print('REGRESSION %s %s: %.1f -> %.1f' % (
+            name, field, expected, value,
+        ))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
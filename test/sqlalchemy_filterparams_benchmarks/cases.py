@@ -0,0 +1,149 @@
+# -*- encoding: utf-8 -*-
+
+from collections import OrderedDict
+
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import sessionmaker
+
+from sqlalchemy_filterparams.evaluation import Evaluation
+from sqlalchemy_filterparams.query_binding_configuration import (
+    QueryBindingConfiguration
+)
+
+from sqlalchemy_filterparams_tests.models import Domain, User
+
+
+DIALECTS = OrderedDict([
+    ('sqlite', sqlite.dialect()),
+    ('postgresql', postgresql.dialect()),
+    ('mysql', mysql.dialect()),
+])
+
+TREE_SIZES = (1, 10, 50, 100)
+JOIN_DEPTHS = (0, 1, 2)
+IN_LENGTHS = (10, 100, 1000, 5000)
+SORT_KEY_COUNTS = (1, 2, 4)
+
+JOIN_PARAMS = ('name', 'mail', 'domain')
+SORT_PARAMS = ('name', 'fullname', 'created_at', 'birth_date')
+
+Session = sessionmaker()
+
+
+class BenchmarkBinding(QueryBindingConfiguration):
+    __config__ = {
+        'for': User,
+        'binding': {
+            'id': User.id,
+            'name': User.name,
+            'fullname': User.fullname,
+            'birth_date': User.date_of_birth,
+            'created_at': User.created_at,
+            'mail': {
+                'param': 'mail',
+                'join': 'email',
+            },
+            'domain': {
+                'param': Domain.domain,
+                'join': ('email', 'domain'),
+            },
+        },
+    }
+
+
+def filter_tree_params(size):
+    params = {}
+    binding = []
+    for index in range(size):
+        alias = 'n%d' % index
+        params['filter[param][name][like][%s]' % alias] = 'user%d%%' % index
+        if binding:
+            binding.append('&' if index % 2 else '|')
+        binding.append(alias)
+    params['filter[binding]'] = ''.join(binding)
+    return params
+
+
+def join_depth_params(depth):
+    name = JOIN_PARAMS[depth]
+    return {
+        'filter[param][%s][eq]' % name: 'value',
+    }
+
+
+def in_list_params(length):
+    return {
+        'filter[param][id][in]': ','.join(
+            str(index) for index in range(length)
+        ),
+    }
+
+
+def sort_key_params(count):
+    return {
+        'filter[param][name][like]': 'user%',
+        'filter[order]': [
+            'desc(%s)' % name if index % 2 else name
+            for index, name in enumerate(SORT_PARAMS[:count])
+        ],
+    }
+
+
+def scenarios():
+    result = OrderedDict()
+    for size in TREE_SIZES:
+        result['tree[%d]' % size] = filter_tree_params(size)
+    for depth in JOIN_DEPTHS:
+        result['joins[%d]' % depth] = join_depth_params(depth)
+    for length in IN_LENGTHS:
+        result['in[%d]' % length] = in_list_params(length)
+    for count in SORT_KEY_COUNTS:
+        result['sort[%d]' % count] = sort_key_params(count)
+    return result
+
+
+class Case:
+
+    def __init__(self, binding, params):
+        self.binding = binding
+        self.params = params
+        self.session = Session()
+        self.query = binding.parse(params)
+
+    def parse(self):
+        return self.binding.parse(self.params)
+
+    def evaluate(self, dialect_name, plan_cache=True):
+        query_config = self.binding.config_with(self.query)
+        query_config.dialect_name = dialect_name
+        if not plan_cache:
+            query_config.plan_cache = None
+        return Evaluation(query_config).evaluate(
+            self.session.query(User)
+        )
+
+    def stages(self):
+        stages = OrderedDict()
+        stages['parse'] = self.parse
+        for dialect_name, dialect in DIALECTS.items():
+            stages['plan[%s]' % dialect_name] = self._plan_stage(
+                dialect_name
+            )
+            stages['evaluate[%s]' % dialect_name] = self._evaluate_stage(
+                dialect_name
+            )
+            stages['compile[%s]' % dialect_name] = self._compile_stage(
+                dialect_name,
+                dialect,
+            )
+        return stages
+
+    def _plan_stage(self, dialect_name):
+        return lambda: self.evaluate(dialect_name, plan_cache=False)
+
+    def _evaluate_stage(self, dialect_name):
+        return lambda: self.evaluate(dialect_name)
+
+    def _compile_stage(self, dialect_name, dialect):
+        statement = self.evaluate(dialect_name).statement
+        return lambda: statement.compile(dialect=dialect)
@@ -0,0 +1,134 @@
+# -*- encoding: utf-8 -*-
+
+import gc
+import json
+import time
+import tracemalloc
+
+from collections import OrderedDict, namedtuple
+
+
+Measurement = namedtuple('Measurement', ['best', 'p50', 'p99', 'peak_kb'])
+
+DEFAULT_ITERATIONS = 200
+DEFAULT_WARMUP = 10
+DEFAULT_TOLERANCE = 1.0
+DEFAULT_MEMORY_TOLERANCE = 0.2
+DEFAULT_MEMORY_RUNS = 5
+CALIBRATION = '_calibration'
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = int(round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def peak_memory(func, runs=DEFAULT_MEMORY_RUNS):
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(runs):
+            baseline, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(max(peak - baseline, 0))
+    finally:
+        tracemalloc.stop()
+    return min(peaks) / 1024.0
+
+
+def measure(func, iterations=DEFAULT_ITERATIONS, warmup=DEFAULT_WARMUP,
+            memory_runs=DEFAULT_MEMORY_RUNS):
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - start) * 1e6)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return Measurement(
+        min(samples),
+        percentile(samples, 0.5),
+        percentile(samples, 0.99),
+        peak_memory(func, memory_runs),
+    )
+
+
+def calibration_workload():
+    data = dict((str(index), index) for index in range(2000))
+    return sorted(data.items(), key=lambda item: -item[1])
+
+
+def run(cases, iterations=DEFAULT_ITERATIONS, warmup=DEFAULT_WARMUP,
+        selection=None, report=None):
+    results = OrderedDict()
+    results[CALIBRATION] = measure(calibration_workload, iterations, warmup)
+    for case_name, case in cases.items():
+        for stage_name, func in case.stages().items():
+            name = '%s %s' % (case_name, stage_name)
+            if selection and selection not in name:
+                continue
+            results[name] = measure(func, iterations, warmup)
+            if report is not None:
+                report(name, results[name])
+    return results
+
+
+def load_baseline(path):
+    with open(path, 'r') as baseline_file:
+        data = json.load(baseline_file)
+    return OrderedDict(
+        (name, Measurement(**values))
+        for name, values in data.items()
+    )
+
+
+def save_baseline(path, results):
+    with open(path, 'w') as baseline_file:
+        json.dump(
+            OrderedDict(
+                (name, OrderedDict(
+                    (field, round(value, 1))
+                    for field, value in measurement._asdict().items()
+                ))
+                for name, measurement in results.items()
+            ),
+            baseline_file,
+            indent=2,
+        )
+        baseline_file.write('\n')
+
+
+def speed_factor(results, baseline):
+    if CALIBRATION not in results or CALIBRATION not in baseline:
+        return 1.0
+    return results[CALIBRATION].best / baseline[CALIBRATION].best
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE,
+            memory_tolerance=DEFAULT_MEMORY_TOLERANCE):
+    regressions = []
+    limits = (
+        ('best', speed_factor(results, baseline), tolerance),
+        ('peak_kb', 1.0, memory_tolerance),
+    )
+    for name, measurement in results.items():
+        reference = baseline.get(name, None)
+        if reference is None or name == CALIBRATION:
+            continue
+        for field, factor, field_tolerance in limits:
+            expected = getattr(reference, field) * factor
+            value = getattr(measurement, field)
+            if value > expected * (1 + field_tolerance):
+                regressions.append((name, field, expected, value))
+    return regressions
@@ -0,0 +1,251 @@
+# -*- encoding: utf-8 -*-
+
+import asyncio
+
+from datetime import datetime
+from unittest import TestCase, skipIf
+
+from expects import *
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from sqlalchemy_filterparams import AsyncQueryBinding
+from sqlalchemy_filterparams.result_cache import LRUResultCache
+
+from sqlalchemy_filterparams_tests.models import Base, EMail, User
+
+try:
+    import aiosqlite
+except ImportError:  # pragma: no cover
+    aiosqlite = None
+
+
+@skipIf(aiosqlite is None, 'aiosqlite is not installed')
+class AsyncQueryBindingTest(TestCase):
+
+    def setUp(self):
+        self.engine = create_async_engine('sqlite+aiosqlite://')
+        self.Session = async_sessionmaker(
+            self.engine,
+            expire_on_commit=False,
+        )
+
+        class UserBinding(AsyncQueryBinding):
+            __config__ = {
+                'for': User,
+                'sessionmaker': self.Session,
+                'cursor_secret': 'secret',
+                'binding': {
+                    'name': 'name',
+                    'created_at': 'created_at',
+                    'mail': {
+                        'param': 'mail',
+                        'join': 'email',
+                    },
+                },
+            }
+
+        self.binding_cl = UserBinding
+        self.run_async(self._populate())
+
+    def tearDown(self):
+        self.run_async(self.engine.dispose())
+
+    @staticmethod
+    def run_async(coroutine):
+        return asyncio.run(coroutine)
+
+    async def _populate(self):
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with self.Session() as session:
+            for index in range(5):
+                session.add(User(
+                    name='user%d' % index,
+                    created_at=datetime(2016, 1, index + 1),
+                    email=EMail(mail='user%d@example.com' % index),
+                ))
+            await session.commit()
+
+    def test_evaluate_builds_select(self):
+        statement = self.binding_cl().evaluate_params({
+            'filter[param][name][eq]': 'user1',
+        })
+        expect(str(statement)).to(start_with('SELECT'))
+        expect(statement.is_select).to(be_true)
+
+    def test_fetch(self):
+        users = self.run_async(self.binding_cl().fetch_params({
+            'filter[param][mail][like]': '%1@%',
+        }))
+        expect([user.name for user in users]).to(equal(['user1']))
+
+    def test_fetch_rows(self):
+        rows = self.run_async(self.binding_cl().fetch_rows_params({
+            'fields': 'name',
+            'filter[param][created_at][gte]': '2016-01-04',
+            'filter[order]': 'name',
+        }))
+        expect([tuple(row) for row in rows]).to(
+            equal([('user3',), ('user4',)]))
+
+    def test_fetch_ordered(self):
+        users = self.run_async(self.binding_cl().fetch_params({
+            'filter[order]': 'desc(created_at)',
+        }))
+        expect([user.name for user in users]).to(equal([
+            'user4', 'user3', 'user2', 'user1', 'user0',
+        ]))
+
+    def test_fetch_empty_does_not_execute(self):
+        users = self.run_async(self.binding_cl().fetch_params({
+            'filter[param][created_at][gt][a]': '2016-01-05',
+            'filter[param][created_at][lt][b]': '2016-01-01',
+            'filter[binding]': 'a&b',
+        }))
+        expect(users).to(equal([]))
+
+    def test_stream(self):
+        async def collect():
+            return [
+                user.name
+                async for user in self.binding_cl().stream_params({
+                    'filter[param][name][like]': 'user%',
+                    'filter[order]': 'name',
+                })
+            ]
+
+        expect(self.run_async(collect())).to(equal([
+            'user0', 'user1', 'user2', 'user3', 'user4',
+        ]))
+
+    def test_stream_batches(self):
+        async def collect():
+            return [
+                [user.name for user in batch]
+                async for batch in self.binding_cl().stream_batches_params({
+                    'filter[order]': 'name',
+                }, batch_size=2)
+            ]
+
+        expect(self.run_async(collect())).to(equal([
+            ['user0', 'user1'], ['user2', 'user3'], ['user4'],
+        ]))
+
+    def test_count(self):
+        count = self.run_async(self.binding_cl().count_params({
+            'filter[param][created_at][gte]': '2016-01-03',
+            'filter[order]': 'name',
+        }))
+        expect(count).to(equal(3))
+
+    def test_paginate(self):
+        params = {'filter[order]': 'name'}
+
+        async def pages():
+            binding = self.binding_cl()
+            first = await binding.paginate_params(params, limit=3)
+            second = await binding.paginate_params(
+                params,
+                limit=3,
+                cursor=first.next_cursor,
+            )
+            return first, second
+
+        first, second = self.run_async(pages())
+        expect([user.name for user in first]).to(equal([
+            'user0', 'user1', 'user2',
+        ]))
+        expect(first.has_next).to(be_true)
+        expect([user.name for user in second]).to(equal(['user3', 'user4']))
+        expect(second.has_next).to(be_false)
+
+    def test_paginate_limit_must_be_positive(self):
+        expect(lambda: self.run_async(self.binding_cl().paginate_params(
+            {'filter[order]': 'name'},
+            limit=0,
+        ))).to(raise_error(ValueError))
+
+    def test_bound_params(self):
+        self.binding_cl.__config__['bind_params'] = True
+        self.binding_cl.reset_metadata()
+        users = self.run_async(self.binding_cl().fetch_params({
+            'filter[param][name][eq]': 'user2',
+        }))
+        expect([user.name for user in users]).to(equal(['user2']))
+
+    def test_batch(self):
+        results = self.run_async(self.binding_cl().batch_params([
+            {'filter[param][name][in]': 'user1,user3', 'filter[order]': 'name'},
+            {'filter[order]': 'desc(created_at)'},
+        ], limit=2))
+        expect([[user.name for user in result] for result in results]).to(
+            equal([['user1', 'user3'], ['user4', 'user3']]))
+
+    def test_result_cache(self):
+        result_cache = LRUResultCache()
+        self.binding_cl.__config__['result_cache'] = result_cache
+        self.binding_cl.reset_metadata()
+        params = {'filter[param][name][eq]': 'user2'}
+
+        async def fetch_twice():
+            async with self.Session() as session:
+                binding = self.binding_cl(session)
+                first = await binding.fetch_params(params)
+                second = await binding.fetch_params(params)
+                return first, second
+
+        try:
+            first, second = self.run_async(fetch_twice())
+        finally:
+            del self.binding_cl.__config__['result_cache']
+            self.binding_cl.reset_metadata()
+        expect([user.name for user in second]).to(equal(['user2']))
+        expect(second[0]).to(be(first[0]))
+        expect(result_cache.hits).to(equal(1))
+
+    def test_cap_rows(self):
+        self.binding_cl.__config__['limits'] = {
+            'max_sort_keys': 0,
+            'action': 'cap',
+            'max_rows': 2,
+        }
+        self.binding_cl.reset_metadata()
+        params = {'filter[order]': 'name'}
+
+        async def collect():
+            binding = self.binding_cl()
+            fetched = await binding.fetch_params(params)
+            rows = await binding.fetch_rows_params(dict(params, fields='name'))
+            first = await binding.paginate_params(params, limit=3)
+            second = await binding.paginate_params(
+                params,
+                limit=3,
+                cursor=first.next_cursor,
+            )
+            batches = [
+                batch
+                async for batch in binding.stream_batches_params(params, 3)
+            ]
+            results = await binding.batch_params([params], limit=3)
+            return fetched, rows, [first, second], batches, results
+
+        try:
+            fetched, rows, pages, batches, results = self.run_async(
+                collect()
+            )
+        finally:
+            del self.binding_cl.__config__['limits']
+            self.binding_cl.reset_metadata()
+        expect([user.name for user in fetched]).to(equal(['user0', 'user1']))
+        expect([tuple(row) for row in rows]).to(
+            equal([('user0',), ('user1',)]))
+        expect([[user.name for user in page] for page in pages]).to(
+            equal([['user0', 'user1'], ['user2', 'user3']]))
+        expect([[user.name for user in batch] for batch in batches]).to(
+            equal([['user0', 'user1']]))
+        expect([[user.name for user in result] for result in results]).to(
+            equal([['user0', 'user1']]))
+
+    def test_dialect_from_session(self):
+        expect(self.binding_cl().dialect_name).to(equal('sqlite'))
@@ -0,0 +1,108 @@
+# -*- encoding: utf-8 -*-
+
+from datetime import datetime
+
+from expects import *
+
+from sqlalchemy import event
+
+from sqlalchemy_filterparams.batch import BatchQuery
+from sqlalchemy_filterparams.query_binding_configuration import (
+    QueryBindingConfiguration
+)
+
+from sqlalchemy_filterparams_tests.database_test import BaseDatabaseTest
+from sqlalchemy_filterparams_tests.models import EMail, User
+
+
+def test_invalid_limit():
+    expect(lambda: BatchQuery(User, 0)).to(raise_error(ValueError))
+
+
+class BatchTest(BaseDatabaseTest):
+
+    def setUp(self):
+        super().setUp()
+        for index, name in enumerate(['a', 'b', 'c', 'd', 'e']):
+            self.session.add(User(
+                name=name,
+                fullname='group%d' % (index % 2),
+                created_at=datetime(2016, 1, 10 - index),
+                email=EMail(mail='%s@example.com' % name),
+            ))
+        self.session.commit()
+
+        class UserBinding(QueryBindingConfiguration):
+            __config__ = {
+                'for': User,
+                'bind_params': True,
+                'binding': {
+                    'name': 'name',
+                    'fullname': 'fullname',
+                    'created_at': 'created_at',
+                    'mail': {
+                        'param': 'mail',
+                        'join': 'email',
+                    },
+                },
+            }
+
+        self.binding = UserBinding(self.session)
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+
+    def tearDown(self):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+        self.session.rollback()
+        self.session.expunge_all()
+        super().tearDown()
+
+    def _record(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def names(self, results):
+        return [[user.name for user in result] for result in results]
+
+    def test_one_round_trip(self):
+        params_list = [
+            {'filter[param][fullname][eq]': 'group0', 'filter[order]': 'name'},
+            {'filter[param][name][in]': 'b,d', 'filter[order]': 'desc(name)'},
+            {'filter[param][mail][like]': 'c%'},
+            {'filter[order]': 'created_at'},
+        ]
+        results = self.binding.batch_params(params_list)
+        expect(self.statements).to(have_len(1))
+        expect(self.statements[0]).to(contain('UNION ALL'))
+        expect(self.names(results)).to(equal([
+            ['a', 'c', 'e'],
+            ['d', 'b'],
+            ['c'],
+            ['e', 'd', 'c', 'b', 'a'],
+        ]))
+        expect(self.names(results)).to(equal([
+            [user.name for user in self.binding.fetch_params(params)]
+            for params in params_list
+        ]))
+
+    def test_top_k(self):
+        results = self.binding.batch_params([
+            {'filter[order]': 'desc(created_at)'},
+            {'filter[param][fullname][eq]': 'group1', 'filter[order]': 'name'},
+            {'filter[order]': 'mail'},
+        ], limit=1)
+        expect(self.names(results)).to(equal([['a'], ['b'], ['a']]))
+
+    def test_empty_parts(self):
+        empty = {
+            'filter[param][created_at][gt][a]': '2016-01-05',
+            'filter[param][created_at][lt][b]': '2016-01-01',
+            'filter[binding]': 'a&b',
+        }
+        results = self.binding.batch_params([empty, {
+            'filter[param][name][eq]': 'e',
+        }])
+        expect(self.names(results)).to(equal([[], ['e']]))
+
+        results = self.binding.batch_params([empty, empty])
+        expect(results).to(equal([[], []]))
+        expect(self.statements).to(have_len(1))
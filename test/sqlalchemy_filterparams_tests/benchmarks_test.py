@@ -0,0 +1,84 @@
+# -*- encoding: utf-8 -*-
+
+from collections import OrderedDict
+
+from expects import *
+
+from sqlalchemy_filterparams_benchmarks.cases import (
+    BenchmarkBinding,
+    Case,
+    scenarios,
+)
+from sqlalchemy_filterparams_benchmarks.runner import (
+    CALIBRATION,
+    Measurement,
+    compare,
+    measure,
+    peak_memory,
+    percentile,
+    run,
+)
+
+
+def test_percentile():
+    samples = list(range(1, 101))
+    expect(percentile(samples, 0.5)).to(equal(51))
+    expect(percentile(samples, 0.99)).to(equal(99))
+
+
+def test_measure():
+    measurement = measure(lambda: [0] * 1000, iterations=5, warmup=1)
+    expect(measurement.best).to(be_above(0))
+    expect(measurement.p99).to(be_above_or_equal(measurement.p50))
+    expect(measurement.peak_kb).to(be_above(0))
+
+
+def test_peak_memory_ignores_warmup():
+    cache = []
+
+    def func():
+        if not cache:
+            cache.append([0] * 100000)
+        return [0] * 10
+
+    expect(peak_memory(func, runs=3)).to(be_below(10))
+
+
+def test_scenarios_cover_every_dimension():
+    names = list(scenarios())
+    for prefix in ('tree[', 'joins[', 'in[', 'sort['):
+        expect(any(name.startswith(prefix) for name in names)).to(be_true)
+
+
+def test_run_all_stages():
+    cases = OrderedDict([
+        ('joins[2]', Case(BenchmarkBinding(), scenarios()['joins[2]'])),
+    ])
+    results = run(cases, iterations=2, warmup=1)
+    expect(results).to(have_keys(
+        CALIBRATION,
+        'joins[2] parse',
+        'joins[2] plan[postgresql]',
+        'joins[2] evaluate[mysql]',
+        'joins[2] compile[sqlite]',
+    ))
+
+
+def test_compare_scales_by_calibration():
+    baseline = {
+        CALIBRATION: Measurement(10.0, 10.0, 10.0, 1.0),
+        'case': Measurement(100.0, 100.0, 100.0, 10.0),
+    }
+    slower_machine = {
+        CALIBRATION: Measurement(20.0, 20.0, 20.0, 1.0),
+        'case': Measurement(350.0, 350.0, 350.0, 10.0),
+    }
+    expect(compare(slower_machine, baseline)).to(be_empty)
+
+    regression = {
+        CALIBRATION: Measurement(10.0, 10.0, 10.0, 1.0),
+        'case': Measurement(250.0, 250.0, 250.0, 30.0),
+    }
+    expect(
+        [(name, field) for name, field, _, _ in compare(regression, baseline)]
+    ).to(contain(('case', 'best'), ('case', 'peak_kb')))
@@ -0,0 +1,167 @@
+# -*- encoding: utf-8 -*-
+
+from datetime import date, datetime
+from unittest import skipIf
+
+from expects import *
+
+from sqlalchemy_filterparams.columnar import numpy
+from sqlalchemy_filterparams.query_binding_configuration import (
+    QueryBindingConfiguration
+)
+
+from sqlalchemy_filterparams_tests.database_test import BaseDatabaseTest
+from sqlalchemy_filterparams_tests.models import EMail, User
+
+
+USERS = [
+    ('alice', 'Alice A', date(1985, 10, 26), datetime(2016, 1, 1), 'a@x.com'),
+    ('bob', 'Bob_B', date(1990, 1, 1), datetime(2016, 1, 3), 'b@y.org'),
+    ('carol', None, date(1975, 5, 5), datetime(2016, 1, 2), 'c@x.com'),
+    ('dave', 'Dave D', None, None, 'd@y.org'),
+    ('erin', 'Erin E', date(1990, 1, 1), datetime(2016, 1, 2), 'e@x.com'),
+]
+
+
+@skipIf(numpy is None, 'numpy is not installed')
+class ColumnarEvaluationTest(BaseDatabaseTest):
+
+    def setUp(self):
+        super().setUp()
+        for name, fullname, birth_date, created_at, mail in USERS:
+            self.session.add(User(
+                name=name,
+                fullname=fullname,
+                date_of_birth=birth_date,
+                created_at=created_at,
+                email=EMail(mail=mail),
+            ))
+        self.session.commit()
+
+        class UserBinding(QueryBindingConfiguration):
+            __config__ = {
+                'for': User,
+                'binding': {
+                    'id': 'id',
+                    'name': 'name',
+                    'fullname': 'fullname',
+                    'birth_date': 'date_of_birth',
+                    'created_at': 'created_at',
+                    'mail': {
+                        'param': 'mail',
+                        'join': 'email',
+                    },
+                },
+            }
+
+        self.binding = UserBinding(self.session)
+        self.columns = {
+            'id': numpy.arange(1, len(USERS) + 1),
+            'name': numpy.array([user[0] for user in USERS]),
+            'fullname': numpy.array(
+                [user[1] for user in USERS],
+                dtype=object,
+            ),
+            'birth_date': numpy.array(
+                [user[2] for user in USERS],
+                dtype='datetime64[D]',
+            ),
+            'created_at': numpy.array(
+                [user[3] for user in USERS],
+                dtype='datetime64[s]',
+            ),
+            'mail': [user[4] for user in USERS],
+        }
+
+    def tearDown(self):
+        self.session.rollback()
+        self.session.expunge_all()
+        super().tearDown()
+
+    def ids(self, params):
+        return list(
+            self.binding.evaluate_columns_params(self.columns, params)['id']
+        )
+
+    def expect_same(self, params):
+        expected = [user.id for user in self.binding.fetch_params(params)]
+        actual = self.ids(params)
+        if 'filter[order]' not in params:
+            expected.sort()
+            actual.sort()
+        expect(actual).to(equal(expected))
+
+    def test_matches_sql(self):
+        for params in [
+            {},
+            {'filter[param][name][eq]': 'bob'},
+            {'filter[param][fullname][neq]': 'Dave D'},
+            {'filter[param][birth_date][gte]': '1980-01-01'},
+            {'filter[param][birth_date][lt]': '1990-01-01'},
+            {'filter[param][created_at][lte]': '2016-01-02T00:00:00'},
+            {'filter[param][created_at][gt]': '2016-01-01'},
+            {'filter[param][name][in]': 'alice,dave,zoe'},
+            {'filter[param][name][nin]': 'alice,dave'},
+            {'filter[param][fullname][like]': '%e%'},
+            {'filter[param][fullname][ilike]': 'alice%'},
+            {'filter[param][mail][like]': '%@x.com'},
+            {'filter[param][fullname][prefix]': 'Bob'},
+            {'filter[param][fullname][ieq]': 'ALICE A'},
+            {'filter[param][name][ilike]': 'BOB'},
+            {'filter[param][name][prefix]': 'da'},
+            {
+                'filter[param][name][eq][a]': 'dave',
+                'filter[param][birth_date][eq][b]': '1990-01-01',
+                'filter[binding]': 'a|b',
+            },
+            {
+                'filter[param][fullname][like][a]': 'Dave%',
+                'filter[binding]': '!a',
+            },
+            {
+                'filter[param][birth_date][gt][a]': '1980-01-01',
+                'filter[param][name][eq][b]': 'carol',
+                'filter[binding]': '!(a|b)',
+            },
+        ]:
+            self.expect_same(params)
+
+    def test_order_matches_sql(self):
+        for order in [
+            'name',
+            'desc(created_at)',
+            ['birth_date', 'desc(name)'],
+            ['desc(fullname)'],
+        ]:
+            self.expect_same({'filter[order]': order})
+
+    def test_filtered_columns(self):
+        result = self.binding.evaluate_columns_params(self.columns, {
+            'filter[param][birth_date][eq]': '1990-01-01',
+            'filter[order]': 'desc(name)',
+        })
+        expect(list(result['name'])).to(equal(['erin', 'bob']))
+        expect(list(result['mail'])).to(equal(['e@x.com', 'b@y.org']))
+
+    def test_masked_arrays(self):
+        self.columns['score'] = numpy.ma.masked_array(
+            [3, 1, 2, 5, 4],
+            mask=[False, False, True, False, False],
+        )
+        self.binding.__config__['binding']['score'] = 'id'
+        self.binding.__class__.reset_metadata()
+        try:
+            ids = self.ids({
+                'filter[param][score][gt][a]': '2',
+                'filter[binding]': '!a',
+                'filter[order]': 'desc(score)',
+            })
+        finally:
+            del self.binding.__config__['binding']['score']
+            self.binding.__class__.reset_metadata()
+        expect(ids).to(equal([2]))
+
+    def test_missing_column(self):
+        del self.columns['name']
+        expect(lambda: self.ids({'filter[param][name][eq]': 'bob'})).to(
+            raise_error(KeyError))
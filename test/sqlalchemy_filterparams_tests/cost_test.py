@@ -0,0 +1,219 @@
+# -*- encoding: utf-8 -*-
+
+from datetime import datetime
+
+from expects import *
+
+from sqlalchemy_filterparams.cost import (
+    CostLimits,
+    QueryCost,
+    QueryTooComplexError,
+    cost_of,
+)
+from sqlalchemy_filterparams.instrumentation import Aggregator
+from sqlalchemy_filterparams.query_binding_configuration import (
+    QueryBindingConfiguration
+)
+
+from sqlalchemy_filterparams_tests.database_test import BaseDatabaseTest
+from sqlalchemy_filterparams_tests.models import Domain, EMail, User
+
+
+def test_score_uses_weights():
+    cost = QueryCost(predicates=3, depth=2, joins=1, sort_keys=1)
+    expect(cost.score).to(equal(3 + 2 + 10 + 2))
+    cost.weights = {'joins': 1}
+    expect(cost.score).to(equal(1))
+
+
+def test_limits_validation():
+    expect(lambda: CostLimits(action='drop')).to(raise_error(ValueError))
+    expect(lambda: CostLimits(action='cap')).to(raise_error(ValueError))
+    limits = CostLimits(max_rows=10, action='cap')
+    expect(CostLimits.of(limits)).to(be(limits))
+    expect(CostLimits.of(None)).to(be_none)
+    expect(CostLimits.of({'max_cost': 3}).max_cost).to(equal(3))
+
+
+def test_violations():
+    limits = CostLimits(max_cost=10, max_joins=1)
+    cost = QueryCost(predicates=2, joins=2)
+    expect(limits.violations(cost)).to(equal([
+        ('cost', 22, 10),
+        ('joins', 2, 1),
+    ]))
+    expect(lambda: limits.row_cap_for(cost)).to(
+        raise_error(QueryTooComplexError))
+    expect(limits.row_cap_for(QueryCost(predicates=2))).to(be_none)
+
+
+CAP_LIMITS = {'max_sort_keys': 0, 'action': 'cap', 'max_rows': 2}
+
+
+class CostTest(BaseDatabaseTest):
+
+    def setUp(self):
+        super().setUp()
+        domain = Domain(domain='example.com')
+        for index in range(5):
+            self.session.add(User(
+                name='user%d' % index,
+                created_at=datetime(2016, 1, index + 1),
+                email=EMail(mail='user%d@example.com' % index, domain=domain),
+            ))
+        self.session.commit()
+        self.aggregator = Aggregator()
+
+    def tearDown(self):
+        self.session.rollback()
+        self.session.expunge_all()
+        super().tearDown()
+
+    def create_binding(self, limits):
+        class UserBinding(QueryBindingConfiguration):
+            __config__ = {
+                'for': User,
+                'limits': limits,
+                'instrumentation': self.aggregator,
+                'cursor_secret': 'secret',
+                'binding': {
+                    'name': 'name',
+                    'created_at': 'created_at',
+                    'mail': {
+                        'param': 'mail',
+                        'join': 'email',
+                    },
+                    'domain': {
+                        'param': 'domain',
+                        'join': ('email', 'domain'),
+                    },
+                },
+            }
+        return UserBinding(self.session)
+
+    def test_cost_of_query(self):
+        cost = self.create_binding(None).cost_params({
+            'filter[param][name][ilike][a]': '%user%',
+            'filter[param][mail][like][b]': 'user%',
+            'filter[param][domain][eq][c]': 'example.com',
+            'filter[binding]': 'a|(b&c)',
+            'filter[order]': ['created_at', 'mail'],
+        })
+        expect(cost.predicates).to(equal(3))
+        expect(cost.depth).to(equal(3))
+        expect(cost.joins).to(equal(2))
+        expect(cost.leading_wildcards).to(equal(1))
+        expect(cost.sort_keys).to(equal(2))
+
+    def test_like_search_is_leading_wildcard(self):
+        binding = self.create_binding(None)
+        params = {'filter[param][name][search]': 'user'}
+        expect(binding.cost_params(params).leading_wildcards).to(equal(1))
+        expect(cost_of(
+            binding.parse(params),
+            binding.expression_handler,
+            binding.metadata().filters,
+            dialect_name='postgresql',
+        ).leading_wildcards).to(equal(0))
+
+    def test_reject_before_building_sql(self):
+        binding = self.create_binding({'max_leading_wildcards': 1})
+        params = {
+            'filter[param][name][ilike][a]': '%1',
+            'filter[param][name][ilike][b]': '%2',
+            'filter[binding]': 'a|b',
+        }
+        expect(lambda: binding.fetch_params(params)).to(
+            raise_error(QueryTooComplexError))
+        expect(lambda: binding.fetch_params(params)).to(
+            raise_error(ValueError))
+        expect(binding.plan_cache().info().misses).to(equal(0))
+        expect(self.aggregator.counter(
+            'rejected_queries',
+            binding='UserBinding',
+        )).to(equal(2))
+
+    def test_within_budget(self):
+        binding = self.create_binding({'max_cost': 100})
+        expect(binding.fetch_params({
+            'filter[param][name][eq]': 'user1',
+        })).to(have_len(1))
+
+    def test_cap_rows(self):
+        binding = self.create_binding({
+            'max_sort_keys': 1,
+            'action': 'cap',
+            'max_rows': 2,
+        })
+        users = binding.fetch_params({
+            'filter[order]': ['desc(created_at)', 'name'],
+        })
+        expect([user.name for user in users]).to(equal(['user4', 'user3']))
+        expect(binding.fetch_params({'filter[order]': 'name'})).to(
+            have_len(5))
+        expect(self.aggregator.counter(
+            'capped_queries',
+            binding='UserBinding',
+        )).to(equal(1))
+
+    def test_cap_rows_in_every_api(self):
+        binding = self.create_binding(CAP_LIMITS)
+        params = {'filter[order]': 'name'}
+        expect([user.name for user in binding.fetch_params(params)]).to(
+            equal(['user0', 'user1']))
+        expect(binding.fetch_rows_params(dict(params, fields='name'))).to(
+            equal([('user0',), ('user1',)]))
+
+        page = binding.paginate_params(params, 3)
+        expect([user.name for user in page]).to(equal(['user0', 'user1']))
+        page = binding.paginate_params(params, 3, page.next_cursor)
+        expect([user.name for user in page]).to(equal(['user2', 'user3']))
+
+        for strategy in ('cursor', 'keyset'):
+            batches = binding.stream_batches_params(params, 3, strategy)
+            expect([
+                [user.name for user in batch] for batch in batches
+            ]).to(equal([['user0', 'user1']]))
+        batches = binding.stream_batches_params(params, 1, 'keyset')
+        expect([[user.name for user in batch] for batch in batches]).to(
+            equal([['user0'], ['user1']]))
+
+        results = binding.batch_params([params, params], 3)
+        expect([[user.name for user in result] for result in results]).to(
+            equal([['user0', 'user1'], ['user0', 'user1']]))
+
+    def test_cap_rows_in_count(self):
+        binding = self.create_binding({
+            'max_predicates': 0,
+            'action': 'cap',
+            'max_rows': 2,
+        })
+        params = {'filter[param][name][like]': 'user%'}
+        for mode in ('exact', 'estimate'):
+            count = binding.count_params(params, mode)
+            expect(count).to(equal(2))
+            expect(count.capped).to(be_true)
+        expect(binding.count_params(params, 'capped', 100)).to(equal(2))
+        expect(binding.count_params(params, 'capped', 1)).to(equal(1))
+        expect(binding.fetch_params(params)).to(have_len(2))
+
+    def test_cap_rows_in_batch(self):
+        binding = self.create_binding({
+            'max_predicates': 1,
+            'action': 'cap',
+            'max_rows': 1,
+        })
+        results = binding.batch_params([
+            {'filter[order]': 'name'},
+            {
+                'filter[param][name][neq][a]': 'user0',
+                'filter[param][name][neq][b]': 'user1',
+                'filter[binding]': 'a&b',
+                'filter[order]': 'name',
+            },
+        ])
+        expect([[user.name for user in result] for result in results]).to(
+            equal([
+                ['user0', 'user1', 'user2', 'user3', 'user4'],
+                ['user2'],
+            ]))
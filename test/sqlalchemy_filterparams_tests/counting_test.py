@@ -0,0 +1,164 @@
+# -*- encoding: utf-8 -*-
+
+from expects import *
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects import postgresql
+
+from sqlalchemy_filterparams.counting import (
+    Count,
+    Counter,
+    Explain,
+    estimate_of,
+)
+from sqlalchemy_filterparams.query_binding_configuration import (
+    QueryBindingConfiguration
+)
+
+from sqlalchemy_filterparams_tests.database_test import BaseDatabaseTest
+from sqlalchemy_filterparams_tests.models import Domain, EMail, User
+
+
+class PlanStub:
+    joins = ()
+
+
+def test_count_formatting():
+    expect(str(Count(12345))).to(equal('12,345'))
+    expect(str(Count(10000, capped=True))).to(equal('10,000+'))
+    expect(str(Count(120, estimated=True))).to(equal('~120'))
+    expect(Count(3) + 1).to(equal(4))
+
+
+def test_estimate_of():
+    expect(estimate_of(
+        '[{"Plan": {"Node Type": "Seq Scan", "Plan Rows": 42}}]'
+    )).to(equal(42))
+    expect(estimate_of([{'Plan': {'Plan Rows': 7.0}}]).estimated).to(
+        be_true)
+    expect(estimate_of(-1.0)).to(be_none)
+
+
+def test_explain_compiles_for_postgresql():
+    sql = str(Explain(select(User.id)).compile(dialect=postgresql.dialect()))
+    expect(sql).to(start_with('EXPLAIN (FORMAT JSON) SELECT'))
+
+
+class CountingTest(BaseDatabaseTest):
+
+    def setUp(self):
+        super().setUp()
+        domain = Domain(domain='example.com')
+        for index in range(5):
+            self.session.add(User(
+                name='user%d' % index,
+                email=EMail(mail='user%d@example.com' % index, domain=domain),
+            ))
+        self.session.add(User(name='nomail'))
+        self.session.commit()
+
+        class UserBinding(QueryBindingConfiguration):
+            __config__ = {
+                'for': User,
+                'binding': {
+                    'name': 'name',
+                    'created_at': 'created_at',
+                    'mail': {
+                        'param': 'mail',
+                        'join': 'email',
+                    },
+                },
+            }
+
+        class DomainBinding(QueryBindingConfiguration):
+            __config__ = {
+                'for': Domain,
+                'binding': {
+                    'mail': {
+                        'param': 'mail',
+                        'join': 'emails',
+                        'strategy': 'join',
+                    },
+                },
+            }
+
+        self.binding = UserBinding(self.session)
+        self.domain_binding = DomainBinding(self.session)
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+
+    def tearDown(self):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+        self.session.rollback()
+        super().tearDown()
+
+    def _record(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def test_count_drops_sort_and_sort_joins(self):
+        count = self.binding.count_params({
+            'filter[param][name][like]': 'user%',
+            'filter[order]': 'desc(mail)',
+        })
+        expect(count).to(equal(5))
+        statement, = self.statements
+        expect(statement).not_to(contain('JOIN'))
+        expect(statement).not_to(contain('ORDER BY'))
+        expect(statement).to(contain('count(users.id)'))
+
+    def test_count_keeps_filter_joins(self):
+        count = self.binding.count_params({
+            'filter[param][mail][like]': '%1@%',
+        })
+        expect(count).to(equal(1))
+        expect(self.statements[0]).to(contain('JOIN'))
+
+    def test_count_distinct_for_to_many_joins(self):
+        count = self.domain_binding.count_params({
+            'filter[param][mail][like]': 'user%',
+        })
+        expect(count).to(equal(1))
+        expect(self.statements[0]).to(contain('count(DISTINCT domain.id)'))
+
+    def test_capped_count(self):
+        count = self.binding.count_params({}, mode='capped', cap=3)
+        expect(count).to(equal(3))
+        expect(count.capped).to(be_true)
+        expect(str(count)).to(equal('3+'))
+
+        count = self.binding.count_params({
+            'filter[param][name][eq]': 'user1',
+        }, mode='capped', cap=3)
+        expect(count.capped).to(be_false)
+        expect(count).to(equal(1))
+
+    def test_estimate_falls_back_to_exact(self):
+        count = self.binding.count_params({}, mode='estimate')
+        expect(count).to(equal(6))
+        expect(count.estimated).to(be_false)
+
+    def test_empty_count_does_not_execute(self):
+        count = self.binding.count_params({
+            'filter[param][created_at][gt][a]': '2016-01-05',
+            'filter[param][created_at][lt][b]': '2016-01-01',
+            'filter[binding]': 'a&b',
+        })
+        expect(count).to(equal(0))
+        expect(self.statements).to(be_empty)
+
+    def test_unknown_mode(self):
+        expect(lambda: self.binding.count_params({}, mode='guess')).to(
+            raise_error(ValueError))
+
+    def test_estimate_statements_for_postgresql(self):
+        sql_query = self.binding.evaluate_params({})
+        counter = Counter(PlanStub(), User, 'postgresql', 'estimate')
+        table_estimate, exact = counter.statements(sql_query.statement)
+        expect(str(table_estimate[0])).to(contain('pg_class'))
+        expect(exact[1]).to(be(Count))
+
+        filtered = self.binding.evaluate_params({
+            'filter[param][name][eq]': 'user1',
+        })
+        explain, _ = counter.statements(filtered.statement)
+        expect(explain[0]).to(be_a(Explain))
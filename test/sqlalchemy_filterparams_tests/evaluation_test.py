@@ -4,6 +4,8 @@ from expects import *
 
 from datetime import date, datetime
 
+from sqlalchemy import Date
+
 from filterparams.obj import (
     Query,
     And,
@@ -16,6 +18,7 @@ from filterparams.obj import (
 from sqlalchemy_filterparams.expression import (
     ExpressionHandler,
 )
+from sqlalchemy_filterparams.filters import InFilter
 from sqlalchemy_filterparams.evaluation import (
     Evaluation
 )
@@ -87,6 +90,32 @@ class EvaluationTest(BaseDatabaseTest):
     def query(self, value):
         self.query_config.query = value
 
+    def test_large_in_list_values_fallback(self):
+        class ValuesInFilter(InFilter):
+            threshold = 2
+            large_strategy = 'values'
+
+        self.query_config.filters = [ValuesInFilter]
+        self.query.add('name', filter='in', value='user,a,b')
+        self.query.param_order = self.query.get_param('name')
+        expect([user.name for user in self.evaluated_qry.all()]).to(
+            equal(['user']))
+
+    def test_aliased_duplicates_removed(self):
+        self.query.add('name', filter='eq', value='user', alias='a')
+        self.query.add('name', filter='eq', value='user', alias='b')
+        self.query.add('name', filter='neq', value='other', alias='c')
+        self.query.param_order = And(
+            And(
+                self.query.get_aliased_param('a'),
+                self.query.get_aliased_param('b'),
+            ),
+            self.query.get_aliased_param('c'),
+        )
+        sql_query = self.evaluated_qry
+        expect(str(sql_query.statement).count('users.name =')).to(equal(1))
+        expect(sql_query.all()).to(have_len(1))
+
     def test_filter_application_eq(self):
         self.query.add('name', filter='eq', value='user')
         self.query.param_order = self.query.get_param('name')
@@ -152,6 +181,29 @@ class EvaluationTest(BaseDatabaseTest):
         self.query.param_order = self.query.get_param('fullname')
         expect(self.evaluated_qry.first()).to_not(be_none)
 
+    def test_filter_application_ilike_literal(self):
+        self.query.add('fullname', filter='ilike', value='THE USER')
+        self.query.param_order = self.query.get_param('fullname')
+        sql_query = self.evaluated_qry
+        expect(str(sql_query.statement)).not_to(contain('LIKE'))
+        expect(sql_query.first()).to_not(be_none)
+
+    def test_filter_application_in(self):
+        self.query.add('name', filter='in', value='abc,user')
+        self.query.param_order = self.query.get_param('name')
+        expect(self.evaluated_qry.first()).to_not(be_none)
+
+    def test_filter_application_in_dates(self):
+        self.query.add('birth_date', filter='in',
+                       value='1985-10-25,1985-10-27')
+        self.query.param_order = self.query.get_param('birth_date')
+        expect(self.evaluated_qry.first()).to(be_none)
+
+    def test_filter_application_nin(self):
+        self.query.add('name', filter='nin', value='abc,user')
+        self.query.param_order = self.query.get_param('name')
+        expect(self.evaluated_qry.first()).to(be_none)
+
     def test_filter_and(self):
         self.query.add('fullname', filter='eq', value='The User')
         self.query.add('name', filter='eq', value='user2')
@@ -175,6 +227,21 @@ class EvaluationTest(BaseDatabaseTest):
         self.query.param_order = Not(self.query.get_param('name'))
         expect(self.evaluated_qry.first()).to(be_none)
 
+    def test_filter_deep_or_chain(self):
+        param_order = None
+        for index in range(3000):
+            alias = 'name%d' % index
+            self.query.add('name', filter='eq', value=alias, alias=alias)
+            param = self.query.get_aliased_param(alias)
+            param_order = param if param_order is None else Or(
+                param_order, param)
+        self.query.add('fullname', filter='eq', value='The User')
+        self.query.param_order = Or(
+            param_order,
+            self.query.get_param('fullname'),
+        )
+        expect(self.evaluated_qry.first()).to_not(be_none)
+
     def add_user_order(self):
         self.session.add(User(
             name='abc',
@@ -240,9 +307,95 @@ class EvaluationTest(BaseDatabaseTest):
         self.query.param_order = self.query.get_param('mail')
         expect(self.evaluated_qry.first()).to_not(be_none)
 
+    def test_value_converted_once(self):
+        calls = []
+
+        def parse_date(value):
+            calls.append(value)
+            return date(1985, 10, 26)
+
+        self.query_config.converters = {Date: parse_date}
+        self.query.add('birth_date', filter='eq', value='1985-10-26')
+        self.query.param_order = self.query.get_param('birth_date')
+        expect(self.evaluated_qry.first()).to_not(be_none)
+        expect(calls).to(equal(['1985-10-26']))
+
     def test_fullname_not_existing_relationship(self):
         self.query.add('fullname.not_existing',
                        filter='eq', value='test@example.com')
         self.query.param_order = self.query.get_param(
             'fullname.not_existing')
         expect(lambda: self.evaluated_qry).to(raise_error(ValueError))
+
+
+class BoundEvaluationTest(EvaluationTest):
+
+    def setUp(self):
+        super().setUp()
+        self.query_config.bind_params = True
+
+    def evaluate_name(self, value):
+        self.query = Query()
+        self.query.add('name', filter='eq', value=value)
+        self.query.add('birth_date', filter='lt', value='1990-01-01')
+        self.query.param_order = And(
+            self.query.get_param('name'),
+            self.query.get_param('birth_date'),
+        )
+        return self.evaluation.evaluate_separately(self.sql_query)
+
+    def test_bound_values_returned_separately(self):
+        _, params = self.evaluate_name('user')
+        expect(params).to(equal({
+            'name_eq': 'user',
+            'birth_date_lt': date(1990, 1, 1),
+        }))
+
+    def test_statement_independent_of_values(self):
+        first, _ = self.evaluate_name('user')
+        second, _ = self.evaluate_name('other')
+        expect(str(first)).to(equal(str(second)))
+        expect(str(first.statement)).to(contain(':name_eq'))
+
+    def test_bound_statement_executes(self):
+        sql_query, params = self.evaluate_name('user')
+        expect(sql_query.params(params).first()).to_not(be_none)
+
+    def test_duplicate_bind_keys(self):
+        self.query.add('name', filter='like', value='u%', alias='first')
+        self.query.add('name', filter='like', value='%r', alias='second')
+        self.query.param_order = And(
+            self.query.get_aliased_param('first'),
+            self.query.get_aliased_param('second'),
+        )
+        _, params = self.evaluation.evaluate_separately(self.sql_query)
+        expect(params).to(equal({
+            'name_like': 'u%',
+            'name_like_1': '%r',
+        }))
+
+    def test_merged_in_bound_as_list(self):
+        self.query.add('name', filter='eq', value='user', alias='first')
+        self.query.add('name', filter='eq', value='abc', alias='second')
+        self.query.param_order = Or(
+            self.query.get_aliased_param('first'),
+            self.query.get_aliased_param('second'),
+        )
+        sql_query, params = self.evaluation.evaluate_separately(
+            self.sql_query)
+        expect(params).to(equal({'name_in': ['user', 'abc']}))
+        expect(sql_query.params(params).first()).to_not(be_none)
+
+    def test_large_in_list_uses_strategy(self):
+        class SmallInFilter(InFilter):
+            threshold = 2
+            chunk_size = 2
+
+        self.query_config.filters = [SmallInFilter]
+        self.query.add('name', filter='in', value='user,a,b')
+        self.query.param_order = self.query.get_param('name')
+        sql_query, params = self.evaluation.evaluate_separately(
+            self.sql_query)
+        expect(params).to(equal({}))
+        expect(str(sql_query.statement)).to(contain(' OR '))
+        expect(sql_query.first()).to_not(be_none)
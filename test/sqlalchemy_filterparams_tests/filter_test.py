@@ -2,12 +2,37 @@
 
 from expects import *
 
-from sqlalchemy import Integer
+from sqlalchemy import Column, Integer, MetaData, Table, text
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
 from sqlalchemy_filterparams.filters import (
     EqFilter,
+    IEqFilter,
+    ILikeFilter,
     NeqFilter,
+    InFilter,
+    LikeFilter,
+    NotInFilter,
+    PrefixFilter,
+    SearchFilter,
+    like_literal,
+    like_pattern,
+    prefix_upper_bound,
+)
+from sqlalchemy_filterparams.query_binding_configuration import (
+    QueryBindingConfiguration
 )
 
+from sqlalchemy_filterparams_tests.database_test import BaseDatabaseTest
+from sqlalchemy_filterparams_tests.models import User
+
+
+def compiled(clause, dialect=None):
+    return str(clause.compile(
+        dialect=dialect or sqlite.dialect(),
+        compile_kwargs={'literal_binds': True},
+    ))
+
 
 def test_identification_by_str():
     expect(EqFilter(None)).to(equal('eq'))
@@ -31,3 +56,337 @@ def test_negative_identification_by_other():
 
 def test_apply_with_type():
     EqFilter(None).apply(Integer, '1')
+
+
+def test_in_splits_and_converts():
+    expect(InFilter(None).apply(User.id, '1,2,2,3').compare(
+        User.id.in_([1, 2, 3]))).to(be_true)
+
+
+def test_in_accepts_list():
+    expect(InFilter(None).convert_value(['1', '2'], int)).to(
+        equal([1, 2]))
+
+
+class SmallInFilter(InFilter):
+    threshold = 2
+    chunk_size = 2
+
+
+class SmallNotInFilter(NotInFilter):
+    threshold = 2
+    chunk_size = 2
+
+
+def test_in_chunked_above_threshold():
+    expect(compiled(SmallInFilter(None).apply(User.id, '1,2,3'))).to(
+        equal('users.id IN (1, 2) OR users.id IN (3)'))
+
+
+def test_not_in_chunked_above_threshold():
+    expect(compiled(SmallNotInFilter(None).apply(User.id, '1,2,3'))).to(
+        equal('(users.id NOT IN (1, 2)) AND (users.id NOT IN (3))'))
+
+
+def test_in_array_on_postgresql():
+    filter_obj = SmallInFilter(None)
+    filter_obj.dialect_name = 'postgresql'
+    expect(compiled(
+        filter_obj.apply(User.id, '1,2,3'),
+        postgresql.dialect(),
+    )).to(equal('users.id = ANY (ARRAY[1, 2, 3])'))
+
+
+def test_not_in_array_on_postgresql():
+    filter_obj = SmallNotInFilter(None)
+    filter_obj.dialect_name = 'postgresql'
+    expect(compiled(
+        filter_obj.apply(User.id, '1,2,3'),
+        postgresql.dialect(),
+    )).to(equal('users.id != ALL (ARRAY[1, 2, 3])'))
+
+
+def test_in_values_strategy():
+    class ValuesInFilter(SmallInFilter):
+        large_strategy = 'values'
+
+    filter_obj = ValuesInFilter(None)
+    filter_obj.dialect_name = 'postgresql'
+    expect(compiled(
+        filter_obj.apply(User.id, '1,2,3'),
+        postgresql.dialect(),
+    )).to(contain('VALUES (1), (2), (3)'))
+    filter_obj.dialect_name = 'sqlite'
+    expect(filter_obj.strategy).to(equal('chunked'))
+
+
+def test_in_bind_expanding():
+    expect(str(InFilter(None).bind(User.id, 'id_in'))).to(
+        contain('POSTCOMPILE_id_in'))
+
+
+def test_in_rebind_above_threshold():
+    expect(SmallInFilter(None).rebind(User.id, 'id_in', [1, 2])).to(be_none)
+    expect(compiled(SmallInFilter(None).rebind(User.id, 'id_in', [1, 2, 3])))\
+        .to(equal('users.id IN (1, 2) OR users.id IN (3)'))
+    filter_obj = SmallInFilter(None)
+    filter_obj.dialect_name = 'postgresql'
+    expect(filter_obj.rebind(User.id, 'id_in', [1, 2, 3])).to(be_none)
+
+
+def test_in_bind_array_on_postgresql():
+    filter_obj = InFilter(None)
+    filter_obj.dialect_name = 'postgresql'
+    expect(str(filter_obj.bind(User.id, 'id_in').compile(
+        dialect=postgresql.dialect()))).to(
+        start_with('users.id = ANY (%(id_in)s'))
+
+
+def test_like_pattern():
+    expect(like_pattern('a%b_').match('aXXbY')).not_to(be_none)
+    expect(like_pattern('a\\%').match('a%')).not_to(be_none)
+    expect(like_pattern('a\\%').match('ab')).to(be_none)
+    expect(like_pattern('a\\%', escape=None).match('a\\b')).not_to(be_none)
+    expect(like_pattern('A%', True).match('abc')).not_to(be_none)
+
+
+def test_matchers_follow_sql_nulls():
+    expect(EqFilter(None).matcher(1)(None)).to(be_none)
+    expect(EqFilter(None).matcher(None)(None)).to(be_true)
+    expect(NotInFilter(None).matcher([1, None])(2)).to(be_none)
+    expect(InFilter(None).matcher([1, 2])(2)).to(be_true)
+
+
+def test_like_matcher_per_dialect():
+    like = LikeFilter(None)
+    expect(like.matcher('A%')('abc')).to(be_false)
+    like.dialect_name = 'sqlite'
+    expect(like.matcher('A%')('abc')).to(be_true)
+
+
+def test_like_literal():
+    expect(like_literal('a\\_b\\%')).to(equal('a_b%'))
+    expect(like_literal('a\\\\b')).to(equal('a\\b'))
+    expect(like_literal('a_b')).to(be_none)
+    expect(like_literal('ab%')).to(be_none)
+    expect(like_literal('ab\\')).to(be_none)
+    expect(like_literal('a\\b', None)).to(equal('a\\b'))
+
+
+def ieq_for(dialect_name=None, filter_cl=IEqFilter):
+    filter_obj = filter_cl(None)
+    filter_obj.dialect_name = dialect_name
+    return filter_obj
+
+
+def test_ieq_uses_lower():
+    expect(compiled(ieq_for('sqlite').build(User.name, 'A_b'))).to(
+        equal("lower(users.name) = lower('A_b')"))
+    expect(compiled(
+        ieq_for('mysql').build(User.name, 'A_b'),
+        mysql.dialect(),
+    )).to(equal("users.name = 'A_b'"))
+
+
+def test_ieq_case_insensitive_column():
+    mails = Table(
+        'mails', MetaData(),
+        Column('mail', postgresql.CITEXT),
+    )
+    expect(compiled(
+        ieq_for('postgresql').build(mails.c.mail, 'A'),
+        postgresql.dialect(),
+    )).to(equal("mails.mail = 'A'"))
+
+
+def test_ieq_collation():
+    class NocaseFilter(IEqFilter):
+        collation = 'NOCASE'
+
+    expect(compiled(ieq_for('sqlite', NocaseFilter).build(User.name, 'a'))).to(
+        equal("(users.name COLLATE \"NOCASE\") = 'a'"))
+
+
+def test_ieq_matcher():
+    expect(IEqFilter(None).matcher('Cbrand')('CBRAND')).to(be_true)
+    expect(IEqFilter(None).matcher('Cbrand')('cbrandt')).to(be_false)
+    expect(IEqFilter(None).matcher('Cbrand')(None)).to(be_none)
+
+
+def test_ilike_without_wildcards_compares_lowered():
+    expect(compiled(
+        ieq_for('postgresql', ILikeFilter).build(User.name, 'a\\_b'),
+        postgresql.dialect(),
+    )).to(equal("lower(users.name) = lower('a_b')"))
+    expect(compiled(
+        ieq_for('postgresql', ILikeFilter).build(User.name, 'a_b'),
+        postgresql.dialect(),
+    )).to(equal("users.name ILIKE 'a_b'"))
+    expect(compiled(
+        ieq_for('sqlite', ILikeFilter).build(User.name, 'a\\_'),
+    )).to(equal("lower(users.name) LIKE lower('a\\_')"))
+
+
+def test_ilike_rebind_literal():
+    filter_obj = ieq_for('postgresql', ILikeFilter)
+    expect(filter_obj.rebind(User.name, 'name_ilike', 'a%')).to(be_none)
+    expect(compiled(
+        filter_obj.rebind(User.name, 'name_ilike', 'a\\_b'),
+        postgresql.dialect(),
+    )).to(equal("lower(users.name) = lower('a_b')"))
+
+
+def test_prefix_upper_bound():
+    expect(prefix_upper_bound('abc')).to(equal('abd'))
+    expect(prefix_upper_bound('ab\U0010ffff')).to(equal('ac'))
+    expect(prefix_upper_bound('a\ud7ff')).to(equal('a\ue000'))
+    expect(prefix_upper_bound('')).to(be_none)
+
+
+def test_prefix_as_range():
+    prefix = PrefixFilter(None)
+    expect(compiled(prefix.build(User.name, 'ab'))).to(
+        equal("users.name >= 'ab' AND users.name < 'ac'"))
+    expect(prefix.params_of('name_prefix', 'ab')).to(equal({
+        'name_prefix': 'ab',
+        'name_prefix_upper': 'ac',
+    }))
+    expect(lambda: prefix.convert_value('', None)).to(
+        raise_error(ValueError))
+    expect(prefix.matcher('ab')('abc')).to(be_true)
+    expect(prefix.matcher('ab')('Abc')).to(be_false)
+
+
+def test_prefix_only_on_strings():
+    expect(lambda: PrefixFilter(None).build(User.id, '1')).to(
+        raise_error(ValueError))
+
+
+def search_for(dialect_name, strategy=None):
+    search = SearchFilter(None)
+    search.dialect_name = dialect_name
+    search.search_strategy = strategy
+    return search
+
+
+def test_search_per_dialect():
+    expect(compiled(
+        search_for('postgresql').build(User.name, 'cb rand'),
+        postgresql.dialect(),
+    )).to(equal(
+        "to_tsvector('simple'::regconfig, users.name) @@ "
+        "plainto_tsquery('simple'::regconfig, 'cb rand')"
+    ))
+    expect(compiled(
+        search_for('mysql').build(User.name, 'cb rand'),
+        mysql.dialect(),
+    )).to(equal(
+        "MATCH (users.name) AGAINST ('cb rand' IN NATURAL LANGUAGE MODE)"
+    ))
+    expect(compiled(search_for('sqlite').build(User.name, '50%'))).to(
+        equal("lower(users.name) LIKE lower('%50\\%%') ESCAPE '\\'"))
+
+
+def test_search_alternative_strategies():
+    expect(compiled(
+        search_for('postgresql', 'trigram').build(User.name, 'cb'),
+        postgresql.dialect(),
+    )).to(equal("users.name %% 'cb'"))
+    expect(compiled(
+        search_for('sqlite', 'fts5').build(User.name, 'cb "r'),
+    )).to(equal(
+        "users.id IN (SELECT users_fts.rowid \nFROM users_fts \n"
+        "WHERE users_fts.name MATCH '\"cb\" \"\"\"r\"')"
+    ))
+    expect(lambda: search_for('sqlite', 'regex').build(User.name, 'cb')).to(
+        raise_error(ValueError))
+
+
+def test_search_needs_words():
+    expect(lambda: SearchFilter(None).convert_value(' - ', None)).to(
+        raise_error(ValueError))
+
+
+def test_search_matcher():
+    expect(search_for('sqlite').matcher('RAN')('cbrand')).to(be_true)
+    fulltext = search_for('postgresql').matcher('Brand c')
+    expect(fulltext('c brand')).to(be_true)
+    expect(fulltext('cbrand')).to(be_false)
+    expect(fulltext(None)).to(be_none)
+
+
+class SearchTest(BaseDatabaseTest):
+
+    def setUp(self):
+        super().setUp()
+        self.session.add_all([
+            User(name='Christoph Brand'),
+            User(name='chris_b'),
+            User(name='Brandon'),
+        ])
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.rollback()
+        self.session.expunge_all()
+        super().tearDown()
+
+    def fetch(self, filter_name, value, bind_params=False, filters=None):
+        class UserBinding(QueryBindingConfiguration):
+            __config__ = {
+                'for': User,
+                'bind_params': bind_params,
+                'filters': filters,
+                'binding': {
+                    'name': 'name',
+                },
+            }
+        return sorted(
+            user.name
+            for user in UserBinding(self.session).fetch_params({
+                'filter[param][name][%s]' % filter_name: value,
+            })
+        )
+
+    def test_case_insensitive_equality(self):
+        for bind_params in (False, True):
+            expect(self.fetch('ieq', 'CHRIS_B', bind_params)).to(
+                equal(['chris_b']))
+        expect(self.fetch('ilike', 'CHRIS_B')).to(equal(['chris_b']))
+        expect(self.fetch('ilike', 'CHRIS%')).to(
+            equal(['Christoph Brand', 'chris_b']))
+
+    def test_prefix(self):
+        for bind_params in (False, True):
+            expect(self.fetch('prefix', 'chris', bind_params)).to(
+                equal(['chris_b']))
+
+    def test_search_like_fallback(self):
+        for bind_params in (False, True):
+            expect(self.fetch('search', 'BRAND', bind_params)).to(
+                equal(['Brandon', 'Christoph Brand']))
+        expect(self.fetch('search', 's_')).to(equal(['chris_b']))
+
+    def test_search_fts5(self):
+        class Fts5SearchFilter(SearchFilter):
+            search_strategy = 'fts5'
+
+        self.session.execute(text(
+            'CREATE VIRTUAL TABLE users_fts USING fts5('
+            'name, content=users, content_rowid=id)'
+        ))
+        self.session.execute(text(
+            'INSERT INTO users_fts(users_fts) VALUES (\'rebuild\')'
+        ))
+        try:
+            for bind_params in (False, True):
+                expect(self.fetch(
+                    'search',
+                    'brand christoph',
+                    bind_params,
+                    [Fts5SearchFilter],
+                )).to(equal(['Christoph Brand']))
+        finally:
+            self.session.rollback()
+            self.session.execute(text('DROP TABLE IF EXISTS users_fts'))
+            self.session.commit()
@@ -0,0 +1,311 @@
+# -*- encoding: utf-8 -*-
+
+import warnings
+
+from expects import *
+
+from sqlalchemy import (
+    Column,
+    Index,
+    Integer,
+    MetaData,
+    Table,
+    Unicode,
+    UniqueConstraint,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import CITEXT
+from sqlalchemy.orm import declarative_base
+
+from sqlalchemy_filterparams.filters import (
+    EqFilter,
+    IEqFilter,
+    ILikeFilter,
+    InFilter,
+    LikeFilter,
+    NeqFilter,
+    NotInFilter,
+    SearchFilter,
+)
+from sqlalchemy_filterparams.indexes import (
+    BindingIndexes,
+    UnindexedQueryError,
+    UnindexedQueryWarning,
+    index_report,
+    leading_columns_of,
+    lower_columns_of,
+    search_strategies_of,
+)
+from sqlalchemy_filterparams.instrumentation import Aggregator
+from sqlalchemy_filterparams.query_binding_configuration import (
+    QueryBindingConfiguration
+)
+
+from sqlalchemy_filterparams_tests.database_test import BaseDatabaseTest
+from sqlalchemy_filterparams_tests.models import User
+
+
+IndexedBase = declarative_base()
+
+
+class Tag(IndexedBase):
+    __tablename__ = 'tags'
+
+    id = Column(Integer, primary_key=True)
+    plain = Column(Unicode, index=True)
+    lowered = Column(Unicode)
+
+    __table_args__ = (
+        Index('ix_tags_lower_lowered', func.lower(lowered)),
+    )
+
+
+def test_leading_columns():
+    table = Table(
+        'items', MetaData(),
+        Column('id', Integer, primary_key=True),
+        Column('a', Unicode),
+        Column('b', Unicode),
+        Column('c', Unicode),
+        Column('d', Unicode, index=True),
+        Column('e', Unicode),
+        UniqueConstraint('c', 'a'),
+    )
+    Index('ix_items_a_b', table.c.a, table.c.b)
+    Index('ix_items_lower_e', func.lower(table.c.e))
+    expect(leading_columns_of(table)).to(equal(set(['id', 'a', 'c', 'd'])))
+
+
+def test_serves_filter():
+    indexes = BindingIndexes({}, ['name'])
+    expect(indexes.serves_filter('name', EqFilter)).to(be_true)
+    expect(indexes.serves_filter('name', InFilter)).to(be_true)
+    expect(indexes.serves_filter('name', NotInFilter)).to(be_false)
+    expect(indexes.serves_filter('name', NeqFilter)).to(be_false)
+    expect(indexes.serves_filter('name', ILikeFilter, 'a%')).to(be_false)
+    expect(indexes.serves_filter('name', ILikeFilter, 'a\\_b')).to(be_false)
+    expect(indexes.serves_filter('name', IEqFilter)).to(be_false)
+    expect(indexes.serves_filter('name', LikeFilter, 'a%')).to(be_true)
+    expect(indexes.serves_filter('name', LikeFilter, '%a')).to(be_false)
+    expect(indexes.serves_filter('other', EqFilter)).to(be_false)
+    expect(indexes.serves_sort('name', 'desc')).to(be_true)
+
+
+def test_serves_ieq():
+    columns = {
+        'plain': Column('plain', Unicode),
+        'lowered': Column('lowered', Unicode),
+        'citext': Column('citext', CITEXT),
+    }
+    indexes = BindingIndexes(
+        columns,
+        ['plain', 'citext'],
+        lower_indexed=['lowered'],
+    )
+    expect(indexes.serves_filter('plain', IEqFilter)).to(be_false)
+    expect(indexes.serves_filter('plain', IEqFilter, 'a', 'mysql')).to(
+        be_true)
+    expect(indexes.serves_filter('lowered', IEqFilter)).to(be_true)
+    expect(indexes.serves_filter('lowered', EqFilter)).to(be_false)
+    expect(indexes.serves_filter('lowered', ILikeFilter, 'a')).to(be_true)
+    expect(indexes.serves_filter('lowered', ILikeFilter, 'a%')).to(be_false)
+    expect(indexes.serves_filter(
+        'lowered', ILikeFilter, 'a\\_c', 'postgresql')).to(be_true)
+    expect(indexes.serves_filter(
+        'lowered', ILikeFilter, 'a\\_c', 'sqlite')).to(be_false)
+    expect(indexes.serves_filter('citext', IEqFilter)).to(be_true)
+
+
+def test_lower_columns():
+    table = Table(
+        'items', MetaData(),
+        Column('id', Integer, primary_key=True),
+        Column('a', Unicode),
+        Column('b', Unicode),
+    )
+    Index('ix_items_a', table.c.a)
+    Index('ix_items_lower_b', func.lower(table.c.b))
+    expect(lower_columns_of(table)).to(equal(set(['b'])))
+
+
+def test_search_strategies():
+    metadata = MetaData()
+    table = Table(
+        'items', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('a', Unicode),
+        Column('b', Unicode),
+        Column('c', Unicode),
+        Column('d', Unicode),
+        Column('e', Unicode),
+    )
+    Index('ix_items_a', table.c.a)
+    Index(
+        'ix_items_b', table.c.b,
+        postgresql_using='gin',
+        postgresql_ops={'b': 'gin_trgm_ops'},
+    )
+    Index(
+        'ix_items_c', func.to_tsvector(text("'simple'"), table.c.c),
+        postgresql_using='gin',
+    )
+    Index('ix_items_d', table.c.d, mysql_prefix='FULLTEXT')
+    Table(
+        'items_fts', metadata,
+        Column('rowid', Integer),
+        Column('e', Unicode),
+    )
+    expect(search_strategies_of(table)).to(equal({
+        'b': set(['trigram']),
+        'c': set(['fulltext']),
+        'd': set(['fulltext']),
+        'e': set(['fts5']),
+    }))
+
+
+def test_serves_search():
+    indexes = BindingIndexes({}, ['name'], searchable={
+        'name': ['fulltext'],
+        'other': ['fts5'],
+    })
+    expect(indexes.serves_filter('name', SearchFilter)).to(be_false)
+    expect(indexes.serves_filter('name', SearchFilter, 'a', 'sqlite')).to(
+        be_false)
+    expect(indexes.serves_filter(
+        'name', SearchFilter, 'a', 'postgresql')).to(be_true)
+    expect(indexes.serves_filter(
+        'other', SearchFilter, 'a', 'postgresql')).to(be_false)
+
+    class FTS5SearchFilter(SearchFilter):
+        search_strategy = 'fts5'
+
+    expect(indexes.serves_filter('other', FTS5SearchFilter)).to(be_true)
+
+
+def test_unknown_policy():
+    expect(lambda: BindingIndexes({}, [], 'ignore')).to(
+        raise_error(ValueError))
+
+
+class IndexPolicyTest(BaseDatabaseTest):
+
+    def setUp(self):
+        super().setUp()
+        self.session.add(User(name='user'))
+        self.session.commit()
+        self.aggregator = Aggregator()
+
+    def tearDown(self):
+        self.session.rollback()
+        self.session.expunge_all()
+        super().tearDown()
+
+    def create_cl(self, policy=None):
+        class UserBinding(QueryBindingConfiguration):
+            __config__ = {
+                'for': User,
+                'index_policy': policy,
+                'instrumentation': self.aggregator,
+                'binding': {
+                    'id': 'id',
+                    'name': 'name',
+                    'mail_id': {
+                        'param': 'id',
+                        'join': 'email',
+                    },
+                    'mail': {
+                        'param': 'mail',
+                        'join': 'email',
+                    },
+                },
+            }
+        return UserBinding
+
+    def test_configuration(self):
+        indexes = self.create_cl().metadata().indexes
+        expect(indexes.indexed).to(equal(frozenset(['id', 'mail_id'])))
+        expect(indexes.suggestion_for('mail')).to(equal('email.mail'))
+
+    def test_reject(self):
+        binding = self.create_cl('reject')(self.session)
+        expect(binding.fetch_params({'filter[param][id][in]': '1,2'})).to(
+            have_len(1))
+        expect(lambda: binding.fetch_params({
+            'filter[param][name][eq]': 'user',
+        })).to(raise_error(UnindexedQueryError))
+        expect(lambda: binding.fetch_params({
+            'filter[order]': 'desc(mail)',
+        })).to(raise_error(UnindexedQueryError, contain('desc(mail)')))
+        expect(lambda: binding.fetch_params({
+            'filter[param][id][search]': '1',
+        })).to(raise_error(UnindexedQueryError, contain('id[search]')))
+
+    def test_warn(self):
+        binding = self.create_cl('warn')(self.session)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            expect(binding.fetch_params({
+                'filter[param][name][neq]': 'other',
+            })).to(have_len(1))
+        expect([warning.category for warning in caught]).to(
+            equal([UnindexedQueryWarning]))
+
+    def test_report(self):
+        binding_cl = self.create_cl()
+        binding = binding_cl(self.session)
+        for _ in range(3):
+            binding.fetch_params({'filter[param][name][eq]': 'user'})
+        binding.fetch_params({
+            'filter[param][id][eq]': '1',
+            'filter[order]': 'mail',
+        })
+        expect(self.aggregator.counter(
+            'unindexed',
+            binding='UserBinding',
+            param='name',
+            filter='eq',
+        )).to(equal(3))
+        lines = index_report(self.aggregator, [binding_cl]).splitlines()
+        expect(lines).to(have_len(3))
+        expect(lines[1]).to(contain('name[eq]', 'users.name'))
+        expect(lines[2]).to(contain('asc(mail)', 'email.mail'))
+
+
+class ExpressionIndexTest(BaseDatabaseTest):
+
+    def setUp(self):
+        super().setUp()
+        IndexedBase.metadata.create_all(self.engine)
+        self.session.add(Tag(plain='Tag', lowered='Tag'))
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.rollback()
+        self.session.expunge_all()
+        IndexedBase.metadata.drop_all(self.engine)
+        super().tearDown()
+
+    def fetch(self, params):
+        class TagBinding(QueryBindingConfiguration):
+            __config__ = {
+                'for': Tag,
+                'index_policy': 'reject',
+                'binding': {'plain': 'plain', 'lowered': 'lowered'},
+            }
+
+        return TagBinding(self.session).fetch_params(params)
+
+    def test_ieq_needs_lower_index(self):
+        expect(self.fetch({'filter[param][plain][eq]': 'Tag'})).to(
+            have_len(1))
+        expect(self.fetch({'filter[param][lowered][ieq]': 'tag'})).to(
+            have_len(1))
+        expect(self.fetch({'filter[param][lowered][ilike]': 'TAG'})).to(
+            have_len(1))
+        expect(lambda: self.fetch({
+            'filter[param][plain][ieq]': 'tag',
+        })).to(raise_error(UnindexedQueryError, contain('plain[ieq]')))
+        expect(lambda: self.fetch({
+            'filter[param][lowered][eq]': 'Tag',
+        })).to(raise_error(UnindexedQueryError, contain('lowered[eq]')))
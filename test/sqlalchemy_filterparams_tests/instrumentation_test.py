@@ -0,0 +1,138 @@
+# -*- encoding: utf-8 -*-
+
+from datetime import date
+
+from expects import *
+
+from sqlalchemy_filterparams.instrumentation import (
+    Aggregator,
+    NULL_INSTRUMENTATION,
+    NULL_SPAN,
+)
+from sqlalchemy_filterparams.query_binding_configuration import (
+    QueryBindingConfiguration
+)
+
+from sqlalchemy_filterparams_tests.database_test import BaseDatabaseTest
+from sqlalchemy_filterparams_tests.models import User
+
+
+def test_null_instrumentation_is_free():
+    def func(value):
+        return value
+
+    expect(NULL_INSTRUMENTATION.span('parse', binding='x')).to(be(NULL_SPAN))
+    expect(NULL_INSTRUMENTATION.timed(func, 'convert')).to(be(func))
+    expect(NULL_INSTRUMENTATION.enabled).to(be_false)
+
+
+def test_aggregator_records_spans():
+    aggregator = Aggregator()
+    for _ in range(3):
+        with aggregator.span('parse', binding='A'):
+            pass
+    with aggregator.span('parse', binding='B'):
+        pass
+
+    stats = aggregator.stats('parse', binding='A')
+    expect(stats).to(have_len(1))
+    expect(stats[0].count).to(equal(3))
+    expect(stats[0].max).to(be_below_or_equal(stats[0].total))
+    expect([binding for binding, _ in aggregator.totals('binding')]).to(
+        contain('A', 'B'))
+
+
+def test_aggregator_timed():
+    aggregator = Aggregator()
+    timed_int = aggregator.timed(int, 'convert', param='id')
+    expect(timed_int('3')).to(equal(3))
+    expect(aggregator.stats('convert')[0].tags).to(equal({'param': 'id'}))
+
+
+def test_aggregator_records_failing_spans():
+    aggregator = Aggregator()
+
+    def fail():
+        with aggregator.span('execute'):
+            raise ValueError('failed')
+
+    expect(fail).to(raise_error(ValueError))
+    expect(aggregator.stats('execute')[0].count).to(equal(1))
+
+
+def test_aggregator_counters_and_reset():
+    aggregator = Aggregator()
+    aggregator.count('rows', 5, binding='A')
+    aggregator.count('rows', 2, binding='A')
+    expect(aggregator.counter('rows', binding='A')).to(equal(7))
+    expect(aggregator.report()).to(start_with('stage'))
+    aggregator.reset()
+    expect(aggregator.counters()).to(be_empty)
+    expect(aggregator.stats()).to(be_empty)
+
+
+class InstrumentedBindingTest(BaseDatabaseTest):
+
+    def setUp(self):
+        super().setUp()
+        self.aggregator = Aggregator()
+
+        class UserBinding(QueryBindingConfiguration):
+            __config__ = {
+                'for': User,
+                'sessionmaker': self.Session,
+                'instrumentation': self.aggregator,
+                'binding': {
+                    'name': 'name',
+                    'birth_date': 'date_of_birth',
+                    'mail': {
+                        'param': 'mail',
+                        'join': 'email',
+                    },
+                },
+            }
+
+        self.binding_cl = UserBinding
+        self.session.add(User(name='user', date_of_birth=date(1985, 10, 26)))
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.rollback()
+        super().tearDown()
+
+    def fetch(self):
+        return self.binding_cl().fetch_params({
+            'filter[param][birth_date][gte]': '1985-01-01',
+            'filter[param][name][eq]': 'user',
+        })
+
+    def test_records_all_stages(self):
+        expect(self.fetch()).to(have_len(1))
+        stages = set(stats.stage for stats in self.aggregator.stats())
+        expect(stages).to(equal(set([
+            'parse', 'convert', 'join', 'plan', 'build', 'compile',
+            'execute',
+        ])))
+        for stats in self.aggregator.stats():
+            expect(stats.tags['binding']).to(equal('UserBinding'))
+        expect(self.aggregator.counter('rows', binding='UserBinding')).to(
+            equal(1))
+
+    def test_convert_tagged_with_filter(self):
+        self.fetch()
+        convert, = self.aggregator.stats('convert')
+        expect(convert.tags).to(have_keys(
+            param='birth_date',
+            filter='gte',
+        ))
+
+    def test_plan_once_per_shape(self):
+        self.fetch()
+        self.fetch()
+        expect(self.aggregator.stats('plan')[0].count).to(equal(1))
+        expect(self.aggregator.stats('compile')[0].count).to(equal(2))
+        compile_stats, = self.aggregator.stats('compile')
+        execute_stats, = self.aggregator.stats('execute')
+        expect(compile_stats.total).to(be_below(execute_stats.total))
+        expect(self.aggregator.stats('build')[0].count).to(equal(2))
+        expect(self.aggregator.stats('convert')[0].count).to(equal(2))
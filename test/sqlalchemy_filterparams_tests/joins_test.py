@@ -0,0 +1,267 @@
+# -*- encoding: utf-8 -*-
+
+from expects import *
+
+from filterparams.obj import Query, And, Or, Order
+
+from sqlalchemy_filterparams.evaluation import Evaluation
+from sqlalchemy_filterparams.expression import (
+    ExpressionHandler,
+    ExpressionItem,
+    joined_relations_of,
+)
+from sqlalchemy_filterparams.plan import PlanCache
+from sqlalchemy_filterparams.query_config import QueryConfig
+
+from sqlalchemy_filterparams_tests.database_test import BaseDatabaseTest
+from sqlalchemy_filterparams_tests.models import Domain, EMail, User
+
+
+def test_unknown_strategy():
+    expect(lambda: ExpressionItem({
+        'param': 'mail',
+        'join': 'email',
+        'strategy': 'lateral',
+    })).to(raise_error(ValueError))
+
+
+class JoinPlanningTest(BaseDatabaseTest):
+
+    def setUp(self):
+        super().setUp()
+        domain = Domain(domain='example.com')
+        self.session.add(User(
+            name='user',
+            email=EMail(mail='user@example.com', domain=domain),
+        ))
+        self.session.add(User(
+            name='other',
+            email=EMail(mail='other@example.org', domain=domain),
+        ))
+        self.session.add(User(name='nomail'))
+        self.session.commit()
+        self.query_config = QueryConfig()
+        self.query_config.model = User
+        self.query_config.query = Query()
+        self.expressions = {
+            'name': User.name,
+            'mail': {
+                'param': 'mail',
+                'join': 'email',
+                'strategy': 'exists',
+            },
+            'domain': {
+                'param': 'domain',
+                'join': ('email', 'domain'),
+                'strategy': 'exists',
+            },
+            'in_mail': {
+                'param': 'mail',
+                'join': 'email',
+                'strategy': 'in',
+            },
+            'joined_mail': {
+                'param': 'mail',
+                'join': 'email',
+            },
+        }
+
+    def tearDown(self):
+        self.session.rollback()
+        super().tearDown()
+
+    @property
+    def query(self):
+        return self.query_config.query
+
+    def evaluate(self, sql_query=None):
+        self.query_config.expressions = ExpressionHandler(
+            self.expressions,
+            User,
+        )
+        if sql_query is None:
+            sql_query = self.session.query(User)
+        return Evaluation(self.query_config).evaluate(sql_query)
+
+    def sql_of(self, sql_query):
+        return str(sql_query.statement)
+
+    def test_filter_only_path_uses_exists(self):
+        self.query.add('mail', filter='eq', value='user@example.com')
+        self.query.param_order = self.query.get_param('mail')
+        sql_query = self.evaluate()
+        sql = self.sql_of(sql_query)
+        expect(sql).to(contain('EXISTS'))
+        expect(sql).not_to(contain('JOIN email'))
+        expect([user.name for user in sql_query]).to(equal(['user']))
+
+    def test_in_strategy(self):
+        self.query.add('in_mail', filter='like', value='%example.org')
+        self.query.param_order = self.query.get_param('in_mail')
+        sql_query = self.evaluate()
+        expect(self.sql_of(sql_query)).to(contain('users.email_id IN'))
+        expect([user.name for user in sql_query]).to(equal(['other']))
+
+    def test_join_strategy_is_default(self):
+        self.query.add('joined_mail', filter='eq', value='user@example.com')
+        self.query.param_order = self.query.get_param('joined_mail')
+        sql = self.sql_of(self.evaluate())
+        expect(sql).to(contain('JOIN email AS email_1'))
+        expect(sql).not_to(contain('EXISTS'))
+
+    def test_sort_path_shares_alias_with_filter(self):
+        self.query.add('mail', filter='like', value='%example%')
+        self.query.param_order = self.query.get_param('mail')
+        self.query.add_order(Order('mail', 'desc'))
+        sql_query = self.evaluate()
+        sql = self.sql_of(sql_query)
+        expect(sql).not_to(contain('EXISTS'))
+        expect(sql.count('JOIN email')).to(equal(1))
+        expect([user.name for user in sql_query]).to(equal(['user', 'other']))
+
+    def test_conjuncts_share_one_subquery(self):
+        self.query.add('mail', filter='like', value='%example%')
+        self.query.add('domain', filter='eq', value='example.com')
+        self.query.add('name', filter='eq', value='user')
+        self.query.param_order = And(
+            self.query.get_param('domain'),
+            Or(self.query.get_param('mail'), self.query.get_param('name')),
+        )
+        sql_query = self.evaluate()
+        sql = self.sql_of(sql_query)
+        expect(sql.count('EXISTS')).to(equal(1))
+        expect(sql).to(contain('JOIN domain AS domain_1'))
+        expect(
+            sorted(user.name for user in sql_query)
+        ).to(equal(['other', 'user']))
+
+    def test_exists_keeps_inner_join_semantics(self):
+        self.query.add('mail', filter='neq', value='user@example.com')
+        self.query.param_order = self.query.get_param('mail')
+        names = [user.name for user in self.evaluate()]
+        expect(names).to(equal(['other']))
+
+    def test_reuses_existing_join(self):
+        self.query.add('mail', filter='eq', value='user@example.com')
+        self.query.param_order = self.query.get_param('mail')
+        sql_query = self.evaluate(self.session.query(User).join(User.email))
+        sql = self.sql_of(sql_query)
+        expect(sql.count('JOIN email')).to(equal(1))
+        expect(sql).not_to(contain('EXISTS'))
+        expect([user.name for user in sql_query]).to(equal(['user']))
+
+    def test_reused_join_anchors_subquery(self):
+        self.query.add('domain', filter='eq', value='example.com')
+        self.query.param_order = self.query.get_param('domain')
+        sql_query = self.evaluate(self.session.query(User).join(User.email))
+        sql = self.sql_of(sql_query)
+        expect(sql).to(contain('domain_1.id = email.domain_id'))
+        expect(sorted(user.name for user in sql_query)).to(equal([
+            'other', 'user',
+        ]))
+
+    def test_outer_joins_are_not_reused(self):
+        sql_query = self.session.query(User).outerjoin(User.email)
+        expect(joined_relations_of(sql_query)).to(be_empty)
+
+    def test_joined_relations(self):
+        sql_query = self.session.query(User).join(
+            User.email
+        ).join(EMail.domain)
+        expect(list(joined_relations_of(sql_query).items())).to(equal([
+            ((User, 'email'), EMail),
+            ((EMail, 'domain'), Domain),
+        ]))
+
+    def test_base_query_joins_are_part_of_the_plan_key(self):
+        self.query_config.plan_cache = PlanCache()
+        self.query.add('mail', filter='eq', value='user@example.com')
+        self.query.param_order = self.query.get_param('mail')
+        self.evaluate()
+        self.evaluate(self.session.query(User).join(User.email))
+        expect(self.query_config.plan_cache.info().misses).to(equal(2))
+
+
+class ToManyJoinTest(BaseDatabaseTest):
+
+    def setUp(self):
+        super().setUp()
+        self.session.add(Domain(domain='example.com', emails=[
+            EMail(mail='a@example.com'),
+            EMail(mail='b@example.com'),
+            EMail(mail='c@example.com'),
+        ]))
+        self.session.add(Domain(domain='example.org', emails=[
+            EMail(mail='a@example.org'),
+        ]))
+        self.session.commit()
+        self.query_config = QueryConfig()
+        self.query_config.model = Domain
+        self.query_config.query = Query()
+        self.expressions = {
+            'domain': Domain.domain,
+            'mail': {
+                'param': 'mail',
+                'join': 'emails',
+            },
+            'joined_mail': {
+                'param': 'mail',
+                'join': 'emails',
+                'strategy': 'join',
+            },
+        }
+
+    def tearDown(self):
+        self.session.rollback()
+        super().tearDown()
+
+    @property
+    def query(self):
+        return self.query_config.query
+
+    def evaluate(self):
+        self.query_config.expressions = ExpressionHandler(
+            self.expressions,
+            Domain,
+        )
+        return Evaluation(self.query_config).evaluate(
+            self.session.query(Domain)
+        )
+
+    def test_detects_to_many(self):
+        handler = ExpressionHandler(self.expressions, Domain)
+        expect(handler.is_to_many(('emails',))).to(be_true)
+        expect(handler.strategy_of('mail')).to(equal('exists'))
+        expect(handler.strategy_of('joined_mail')).to(equal('join'))
+        expect(ExpressionHandler({}, User).is_to_many(
+            ('email', 'domain')
+        )).to(be_false)
+
+    def test_no_duplicate_rows(self):
+        self.query.add('mail', filter='like', value='%@example.com')
+        self.query.param_order = self.query.get_param('mail')
+        sql_query = self.evaluate()
+        expect(str(sql_query.statement)).to(contain('EXISTS'))
+        expect(
+            [domain.domain for domain in sql_query.all()]
+        ).to(equal(['example.com']))
+
+    def test_conditions_share_one_exists(self):
+        self.query.add('mail', filter='like', value='a@%', alias='first')
+        self.query.add('mail', filter='like', value='%.org', alias='second')
+        self.query.param_order = And(
+            self.query.get_aliased_param('first'),
+            self.query.get_aliased_param('second'),
+        )
+        sql_query = self.evaluate()
+        expect(str(sql_query.statement).count('EXISTS')).to(equal(1))
+        expect(
+            [domain.domain for domain in sql_query.all()]
+        ).to(equal(['example.org']))
+
+    def test_explicit_join(self):
+        self.query.add('joined_mail', filter='like', value='%@example.com')
+        self.query.param_order = self.query.get_param('joined_mail')
+        sql_query = self.evaluate()
+        expect(str(sql_query.statement)).not_to(contain('EXISTS'))
+        expect(sql_query.count()).to(equal(3))
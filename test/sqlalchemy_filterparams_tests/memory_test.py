@@ -0,0 +1,194 @@
+# -*- encoding: utf-8 -*-
+
+from datetime import date, datetime
+
+from expects import *
+
+from sqlalchemy_filterparams.filters import Filter
+from sqlalchemy_filterparams.memory import all_of, any_of, none_of
+from sqlalchemy_filterparams.query_binding_configuration import (
+    QueryBindingConfiguration
+)
+
+from sqlalchemy_filterparams_tests.database_test import BaseDatabaseTest
+from sqlalchemy_filterparams_tests.models import Domain, EMail, User
+
+
+def test_three_valued_logic():
+    expect(all_of([True, None])).to(be_none)
+    expect(all_of([None, False])).to(be_false)
+    expect(any_of([False, None])).to(be_none)
+    expect(any_of([None, True])).to(be_true)
+    expect(none_of(None)).to(be_none)
+    expect(none_of(True)).to(be_false)
+
+
+class MemoryEvaluationTest(BaseDatabaseTest):
+
+    def setUp(self):
+        super().setUp()
+        example = Domain(domain='example.com')
+        other = Domain(domain='other.org')
+        self.session.add_all([
+            User(
+                name='alice',
+                fullname='Alice A',
+                date_of_birth=date(1985, 10, 26),
+                created_at=datetime(2016, 1, 1),
+                email=EMail(mail='alice@example.com', domain=example),
+            ),
+            User(
+                name='bob',
+                fullname='Bob_B',
+                date_of_birth=date(1990, 1, 1),
+                created_at=datetime(2016, 1, 3),
+                email=EMail(mail='bob@other.org', domain=other),
+            ),
+            User(
+                name='carol',
+                date_of_birth=date(1975, 5, 5),
+                created_at=datetime(2016, 1, 2),
+                email=EMail(mail='carol@example.com'),
+            ),
+            User(name='dave', fullname='Dave D'),
+        ])
+        self.session.commit()
+
+        class UserBinding(QueryBindingConfiguration):
+            __config__ = {
+                'for': User,
+                'binding': {
+                    'name': 'name',
+                    'fullname': 'fullname',
+                    'birth_date': 'date_of_birth',
+                    'created_at': 'created_at',
+                    'mail': {
+                        'param': 'mail',
+                        'join': 'email',
+                    },
+                    'domain': {
+                        'param': 'domain',
+                        'join': ('email', 'domain'),
+                        'strategy': 'exists',
+                    },
+                },
+            }
+
+        class DomainBinding(QueryBindingConfiguration):
+            __config__ = {
+                'for': Domain,
+                'binding': {
+                    'domain': 'domain',
+                    'mail': {
+                        'param': 'mail',
+                        'join': 'emails',
+                    },
+                },
+            }
+
+        self.binding = UserBinding(self.session)
+        self.domain_binding = DomainBinding(self.session)
+        self.users = self.session.query(User).all()
+        self.domains = self.session.query(Domain).all()
+
+    def tearDown(self):
+        self.session.rollback()
+        self.session.expunge_all()
+        super().tearDown()
+
+    def expect_same(self, params, binding=None, items=None):
+        binding = binding or self.binding
+        if items is None:
+            items = self.users
+        expected = binding.fetch_params(params)
+        actual = binding.evaluate_items_params(items, params)
+        if 'filter[order]' in params:
+            expect(actual).to(equal(expected))
+        else:
+            expect(set(actual)).to(equal(set(expected)))
+        return actual
+
+    def test_matches_sql(self):
+        for params in [
+            {},
+            {'filter[param][name][eq]': 'bob'},
+            {'filter[param][name][neq]': 'bob'},
+            {'filter[param][fullname][neq]': 'Dave D'},
+            {'filter[param][birth_date][gte]': '1980-01-01'},
+            {'filter[param][created_at][lt]': '2016-01-03'},
+            {'filter[param][name][in]': 'alice,dave,zoe'},
+            {'filter[param][name][nin]': 'alice,dave'},
+            {'filter[param][fullname][like]': '%\\_%'},
+            {'filter[param][fullname][ilike]': 'alice%'},
+            {'filter[param][fullname][like]': 'bob%'},
+            {'filter[param][mail][like]': '%@example.com'},
+            {'filter[param][fullname][prefix]': 'Bob'},
+            {'filter[param][fullname][ieq]': 'ALICE A'},
+            {'filter[param][name][ilike]': 'BOB'},
+            {'filter[param][fullname][search]': 'E_'},
+            {'filter[param][domain][eq]': 'example.com'},
+            {
+                'filter[param][name][eq][a]': 'dave',
+                'filter[param][mail][like][b]': 'bob%',
+                'filter[binding]': 'a|b',
+            },
+            {
+                'filter[param][fullname][like][a]': 'Dave%',
+                'filter[binding]': '!a',
+            },
+        ]:
+            self.expect_same(params)
+
+    def test_order_matches_sql(self):
+        for order in [
+            'name',
+            'desc(created_at)',
+            ['desc(fullname)', 'name'],
+            'mail',
+        ]:
+            self.expect_same({'filter[order]': order})
+
+    def test_order_nulls_follow_dialect(self):
+        params = {'filter[order]': 'created_at'}
+        users = self.binding.evaluate_items_params(self.users, params)
+        expect([user.name for user in users]).to(equal([
+            'dave', 'alice', 'carol', 'bob',
+        ]))
+
+        users = self.binding.__class__().evaluate_items_params(
+            self.users,
+            params,
+        )
+        expect([user.name for user in users]).to(equal([
+            'alice', 'carol', 'bob', 'dave',
+        ]))
+
+    def test_to_many_exists(self):
+        actual = self.expect_same(
+            {'filter[param][mail][like]': 'bob%'},
+            self.domain_binding,
+            self.domains,
+        )
+        expect([domain.domain for domain in actual]).to(equal(['other.org']))
+
+    def test_dicts(self):
+        items = [
+            {'name': 'a', 'email': {'mail': 'a@example.com'}},
+            {'name': 'b', 'email': None},
+            {'name': 'c', 'email': {'mail': 'c@example.org'}},
+        ]
+        result = self.binding.evaluate_items_params(items, {
+            'filter[param][mail][like]': '%.com',
+        })
+        expect(result).to(equal([items[0]]))
+        result = self.binding.evaluate_items_params(items, {
+            'filter[order]': 'desc(name)',
+        })
+        expect([item['name'] for item in result]).to(equal(['c', 'b', 'a']))
+
+    def test_unsupported_filter(self):
+        class BetweenFilter(Filter):
+            name = 'between'
+
+        expect(lambda: BetweenFilter({}).matcher(1)(1)).to(
+            raise_error(ValueError))
@@ -0,0 +1,104 @@
+# -*- encoding: utf-8 -*-
+
+from expects import *
+
+from sqlalchemy import Integer
+
+from sqlalchemy_filterparams.expression import ExpressionItem
+from sqlalchemy_filterparams.filters import (
+    EqFilter,
+    NeqFilter,
+    DEFAULT_FILTERS,
+)
+from sqlalchemy_filterparams.query_binding_configuration import (
+    QueryBindingConfiguration
+)
+from sqlalchemy_filterparams.util import DEFAULT_CONVERTERS
+
+from sqlalchemy_filterparams_tests.models import User
+
+
+class BaseConfig(QueryBindingConfiguration):
+    __config__ = {
+        'filters': [EqFilter, NeqFilter],
+        'converters': {
+            Integer: int,
+        },
+        'default_filter': 'neq',
+    }
+
+
+class UserConfig(BaseConfig):
+    __config__ = {
+        'for': User,
+        'binding': {
+            'name': User.name,
+            'mail': {
+                'param': 'mail',
+                'join': 'email',
+            },
+        },
+    }
+
+
+class NestedUserConfig(UserConfig):
+    __config__ = {}
+
+
+def test_metadata_resolved_once():
+    expect(UserConfig.metadata()).to(be(UserConfig.metadata()))
+
+
+def test_metadata_per_subclass():
+    expect(NestedUserConfig.metadata()).to_not(
+        be(UserConfig.metadata()))
+
+
+def test_metadata_frozen():
+    def set_model():
+        UserConfig.metadata().model = None
+
+    expect(set_model).to(raise_error(AttributeError))
+
+
+def test_metadata_inherits_through_hierarchy():
+    metadata = NestedUserConfig.metadata()
+    expect(metadata.model).to(be(User))
+    expect(metadata.filter_names).to(equal(('eq', 'neq')))
+    expect(metadata.filters['neq']).to(be(NeqFilter))
+    expect(metadata.converters).to(equal({Integer: int}))
+    expect(metadata.default_filter).to(equal('neq'))
+
+
+def test_metadata_defaults():
+    class DefaultConfig(QueryBindingConfiguration):
+        __config__ = {'for': User}
+
+    metadata = DefaultConfig.metadata()
+    expect(list(metadata.filters.values())).to(
+        contain_exactly(*DEFAULT_FILTERS))
+    expect(metadata.converters).to(equal(DEFAULT_CONVERTERS))
+    expect(metadata.default_filter).to(equal('eq'))
+
+
+def test_metadata_resolves_expression_items():
+    item = UserConfig.metadata().bindings['mail']
+    expect(item).to(be_a(ExpressionItem))
+    expect(item.join_path).to(equal(('email',)))
+    expect(item.param).to(equal('mail'))
+
+
+def test_metadata_parser():
+    query = UserConfig.metadata().parser({
+        'filter[param][name]': 'user',
+    })
+    expect(query.get_param('name').filter).to(equal('neq'))
+
+
+def test_reset_metadata():
+    class ResetConfig(UserConfig):
+        __config__ = {}
+
+    metadata = ResetConfig.metadata()
+    ResetConfig.reset_metadata()
+    expect(ResetConfig.metadata()).to_not(be(metadata))
@@ -5,6 +5,7 @@ from sqlalchemy import (
     Integer,
     Unicode,
 )
+from sqlalchemy.orm import relationship
 
 from .base import Base
 
@@ -14,3 +15,5 @@ class Domain(Base):
 
     id = Column(Integer, primary_key=True)
     domain = Column(Unicode)
+
+    emails = relationship('EMail', back_populates='domain')
@@ -18,4 +18,4 @@ class EMail(Base):
     mail = Column(Unicode)
     domain_id = Column(Integer, ForeignKey('domain.id'))
 
-    domain = relationship('Domain')
+    domain = relationship('Domain', back_populates='emails')
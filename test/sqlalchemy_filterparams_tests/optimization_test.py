@@ -0,0 +1,149 @@
+# -*- encoding: utf-8 -*-
+
+from expects import *
+
+from filterparams.obj import (
+    Query,
+    And,
+    Or,
+    Not,
+)
+
+from sqlalchemy_filterparams.filters import (
+    DEFAULT_FILTERS,
+    EqFilter,
+    NeqFilter,
+)
+from sqlalchemy_filterparams.optimization import (
+    AllOf,
+    AnyOf,
+    Negation,
+    Term,
+    TreeOptimizer,
+    fold,
+)
+from sqlalchemy_filterparams.plan import QueryShape
+
+
+def filter_map(filters=None):
+    return dict(
+        (filter_cl.name, filter_cl)
+        for filter_cl in (filters or DEFAULT_FILTERS)
+    )
+
+
+def build_query(*params):
+    query = Query()
+    for name, filter_name, alias in params:
+        query.add(name, filter=filter_name, value=alias, alias=alias)
+    return query
+
+
+def optimize(query, filters=None):
+    return TreeOptimizer(
+        QueryShape(query),
+        filter_map(filters),
+    ).optimize(query.param_order)
+
+
+def test_fold_deep_tree():
+    tree = 0
+    for index in range(1, 5000):
+        tree = (tree, index)
+    total = fold(
+        tree,
+        lambda node: node if isinstance(node, tuple) else (),
+        lambda node, children: sum(children) if children else node,
+    )
+    expect(total).to(equal(sum(range(5000))))
+
+
+def test_flatten_and_chain():
+    query = build_query(
+        ('name', 'eq', 'a'),
+        ('fullname', 'eq', 'b'),
+        ('created_at', 'gt', 'c'),
+    )
+    query.param_order = And(
+        And(query.get_aliased_param('a'), query.get_aliased_param('b')),
+        query.get_aliased_param('c'),
+    )
+    tree = optimize(query)
+    expect(tree).to(be_a(AllOf))
+    expect([child.name for child in tree.children]).to(
+        equal(['name', 'fullname', 'created_at']))
+
+
+def test_double_not_removed():
+    query = build_query(('name', 'eq', 'a'))
+    query.param_order = Not(Not(query.get_aliased_param('a')))
+    tree = optimize(query)
+    expect(tree).to(be_a(Term))
+
+
+def test_single_not_kept():
+    query = build_query(('name', 'eq', 'a'))
+    query.param_order = Not(query.get_aliased_param('a'))
+    expect(optimize(query)).to(be_a(Negation))
+
+
+def test_duplicate_predicates_removed():
+    query = build_query(('name', 'gt', 'a'), ('fullname', 'eq', 'b'))
+    param = query.get_aliased_param('a')
+    query.param_order = And(
+        param,
+        And(query.get_aliased_param('b'), param),
+    )
+    tree = optimize(query)
+    expect(len(tree.children)).to(equal(2))
+
+
+def test_eq_or_chain_merged_to_in():
+    query = build_query(
+        ('name', 'eq', 'a'),
+        ('name', 'eq', 'b'),
+        ('name', 'eq', 'c'),
+        ('fullname', 'eq', 'd'),
+    )
+    query.param_order = Or(
+        Or(
+            Or(query.get_aliased_param('a'), query.get_aliased_param('b')),
+            query.get_aliased_param('d'),
+        ),
+        query.get_aliased_param('c'),
+    )
+    tree = optimize(query)
+    expect(tree).to(be_a(AnyOf))
+    merged, fullname = tree.children
+    expect(merged.filter).to(equal('in'))
+    expect(merged.slots).to(equal((0, 1, 3)))
+    expect(fullname.filter).to(equal('eq'))
+
+
+def test_neq_and_chain_merged_to_nin():
+    query = build_query(('name', 'neq', 'a'), ('name', 'neq', 'b'))
+    query.param_order = And(
+        query.get_aliased_param('a'),
+        query.get_aliased_param('b'),
+    )
+    tree = optimize(query)
+    expect(tree).to(be_a(Term))
+    expect(tree.filter).to(equal('nin'))
+
+
+def test_no_merge_without_in_filter():
+    query = build_query(('name', 'eq', 'a'), ('name', 'eq', 'b'))
+    query.param_order = Or(
+        query.get_aliased_param('a'),
+        query.get_aliased_param('b'),
+    )
+    tree = optimize(query, [EqFilter, NeqFilter])
+    expect(tree).to(be_a(AnyOf))
+    expect(len(tree.children)).to(equal(2))
+
+
+def test_unknown_item():
+    query = Query()
+    query.param_order = 'unknown'
+    expect(lambda: TreeOptimizer(None, filter_map()).optimize(
+        query.param_order)).to(raise_error(ValueError))
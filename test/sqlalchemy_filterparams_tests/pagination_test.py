@@ -0,0 +1,175 @@
+# -*- encoding: utf-8 -*-
+
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from expects import *
+
+from sqlalchemy_filterparams.pagination import (
+    CursorSigner,
+    KeysetPaginator,
+    _decode_value,
+    _encode_value,
+)
+from sqlalchemy_filterparams.query_binding_configuration import (
+    QueryBindingConfiguration
+)
+
+from sqlalchemy_filterparams_tests.database_test import BaseDatabaseTest
+from sqlalchemy_filterparams_tests.models import User
+
+
+def test_value_round_trip():
+    for value in [
+        datetime(2016, 1, 1, 18, 30, 1, 5),
+        date(2016, 1, 1),
+        time(4, 0),
+        Decimal('3.10'),
+        'text',
+        3,
+        None,
+    ]:
+        expect(_decode_value(_encode_value(value))).to(equal(value))
+
+
+def test_unknown_value_type():
+    expect(lambda: _encode_value(object())).to(raise_error(ValueError))
+
+
+def test_signer_round_trip():
+    signer = CursorSigner('secret')
+    expect(signer.loads(signer.dumps({'a': 1}))).to(equal({'a': 1}))
+
+
+def test_signer_rejects_tampering():
+    token = CursorSigner('secret').dumps({'a': 1})
+    expect(lambda: CursorSigner('other').loads(token)).to(
+        raise_error(ValueError))
+    expect(lambda: CursorSigner('secret').loads('abc')).to(
+        raise_error(ValueError))
+
+
+def test_seek_nulls_last():
+    paginator = KeysetPaginator(None, User, None, 'postgresql')
+    sort_keys = [('fullname', User.fullname, 'asc'), ('id', User.id, 'asc')]
+    clause = paginator.seek_clause(sort_keys, ['a', 1])
+    expect(str(clause)).to(contain('users.fullname IS NULL'))
+    clause = paginator.seek_clause(sort_keys, [None, 1])
+    expect(str(clause)).to(equal(
+        'false OR users.fullname IS NULL AND users.id > :param_1'))
+
+
+def test_seek_nulls_first():
+    paginator = KeysetPaginator(None, User, None, 'sqlite')
+    sort_keys = [('fullname', User.fullname, 'asc'), ('id', User.id, 'asc')]
+    clause = paginator.seek_clause(sort_keys, [None, 1])
+    expect(str(clause)).to(contain('users.fullname IS NOT NULL'))
+    clause = paginator.seek_clause(sort_keys, ['a', 1])
+    expect(str(clause)).not_to(contain('IS NULL'))
+
+
+class PaginationTest(BaseDatabaseTest):
+
+    def create_cl(self):
+        class Config(QueryBindingConfiguration):
+            __config__ = {
+                'for': User,
+                'binding': {
+                    'name': 'name',
+                    'fullname': 'fullname',
+                    'created_at': 'created_at',
+                },
+                'cursor_secret': 'secret',
+            }
+        return Config
+
+    def setUp(self):
+        super().setUp()
+        self.config_cl = self.create_cl()
+        for index, name in enumerate(['a', 'b', 'b', 'c', 'd', 'd', 'e']):
+            self.session.add(User(
+                name=name,
+                fullname='group%d' % (index % 2),
+                created_at=datetime(2015, 10, 21 - index),
+            ))
+        self.session.commit()
+
+    def paginate(self, params, limit=3, cursor=None):
+        return self.config_cl(self.session).paginate_params(
+            params, limit, cursor)
+
+    def collect(self, params, limit=3):
+        pages = [self.paginate(params, limit)]
+        while pages[-1].has_next:
+            pages.append(self.paginate(params, limit, pages[-1].next_cursor))
+        return pages
+
+    def test_pages_cover_all_rows(self):
+        pages = self.collect({'filter[order]': 'name'})
+        expect([len(page) for page in pages]).to(equal([3, 3, 1]))
+        ids = [user.id for page in pages for user in page]
+        expect(sorted(ids)).to(equal(list(range(1, 8))))
+        names = [user.name for page in pages for user in page]
+        expect(names).to(equal(sorted(names)))
+
+    def test_pages_desc(self):
+        pages = self.collect({'filter[order]': 'desc(name)'}, limit=2)
+        names = [user.name for page in pages for user in page]
+        expect(names).to(equal(['e', 'd', 'd', 'c', 'b', 'b', 'a']))
+
+    def test_pages_mixed_directions(self):
+        params = {'filter[order]': ['fullname', 'desc(created_at)']}
+        pages = self.collect(params, limit=2)
+        users = [user for page in pages for user in page]
+        expected = self.session.query(User).order_by(
+            User.fullname, User.created_at.desc()).all()
+        expect([user.id for user in users]).to(
+            equal([user.id for user in expected]))
+
+    def test_pages_with_null_keys(self):
+        for user in self.session.query(User).filter(User.id.in_([2, 3, 6])):
+            user.fullname = None
+        self.session.commit()
+        for order in ['fullname', 'desc(fullname)']:
+            pages = self.collect({'filter[order]': [order, 'name']}, limit=1)
+            expected = self.session.query(User).order_by(
+                User.fullname.desc() if order.startswith('desc')
+                else User.fullname,
+                User.name,
+                User.id,
+            ).all()
+            expect([user.id for page in pages for user in page]).to(
+                equal([user.id for user in expected]))
+
+    def test_pages_with_filter(self):
+        pages = self.collect({
+            'filter[param][name][gt]': 'b',
+            'filter[order]': 'name',
+        }, limit=2)
+        names = [user.name for page in pages for user in page]
+        expect(names).to(equal(['c', 'd', 'd', 'e']))
+
+    def test_cursor_bound_to_order(self):
+        page = self.paginate({'filter[order]': 'name'})
+        expect(lambda: self.paginate(
+            {'filter[order]': 'desc(name)'}, cursor=page.next_cursor,
+        )).to(raise_error(ValueError))
+
+    def test_empty_query(self):
+        page = self.paginate({
+            'filter[param][name][gt][a]': 'e',
+            'filter[param][name][lt][b]': 'a',
+            'filter[binding]': 'a&b',
+        })
+        expect(page.items).to(equal([]))
+        expect(page.has_next).to(be_false)
+
+    def test_limit_must_be_positive(self):
+        expect(lambda: self.paginate({}, limit=0)).to(
+            raise_error(ValueError))
+        expect(lambda: self.paginate({}, limit=-1)).to(
+            raise_error(ValueError))
+
+    def test_secret_required(self):
+        del self.config_cl.__config__['cursor_secret']
+        expect(lambda: self.paginate({})).to(raise_error(RuntimeError))
@@ -0,0 +1,161 @@
+# -*- encoding: utf-8 -*-
+
+from datetime import date, datetime
+
+from expects import *
+
+from filterparams.obj import (
+    Query,
+    And,
+    Or,
+    Not,
+    Order,
+)
+
+from sqlalchemy_filterparams.plan import (
+    PlanCache,
+    QueryShape,
+)
+from sqlalchemy_filterparams.query_binding_configuration import (
+    QueryBindingConfiguration
+)
+
+from sqlalchemy_filterparams_tests.database_test import BaseDatabaseTest
+from sqlalchemy_filterparams_tests.models import User
+
+
+def build_query(name_value, fullname_value):
+    query = Query()
+    query.add('name', filter='eq', value=name_value)
+    query.add('fullname', filter='like', value=fullname_value)
+    query.param_order = Or(
+        query.get_param('name'),
+        Not(query.get_param('fullname')),
+    )
+    query.orders = [Order('name', 'desc')]
+    return query
+
+
+def test_shape_key_ignores_values():
+    first = QueryShape(build_query('a', 'b%'))
+    second = QueryShape(build_query('c', 'd%'))
+    expect(first.key).to(equal(second.key))
+    expect(first.values).to(equal(['a', 'b%']))
+    expect(second.values).to(equal(['c', 'd%']))
+
+
+def test_shape_key_respects_structure():
+    first = build_query('a', 'b')
+    second = build_query('a', 'b')
+    second.param_order = And(
+        second.get_param('name'),
+        Not(second.get_param('fullname')),
+    )
+    expect(QueryShape(first).key).to_not(
+        equal(QueryShape(second).key))
+
+
+def test_shape_key_respects_orders():
+    first = build_query('a', 'b')
+    second = build_query('a', 'b')
+    second.orders = [Order('name', 'asc')]
+    expect(QueryShape(first).key).to_not(
+        equal(QueryShape(second).key))
+
+
+def test_shape_reuses_slot_for_same_parameter():
+    query = Query()
+    query.add('name', filter='eq', value='a')
+    query.param_order = And(
+        query.get_param('name'),
+        query.get_param('name'),
+    )
+    shape = QueryShape(query)
+    expect(shape.values).to(equal(['a']))
+
+
+def test_cache_hit_and_miss():
+    cache = PlanCache(2)
+    expect(cache.get('a')).to(be_none)
+    cache.put('a', 1)
+    expect(cache.get('a')).to(equal(1))
+    info = cache.info()
+    expect(info.hits).to(equal(1))
+    expect(info.misses).to(equal(1))
+    expect(info.currsize).to(equal(1))
+
+
+def test_cache_evicts_least_recently_used():
+    cache = PlanCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    expect(cache.get('b')).to(be_none)
+    expect(cache.get('a')).to(equal(1))
+    expect(cache.info().evictions).to(equal(1))
+
+
+def test_disabled_cache_stores_nothing():
+    cache = PlanCache(0)
+    expect(cache.get_or_compile('a', lambda: 1)).to(equal(1))
+    expect(len(cache)).to(equal(0))
+
+
+class PlanCacheBindingTest(BaseDatabaseTest):
+
+    def create_cl(self):
+        class Config(QueryBindingConfiguration):
+            __config__ = {
+                'for': User,
+                'sessionmaker': self.Session,
+                'binding': {
+                    'name': 'name',
+                    'mail': {
+                        'param': 'mail',
+                        'join': 'email'
+                    },
+                },
+                'plan_cache_size': 1,
+            }
+        return Config
+
+    def setUp(self):
+        super().setUp()
+        self.config_cl = self.create_cl()
+        self.session.add(User(
+            name='user',
+            fullname='The User',
+            date_of_birth=date(1985, 10, 26),
+            created_at=datetime(2015, 10, 21),
+        ))
+        self.session.commit()
+
+    def evaluate(self, params):
+        return self.config_cl().evaluate_params(params)
+
+    def test_values_rebound_on_hit(self):
+        query = self.evaluate({'filter[param][name][eq]': 'user'})
+        expect(query.first()).to_not(be_none)
+        query = self.evaluate({'filter[param][name][eq]': 'other'})
+        expect(query.first()).to(be_none)
+
+        info = self.config_cl.plan_cache().info()
+        expect(info.hits).to(equal(1))
+        expect(info.misses).to(equal(1))
+
+    def test_eviction_on_new_shape(self):
+        self.evaluate({'filter[param][name][eq]': 'user'})
+        self.evaluate({'filter[param][mail][eq]': 'user'})
+        info = self.config_cl.plan_cache().info()
+        expect(info.evictions).to(equal(1))
+        expect(info.currsize).to(equal(1))
+
+    def test_cache_per_subclass(self):
+        class NestedConfig(self.config_cl):
+            __config__ = {}
+
+        self.evaluate({'filter[param][name][eq]': 'user'})
+        expect(NestedConfig.plan_cache()).to_not(
+            be(self.config_cl.plan_cache()))
+        expect(NestedConfig.plan_cache().info().currsize).to(equal(0))
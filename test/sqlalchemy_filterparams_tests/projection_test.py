@@ -0,0 +1,125 @@
+# -*- encoding: utf-8 -*-
+
+from datetime import date
+
+from expects import *
+
+from sqlalchemy import inspect
+
+from sqlalchemy_filterparams.projection import fields_of
+from sqlalchemy_filterparams.query_binding_configuration import (
+    QueryBindingConfiguration
+)
+from sqlalchemy_filterparams.result_cache import LRUResultCache
+
+from sqlalchemy_filterparams_tests.database_test import BaseDatabaseTest
+from sqlalchemy_filterparams_tests.models import EMail, User
+
+
+def test_fields_of():
+    expect(fields_of({})).to(be_none)
+    expect(fields_of({'fields': ' , '})).to(be_none)
+    expect(fields_of({'fields': 'name, id,name'})).to(
+        equal(('name', 'id')))
+    expect(fields_of({'fields': ['id', 'name']})).to(
+        equal(('id', 'name')))
+
+
+class ProjectionTest(BaseDatabaseTest):
+
+    def setUp(self):
+        super().setUp()
+        for index, name in enumerate(['alice', 'bob', 'carol']):
+            self.session.add(User(
+                name=name,
+                fullname=name.title(),
+                date_of_birth=date(1980 + index, 1, 1),
+                email=EMail(mail='%s@example.com' % name),
+            ))
+        self.session.commit()
+        self.session.expunge_all()
+
+        class UserBinding(QueryBindingConfiguration):
+            __config__ = {
+                'for': User,
+                'binding': {
+                    'id': 'id',
+                    'name': 'name',
+                    'fullname': 'fullname',
+                    'birth_date': 'date_of_birth',
+                    'mail': {
+                        'param': 'mail',
+                        'join': 'email',
+                    },
+                },
+            }
+
+        self.binding_cl = UserBinding
+
+    def tearDown(self):
+        self.session.rollback()
+        self.session.expunge_all()
+        super().tearDown()
+
+    def test_load_only_fields(self):
+        users = self.binding_cl(self.session).fetch_params({
+            'fields': 'name',
+            'filter[param][mail][like]': 'b%',
+        })
+        expect([user.name for user in users]).to(equal(['bob']))
+        expect(inspect(users[0]).unloaded).to(
+            contain('fullname', 'date_of_birth'))
+        expect(inspect(users[0]).unloaded).not_to(contain('name', 'id'))
+
+    def test_all_columns_without_fields(self):
+        user, = self.binding_cl(self.session).fetch_params({
+            'filter[param][name][eq]': 'bob',
+        })
+        expect(inspect(user).unloaded).not_to(contain('fullname'))
+
+    def test_rows(self):
+        rows = self.binding_cl(self.session).fetch_rows_params({
+            'fields': 'name,birth_date',
+            'filter[param][birth_date][gte]': '1981-01-01',
+            'filter[order]': 'desc(name)',
+        })
+        expect([tuple(row) for row in rows]).to(equal([
+            ('carol', date(1982, 1, 1)),
+            ('bob', date(1981, 1, 1)),
+        ]))
+        expect(rows[0].birth_date).to(equal(date(1982, 1, 1)))
+        expect(self.session.identity_map).to(be_empty)
+
+    def test_rows_default_to_all_columns(self):
+        row, = self.binding_cl(self.session).fetch_rows_params({
+            'filter[param][mail][eq]': 'alice@example.com',
+        })
+        expect(row._fields).to(
+            equal(('id', 'name', 'fullname', 'birth_date')))
+
+    def test_rows_cached(self):
+        result_cache = LRUResultCache()
+        self.binding_cl.__config__['result_cache'] = result_cache
+        self.binding_cl.reset_metadata()
+        params = {'fields': 'id,name', 'filter[param][name][eq]': 'bob'}
+        binding = self.binding_cl(self.session)
+        try:
+            first = binding.fetch_rows_params(params)
+            second = binding.fetch_rows_params(params)
+        finally:
+            del self.binding_cl.__config__['result_cache']
+            self.binding_cl.reset_metadata()
+        expect([tuple(row) for row in second]).to(
+            equal([tuple(row) for row in first]))
+        expect(second[0].name).to(equal('bob'))
+        expect(result_cache.hits).to(equal(1))
+
+    def test_unknown_field(self):
+        expect(lambda: self.binding_cl(self.session).fetch_params({
+            'fields': 'name,password',
+        })).to(raise_error(KeyError))
+
+    def test_joined_field(self):
+        expect(lambda: self.binding_cl(self.session).fetch_rows_params({
+            'fields': 'mail',
+        })).to(raise_error(ValueError, contain('mail')))
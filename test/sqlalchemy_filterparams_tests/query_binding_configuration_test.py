@@ -98,3 +98,19 @@ class QueryBindingConfigurationTest(BaseDatabaseTest):
         del self.config_cl.__config__['for']
         expect(lambda: self.config_cl().evaluate_params({})).to(
             raise_error(RuntimeError))
+
+    def test_bound_param_evaluation(self):
+        self.config_cl.__config__['bind_params'] = True
+        query = self.config_cl().evaluate_params({
+            'filter[param][name][eq]': 'user'
+        })
+        expect(query.first()).to_not(be_none)
+
+    def test_bound_param_evaluation_separately(self):
+        self.config_cl.__config__['bind_params'] = True
+        query, params = self.config_cl().evaluate_params_separately({
+            'filter[param][name][eq]': 'nobody'
+        })
+        expect(params).to(equal({'name_eq': 'nobody'}))
+        expect(query.params(params).first()).to(be_none)
+        expect(query.params(name_eq='user').first()).to_not(be_none)
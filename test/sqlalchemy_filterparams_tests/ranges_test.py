@@ -0,0 +1,218 @@
+# -*- encoding: utf-8 -*-
+
+from datetime import date, datetime
+
+from expects import *
+
+from filterparams.obj import Query, And, Or
+from sqlalchemy import Column, Integer, Unicode, event
+from sqlalchemy.orm import declarative_base
+
+from sqlalchemy_filterparams.evaluation import Evaluation
+from sqlalchemy_filterparams.expression import ExpressionHandler
+from sqlalchemy_filterparams.query_binding_configuration import (
+    QueryBindingConfiguration
+)
+from sqlalchemy_filterparams.query_config import QueryConfig
+from sqlalchemy_filterparams.ranges import ValueRange
+from sqlalchemy_filterparams.util import is_empty
+
+from sqlalchemy_filterparams_tests.database_test import BaseDatabaseTest
+from sqlalchemy_filterparams_tests.models import User
+
+
+CollatedBase = declarative_base()
+
+
+class Fruit(CollatedBase):
+    __tablename__ = 'fruits'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(Unicode(collation='NOCASE'))
+
+
+def test_range_tightest_bounds():
+    value_range = ValueRange.of([
+        ('gt', 1), ('gte', 3), ('lt', 10), ('lte', 8),
+    ])
+    expect(value_range.lower).to(equal(3))
+    expect(value_range.lower_inclusive).to(be_true)
+    expect(value_range.upper).to(equal(8))
+    expect(value_range.upper_inclusive).to(be_true)
+
+
+def test_range_exclusive_wins_on_tie():
+    value_range = ValueRange.of([('gte', 3), ('gt', 3)])
+    expect(value_range.lower_inclusive).to(be_false)
+
+
+def test_range_empty():
+    expect(ValueRange.of([('gt', 10), ('lt', 5)]).is_empty).to(be_true)
+    expect(ValueRange.of([('gt', 5), ('lt', 5)]).is_empty).to(be_true)
+    expect(ValueRange.of([('eq', 5), ('eq', 6)]).is_empty).to(be_true)
+    expect(ValueRange.of([('gte', 5), ('lte', 5)]).is_empty).to(be_false)
+
+
+def test_range_point():
+    value_range = ValueRange.of([('eq', 5), ('gte', 1)])
+    expect(value_range.is_point).to(be_true)
+    expect(value_range.is_empty).to(be_false)
+
+
+class RangeEvaluationTest(BaseDatabaseTest):
+
+    def setUp(self):
+        super().setUp()
+        self.session.add(User(
+            name='user',
+            date_of_birth=date(1985, 10, 26),
+            created_at=datetime(2015, 10, 21),
+        ))
+        self.session.commit()
+        self.query_config = QueryConfig()
+        self.query_config.model = User
+        self.query_config.expressions = ExpressionHandler({
+            'name': User.name,
+            'birth_date': User.date_of_birth,
+        }, User)
+        self.query_config.query = Query()
+
+    @property
+    def query(self):
+        return self.query_config.query
+
+    def add_bounds(self, *bounds):
+        param_order = None
+        for index, (filter_name, value) in enumerate(bounds):
+            alias = 'birth%d' % index
+            self.query.add('birth_date', filter=filter_name,
+                           value=value, alias=alias)
+            param = self.query.get_aliased_param(alias)
+            param_order = param if param_order is None else And(
+                param_order, param)
+        return param_order
+
+    def evaluate(self):
+        return Evaluation(self.query_config).evaluate(
+            self.session.query(User))
+
+    def test_bounds_merged_to_between(self):
+        self.query.param_order = self.add_bounds(
+            ('gt', '1980-01-01'),
+            ('gte', '1985-01-01'),
+            ('lte', '1990-01-01'),
+        )
+        sql_query = self.evaluate()
+        where_clause = str(sql_query).split('WHERE')[1]
+        expect(where_clause).to(contain('BETWEEN'))
+        expect(where_clause.count('date_of_birth')).to(equal(1))
+        expect(sql_query.first()).to_not(be_none)
+
+    def test_bounds_merged_exclusive(self):
+        self.query.param_order = self.add_bounds(
+            ('gt', '1980-01-01'),
+            ('lt', '1990-01-01'),
+            ('lt', '1986-01-01'),
+        )
+        sql_query = self.evaluate()
+        expect(str(sql_query)).to_not(contain('BETWEEN'))
+        expect(sql_query.first()).to_not(be_none)
+
+    def test_contradiction_marks_empty(self):
+        self.query.param_order = self.add_bounds(
+            ('gt', '1990-01-01'),
+            ('lt', '1980-01-01'),
+        )
+        sql_query = self.evaluate()
+        expect(is_empty(sql_query)).to(be_true)
+        expect(sql_query.first()).to(be_none)
+
+    def test_contradiction_in_or_branch(self):
+        self.query.add('name', filter='eq', value='user')
+        self.query.param_order = Or(
+            self.add_bounds(('gt', '1990-01-01'), ('lt', '1980-01-01')),
+            self.query.get_param('name'),
+        )
+        sql_query = self.evaluate()
+        expect(is_empty(sql_query)).to(be_false)
+        expect(sql_query.first()).to_not(be_none)
+
+    def test_bound_range_params(self):
+        self.query_config.bind_params = True
+        self.query.param_order = self.add_bounds(
+            ('gte', '1980-01-01'),
+            ('lt', '1990-01-01'),
+        )
+        _, params = Evaluation(self.query_config).evaluate_separately(
+            self.session.query(User))
+        expect(params).to(equal({
+            'birth_date_lower': date(1980, 1, 1),
+            'birth_date_upper': date(1990, 1, 1),
+        }))
+
+
+class EmptyFetchTest(BaseDatabaseTest):
+
+    def test_fetch_skips_database(self):
+        class Config(QueryBindingConfiguration):
+            __config__ = {
+                'for': User,
+                'binding': {'birth_date': 'date_of_birth'},
+            }
+
+        statements = []
+
+        def count_statement(*args):
+            statements.append(args)
+
+        event.listen(self.engine, 'before_cursor_execute', count_statement)
+        try:
+            result = Config(self.session).fetch_params({
+                'filter[param][birth_date][gt][a]': '1990-01-01',
+                'filter[param][birth_date][lt][b]': '1980-01-01',
+                'filter[binding]': 'a&b',
+            })
+        finally:
+            event.remove(self.engine, 'before_cursor_execute',
+                         count_statement)
+        expect(result).to(equal([]))
+        expect(statements).to(be_empty)
+
+
+class CollationTest(BaseDatabaseTest):
+
+    def setUp(self):
+        super().setUp()
+        CollatedBase.metadata.create_all(self.engine)
+        self.session.add(Fruit(name='apple'))
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.rollback()
+        self.session.expunge_all()
+        CollatedBase.metadata.drop_all(self.engine)
+        super().tearDown()
+
+    def fetch(self, params):
+        class FruitBinding(QueryBindingConfiguration):
+            __config__ = {
+                'for': Fruit,
+                'binding': {'name': 'name'},
+            }
+
+        return [
+            fruit.name
+            for fruit in FruitBinding(self.session).fetch_params(params)
+        ]
+
+    def test_string_bounds_follow_collation(self):
+        expect(self.fetch({
+            'filter[param][name][eq][a]': 'apple',
+            'filter[param][name][eq][b]': 'APPLE',
+            'filter[binding]': 'a&b',
+        })).to(equal(['apple']))
+        expect(self.fetch({
+            'filter[param][name][gte][lo]': 'a',
+            'filter[param][name][lte][hi]': 'B',
+            'filter[binding]': 'lo&hi',
+        })).to(equal(['apple']))
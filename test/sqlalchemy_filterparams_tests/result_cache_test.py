@@ -0,0 +1,235 @@
+# -*- encoding: utf-8 -*-
+
+import shutil
+import tempfile
+
+from unittest import TestCase
+
+from expects import *
+
+from sqlalchemy import create_engine, event, select
+
+from sqlalchemy_filterparams.instrumentation import Aggregator
+from sqlalchemy_filterparams.query_binding_configuration import (
+    QueryBindingConfiguration
+)
+from sqlalchemy_filterparams.result_cache import (
+    FileResultCache,
+    LRUResultCache,
+    key_of,
+    tables_of,
+)
+
+from sqlalchemy_filterparams_tests.database_test import BaseDatabaseTest
+from sqlalchemy_filterparams_tests.models import EMail, User
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class LRUResultCacheTest(TestCase):
+
+    def create_cache(self, **kwargs):
+        cache = LRUResultCache(**kwargs)
+        cache.now = self.clock = Clock()
+        return cache
+
+    def test_get_put(self):
+        cache = self.create_cache()
+        expect(cache.get('key', ['users'])).to(be_none)
+        cache.put('key', ['users'], [1, 2])
+        expect(cache.get('key', ['users'])).to(equal([1, 2]))
+        expect((cache.hits, cache.misses)).to(equal((1, 1)))
+
+    def test_ttl(self):
+        cache = self.create_cache(ttl=10)
+        cache.put('key', ['users'], [1])
+        self.clock.now += 5
+        expect(cache.get('key', ['users'])).to(equal([1]))
+        self.clock.now += 6
+        expect(cache.get('key', ['users'])).to(be_none)
+        expect(cache).to(have_len(0))
+
+    def test_eviction(self):
+        cache = self.create_cache(maxsize=2)
+        cache.put('a', [], 1)
+        cache.put('b', [], 2)
+        cache.get('a', [])
+        cache.put('c', [], 3)
+        expect(cache.get('b', [])).to(be_none)
+        expect(cache.get('a', [])).to(equal(1))
+        expect(cache.evictions).to(equal(1))
+
+    def test_invalidate_by_table(self):
+        cache = self.create_cache()
+        cache.put('users', ['users'], 1)
+        cache.put('joined', ['users', 'email'], 2)
+        cache.put('domain', ['domain'], 3)
+        cache.invalidate('email')
+        expect(cache.get('users', ['users'])).to(equal(1))
+        expect(cache.get('joined', ['users', 'email'])).to(be_none)
+        expect(cache.get('domain', ['domain'])).to(equal(3))
+
+
+class FileResultCacheTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        cache = FileResultCache(self.directory)
+        cache.put('key', ['users'], {'a': [1, 2]})
+        other_cache = FileResultCache(self.directory)
+        expect(other_cache.get('key', ['users'])).to(equal({'a': [1, 2]}))
+        cache.invalidate('users')
+        expect(cache.get('key', ['users'])).to(be_none)
+
+    def test_invalidate_across_instances(self):
+        cache = FileResultCache(self.directory)
+        other_cache = FileResultCache(self.directory)
+        cache.put('key', ['users'], 1)
+        other_cache.invalidate('users')
+        expect(cache.get('key', ['users'])).to(be_none)
+        other_cache.put('key', ['users'], 2)
+        expect(cache.get('key', ['users'])).to(equal(2))
+
+    def test_eviction_keeps_slack(self):
+        cache = FileResultCache(self.directory, maxsize=10)
+        for key in range(11):
+            cache.put(str(key), [], key)
+        expect(cache).to(have_len(9))
+        expect(cache.evictions).to(equal(2))
+
+    def test_eviction_and_clear(self):
+        cache = FileResultCache(self.directory, maxsize=2)
+        for key in ('a', 'b', 'c'):
+            cache.put(key, [], key)
+        expect(cache).to(have_len(2))
+        expect(cache.evictions).to(equal(1))
+        cache.clear()
+        expect(cache).to(have_len(0))
+
+
+class CachedBindingTest(BaseDatabaseTest):
+
+    def setUp(self):
+        super().setUp()
+        self.session.add(User(name='user', email=EMail(mail='a@example.com')))
+        self.session.add(User(name='other'))
+        self.session.commit()
+        self.result_cache = LRUResultCache()
+        self.aggregator = Aggregator()
+
+        class UserBinding(QueryBindingConfiguration):
+            __config__ = {
+                'for': User,
+                'result_cache': self.result_cache,
+                'instrumentation': self.aggregator,
+                'binding': {
+                    'name': 'name',
+                    'mail': {
+                        'param': 'mail',
+                        'join': 'email',
+                    },
+                },
+            }
+
+        self.binding = UserBinding(self.session)
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+
+    def tearDown(self):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+        self.session.rollback()
+        self.session.expunge_all()
+        super().tearDown()
+
+    def _record(self, conn, cursor, statement, *args):
+        if statement.startswith('SELECT'):
+            self.statements.append(statement)
+
+    def fetch(self, params):
+        return [user.name for user in self.binding.fetch_params(params)]
+
+    def test_repeated_fetch_skips_database(self):
+        params = {'filter[param][mail][like]': '%@example.com'}
+        expect(self.fetch(params)).to(equal(['user']))
+        expect(self.fetch(params)).to(equal(['user']))
+        expect(self.statements).to(have_len(1))
+        expect(self.aggregator.counter(
+            'result_cache_hits',
+            binding='UserBinding',
+        )).to(equal(1))
+
+    def test_values_are_part_of_the_key(self):
+        expect(self.fetch({'filter[param][name][eq]': 'user'})).to(
+            equal(['user']))
+        expect(self.fetch({'filter[param][name][eq]': 'other'})).to(
+            equal(['other']))
+
+    def test_hit_returns_session_objects(self):
+        self.fetch({})
+        self.session.expunge_all()
+        users = self.binding.fetch_params({})
+        for user in users:
+            expect(user in self.session).to(be_true)
+
+    def test_commit_invalidates_involved_tables(self):
+        params = {'filter[param][mail][like]': '%@example.com'}
+        self.fetch(params)
+        self.session.add(EMail(mail='unrelated@example.com'))
+        self.session.commit()
+        self.fetch(params)
+        expect(self.statements).to(have_len(2))
+
+    def test_flush_invalidates(self):
+        self.fetch({})
+        self.session.add(User(name='new'))
+        self.session.flush()
+        expect(sorted(self.fetch({}))).to(equal(['new', 'other', 'user']))
+
+    def test_uncommitted_results_not_shared(self):
+        self.session.add(User(name='new'))
+        self.session.flush()
+        expect(sorted(self.fetch({}))).to(equal(['new', 'other', 'user']))
+        expect(sorted(self.fetch({}))).to(equal(['new', 'other', 'user']))
+        self.session.rollback()
+        expect(sorted(self.fetch({}))).to(equal(['other', 'user']))
+        expect(sorted(self.fetch({}))).to(equal(['other', 'user']))
+        expect(self.statements).to(have_len(3))
+        expect(self.result_cache.hits).to(equal(1))
+
+    def test_unflushed_changes_bypass_cache(self):
+        self.fetch({})
+        self.session.add(User(name='new'))
+        expect(sorted(self.fetch({}))).to(equal(['new', 'other', 'user']))
+        expect(self.result_cache.hits).to(equal(0))
+
+    def test_unrelated_changes_keep_entries(self):
+        params = {'filter[param][name][eq]': 'user'}
+        self.fetch(params)
+        self.session.add(EMail(mail='unrelated@example.com'))
+        self.session.commit()
+        self.fetch(params)
+        expect(self.result_cache.hits).to(equal(1))
+
+
+def test_tables_of():
+    statement = select(User).join(User.email)
+    expect(tables_of(statement)).to(equal(frozenset(['users', 'email'])))
+
+
+def test_key_includes_bind():
+    statement = select(User)
+    compiled = statement.compile()
+    expect(key_of(compiled, create_engine('sqlite:///a.db'))).not_to(
+        equal(key_of(compiled, create_engine('sqlite:///b.db'))))
@@ -0,0 +1,124 @@
+# -*- encoding: utf-8 -*-
+
+from datetime import datetime
+
+from expects import *
+
+from sqlalchemy_filterparams.query_binding_configuration import (
+    QueryBindingConfiguration
+)
+from sqlalchemy_filterparams.streaming import chunked, stream_strategy_of
+
+from sqlalchemy_filterparams_tests.database_test import BaseDatabaseTest
+from sqlalchemy_filterparams_tests.models import User
+
+
+def test_chunked():
+    expect(list(chunked(range(5), 2))).to(equal([[0, 1], [2, 3], [4]]))
+    expect(list(chunked([], 2))).to(equal([]))
+
+
+class StreamingTest(BaseDatabaseTest):
+
+    def create_cl(self):
+        class Config(QueryBindingConfiguration):
+            __config__ = {
+                'for': User,
+                'binding': {
+                    'name': 'name',
+                    'fullname': 'fullname',
+                    'created_at': 'created_at',
+                },
+            }
+        return Config
+
+    def setUp(self):
+        super().setUp()
+        self.config_cl = self.create_cl()
+        for index, name in enumerate(['a', 'b', 'b', 'c', 'd', 'd', 'e']):
+            self.session.add(User(
+                name=name,
+                fullname='group%d' % (index % 2),
+                created_at=datetime(2015, 10, 21 - index),
+            ))
+        self.session.commit()
+
+    def batches(self, params, batch_size=3, strategy=None):
+        return list(self.config_cl(self.session).stream_batches_params(
+            params, batch_size, strategy))
+
+    def expected(self, *order):
+        return [
+            user.id for user in self.session.query(User).order_by(*order)
+        ]
+
+    def test_sqlite_falls_back_to_keyset(self):
+        expect(stream_strategy_of(self.session.query(User))).to(
+            equal('keyset'))
+
+    def test_keyset_batches(self):
+        batches = self.batches({'filter[order]': 'name'})
+        expect([len(batch) for batch in batches]).to(equal([3, 3, 1]))
+        expect([user.id for batch in batches for user in batch]).to(
+            equal(self.expected(User.name, User.id)))
+
+    def test_keyset_batches_mixed_directions(self):
+        batches = self.batches(
+            {'filter[order]': ['fullname', 'desc(created_at)']},
+            batch_size=2,
+        )
+        expect([user.id for batch in batches for user in batch]).to(
+            equal(self.expected(User.fullname, User.created_at.desc())))
+
+    def test_keyset_batches_null_keys(self):
+        for user in self.session.query(User).filter(User.id.in_([1, 4])):
+            user.fullname = None
+        self.session.commit()
+        batches = self.batches(
+            {'filter[order]': 'fullname'},
+            batch_size=1,
+            strategy='keyset',
+        )
+        expect([user.id for batch in batches for user in batch]).to(
+            equal(self.expected(User.fullname, User.id)))
+        batches = self.batches(
+            {'filter[order]': 'desc(fullname)'},
+            batch_size=2,
+            strategy='keyset',
+        )
+        expect([user.id for batch in batches for user in batch]).to(
+            equal(self.expected(User.fullname.desc(), User.id)))
+
+    def test_keyset_exact_multiple(self):
+        batches = self.batches({'filter[order]': 'name'}, batch_size=7)
+        expect([len(batch) for batch in batches]).to(equal([7]))
+
+    def test_cursor_batches(self):
+        batches = self.batches(
+            {'filter[order]': 'desc(name)'},
+            strategy='cursor',
+        )
+        expect([len(batch) for batch in batches]).to(equal([3, 3, 1]))
+        names = [user.name for batch in batches for user in batch]
+        expect(names).to(equal(['e', 'd', 'd', 'c', 'b', 'b', 'a']))
+
+    def test_stream_items(self):
+        users = list(self.config_cl(self.session).stream_params({
+            'filter[param][fullname][eq]': 'group0',
+            'filter[order]': 'name',
+        }, batch_size=2))
+        expect([user.name for user in users]).to(equal(['a', 'b', 'd', 'e']))
+
+    def test_stream_empty(self):
+        for strategy in ('cursor', 'keyset'):
+            expect(self.batches({
+                'filter[param][created_at][gt][a]': '2015-10-21',
+                'filter[param][created_at][lt][b]': '2015-10-15',
+                'filter[binding]': 'a&b',
+            }, strategy=strategy)).to(equal([]))
+
+    def test_invalid_arguments(self):
+        expect(lambda: self.batches({}, strategy='unknown')).to(
+            raise_error(ValueError))
+        expect(lambda: self.batches({}, batch_size=0)).to(
+            raise_error(ValueError))
@@ -2,7 +2,7 @@
 
 from expects import *
 
-from datetime import datetime, date, time
+from datetime import datetime, date, time, timezone
 from decimal import Decimal
 
 from sqlalchemy import (
@@ -16,7 +16,17 @@ from sqlalchemy import (
     Time,
 )
 
-from sqlalchemy_filterparams.util import is_type, convert
+from sqlalchemy_filterparams.util import (
+    ConverterRegistry,
+    DEFAULT_REGISTRY,
+    STRICT_CONVERTERS,
+    is_type,
+    convert,
+    parse_date,
+    parse_datetime,
+    parse_time,
+    registry_for,
+)
 
 
 def test_is_type_class():
@@ -99,6 +109,56 @@ def test_convert_datetime_unparseable():
         raise_error(ValueError))
 
 
+def test_convert_datetime_iso_offset():
+    expect(parse_datetime('2016-01-01T18:00:00Z')).to(equal(
+        datetime(2016, 1, 1, 18, 0, 0, tzinfo=timezone.utc)))
+
+
+def test_convert_datetime_epoch():
+    expect(parse_datetime('1451671200')).to(equal(
+        datetime(2016, 1, 1, 18, 0, 0)))
+
+
+def test_convert_datetime_compact():
+    expect(parse_datetime('201601011800')).to(equal(
+        datetime(2016, 1, 1, 18, 0, 0)))
+    expect(parse_datetime('20160101180000')).to(equal(
+        datetime(2016, 1, 1, 18, 0, 0)))
+
+
+def test_convert_datetime_relative_not_memoized():
+    expect(parse_datetime('Monday')).not_to(be(parse_datetime('Monday')))
+
+
+def test_convert_date_from_datetime_string():
+    expect(parse_date('2016-01-01T18:00:00')).to(equal(date(2016, 1, 1)))
+
+
+def test_convert_time_from_datetime_string():
+    expect(parse_time('2016-01-01 18:00:00')).to(equal(time(18, 0)))
+
+
+def test_convert_date_memoized():
+    expect(parse_date('2016-01-01')).to(be(parse_date('2016-01-01')))
+
+
+def test_strict_accepts_iso():
+    expect(STRICT_CONVERTERS[DateTime]('2016-01-01 18:00:00')).to(equal(
+        datetime(2016, 1, 1, 18, 0, 0)))
+    expect(STRICT_CONVERTERS[Date]('2016-01-01')).to(equal(
+        date(2016, 1, 1)))
+    expect(STRICT_CONVERTERS[Time]('04:00')).to(equal(time(4, 0)))
+
+
+def test_strict_rejects_other_formats():
+    expect(lambda: STRICT_CONVERTERS[DateTime]('18:00:00 2016-01-01')).to(
+        raise_error(ValueError))
+    expect(lambda: STRICT_CONVERTERS[Date]('01.02.2016')).to(
+        raise_error(ValueError))
+    expect(lambda: STRICT_CONVERTERS[Time]('4:00')).to(
+        raise_error(ValueError))
+
+
 def test_custom_converter():
     class SomeStuff:
         pass
@@ -106,3 +166,33 @@ def test_custom_converter():
     expect(convert('random', SomeStuff, {
         SomeStuff: lambda data: '%s stuff' % data
     })).to(equal('random stuff'))
+
+
+def test_registry_prefers_most_specific_type():
+    registry = ConverterRegistry({
+        Numeric: lambda data: 'numeric',
+        Float: lambda data: 'float',
+    })
+    expect(registry.convert('3', Float())).to(equal('float'))
+    expect(registry.convert('3', DECIMAL)).to(equal('numeric'))
+
+
+def test_registry_caches_lookup():
+    registry = ConverterRegistry({Integer: int})
+    expect(registry.converter_for(Integer())).to(be(int))
+    expect(registry._cache).to(have_key(Integer))
+
+
+def test_registry_no_converter():
+    expect(ConverterRegistry().converter_for(Unicode)).to(be_none)
+
+
+def test_registry_convert_all():
+    expect(DEFAULT_REGISTRY.convert_all(['1', '2'], Integer)).to(
+        equal([1, 2]))
+
+
+def test_registry_for_default():
+    expect(registry_for(None)).to(be(DEFAULT_REGISTRY))
+    registry = ConverterRegistry({Integer: int})
+    expect(registry_for(registry)).to(be(registry))